@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Scale benchmarks for dbt Test Fixer.
+
+Generates synthetic artifacts of a configurable size and times the main
+pipeline stages offline:
+- analyze_failed_tests (artifacts on disk → analysis JSON)
+- PromptManager.generate_prompt (in-memory rendering of every failed test)
+- cmd_generate_prompts (analysis JSON → prompt files)
+
+Each stage reports wall time (best of --repeat), throughput in failed tests
+per second and peak traced memory, and is compared against a stored baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --preset large
+    python benchmarks/run_benchmarks.py --models 5000 --tests 15000 --failure-rate 0.05 --refs-per-test 2
+    python benchmarks/run_benchmarks.py --preset small --update-baseline
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from contextlib import contextmanager, redirect_stdout
+from typing import Dict, Any, Callable, Optional
+
+# Add the repository root to the path
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_artifacts import write_artifacts  # noqa: E402
+from utils.dag_index import clear_memory_cache  # noqa: E402
+from utils.failed_test import load_failed_tests  # noqa: E402
+from utils.prompts import PromptManager  # noqa: E402
+from utils.test_analyzer import analyze_failed_tests  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+PRESETS = {
+    "small": {"models": 500, "tests": 1500, "failure_rate": 0.1, "refs_per_test": 1},
+    "medium": {"models": 5000, "tests": 15000, "failure_rate": 0.05, "refs_per_test": 1},
+    "large": {"models": 20000, "tests": 60000, "failure_rate": 0.02, "refs_per_test": 2},
+}
+
+
+@contextmanager
+def working_directory(path: Path):
+    """Temporarily change the working directory (the CLI commands use relative data/ paths)."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def measure(stage: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """
+    Time a stage (best of repeat) and measure its peak traced memory in a separate run.
+
+    Args:
+        stage: Zero-argument callable to benchmark
+        repeat: Number of timed runs
+        setup: Optional callable run before each run, outside the timing
+
+    Returns:
+        Dictionary with seconds and peak_mb
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        stage()
+        timings.append(time.perf_counter() - start)
+
+    # Memory is traced separately because tracemalloc slows execution down
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": min(timings), "peak_mb": peak / (1024 * 1024)}
+
+
+def scenario_key(params: Dict[str, Any]) -> str:
+    """Stable name for a benchmark scenario, used to look up its baseline."""
+    return "models={models},tests={tests},failure_rate={failure_rate},refs_per_test={refs_per_test}".format(**params)
+
+
+def run_benchmarks(params: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """
+    Run every stage for one scenario in a temporary workspace.
+
+    Args:
+        params: Synthetic artifact parameters
+        repeat: Number of timed runs per stage
+
+    Returns:
+        Results with artifact sizes, failed test count and per-stage metrics
+    """
+    with tempfile.TemporaryDirectory(prefix="dbt_test_fixer_bench_") as workspace:
+        workspace = Path(workspace)
+        artifacts_dir = workspace / "data" / "artifacts"
+        analysis_path = workspace / "data" / "analysis" / "failed_tests_debug_data.json"
+        analysis_path.parent.mkdir(parents=True)
+
+        print(f"🧪 Generating synthetic artifacts ({scenario_key(params)})...")
+        sizes = write_artifacts(artifacts_dir, **params)
+        print(f"   manifest.json: {sizes['manifest.json']:,} bytes | run_results.json: {sizes['run_results.json']:,} bytes")
+
+        def drop_manifest_index():
+            # Measure the analyzer cold, without the indexes cached by a previous run
+            for index_file in artifacts_dir.glob("*.index.json"):
+                index_file.unlink()
+            shutil.rmtree(workspace / "data" / "cache" / "dag", ignore_errors=True)
+            clear_memory_cache()
+
+        def analyze():
+            with working_directory(workspace):
+                analyze_failed_tests(str(artifacts_dir), str(analysis_path))
+
+        stages = {}
+        print("⏱️  analyze_failed_tests...")
+        stages["analyze_failed_tests"] = measure(analyze, repeat, setup=drop_manifest_index)
+
+        failed_tests = load_failed_tests(analysis_path)
+        prompt_manager = PromptManager()
+
+        print("⏱️  PromptManager.generate_prompt...")
+        stages["generate_prompt"] = measure(
+            lambda: [prompt_manager.generate_prompt(test) for test in failed_tests], repeat
+        )
+
+        from utils.commands import cmd_generate_prompts
+
+        def generate_prompt_files():
+            with working_directory(workspace), open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                if cmd_generate_prompts(SimpleNamespace(jobs=1)) != 0:
+                    raise RuntimeError("cmd_generate_prompts failed")
+
+        print("⏱️  cmd_generate_prompts...")
+        stages["cmd_generate_prompts"] = measure(generate_prompt_files, repeat)
+
+    for metrics in stages.values():
+        metrics["tests_per_second"] = len(failed_tests) / metrics["seconds"] if metrics["seconds"] else 0.0
+
+    return {"params": params, "artifact_bytes": sizes, "failed_tests": len(failed_tests), "stages": stages}
+
+
+def compare_to_baseline(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    time_threshold: float,
+    memory_threshold: float,
+    min_delta: float
+) -> bool:
+    """
+    Print a comparison against the baseline and report whether any stage regressed.
+
+    A slowdown only counts when it also exceeds min_delta seconds, so timer
+    noise on very fast stages is not reported as a regression.
+
+    Returns:
+        True if no stage exceeds the baseline by more than the thresholds
+    """
+    ok = True
+    print(f"\n{'Stage':<24} {'Time (s)':>10} {'Baseline':>10} {'Ratio':>7} {'Peak MB':>9} {'Baseline':>9} {'Tests/s':>10}")
+    for stage, metrics in results["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if base:
+            time_ratio = metrics["seconds"] / base["seconds"] if base["seconds"] else 1.0
+            memory_ratio = metrics["peak_mb"] / base["peak_mb"] if base["peak_mb"] else 1.0
+            slower = time_ratio > time_threshold and metrics["seconds"] - base["seconds"] > min_delta
+            regressed = slower or memory_ratio > memory_threshold
+            ok = ok and not regressed
+            flag = " ❌ regression" if regressed else ""
+            print(f"{stage:<24} {metrics['seconds']:>10.3f} {base['seconds']:>10.3f} {time_ratio:>6.2f}x "
+                  f"{metrics['peak_mb']:>9.1f} {base['peak_mb']:>9.1f} {metrics['tests_per_second']:>10.1f}{flag}")
+        else:
+            print(f"{stage:<24} {metrics['seconds']:>10.3f} {'-':>10} {'-':>7} "
+                  f"{metrics['peak_mb']:>9.1f} {'-':>9} {metrics['tests_per_second']:>10.1f}")
+    return ok
+
+
+def main():
+    """Benchmark CLI entry point."""
+    parser = argparse.ArgumentParser(description="Scale benchmarks for dbt Test Fixer (offline, synthetic artifacts)")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small", help="Scenario size (default: small)")
+    parser.add_argument("--models", type=int, help="Number of models (overrides preset)")
+    parser.add_argument("--tests", type=int, help="Number of tests (overrides preset)")
+    parser.add_argument("--failure-rate", type=float, help="Fraction of failing tests (overrides preset)")
+    parser.add_argument("--refs-per-test", type=int, help="Models referenced by each test (overrides preset)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage; the best is reported (default: 3)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the scenario's baseline")
+    parser.add_argument("--time-threshold", type=float, default=1.5, help="Allowed slowdown vs baseline (default: 1.5x)")
+    parser.add_argument("--memory-threshold", type=float, default=1.25, help="Allowed peak memory growth vs baseline (default: 1.25x)")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="Ignore slowdowns smaller than this many seconds (default: 0.05)")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args()
+
+    params = dict(PRESETS[args.preset])
+    for name in ("models", "tests", "failure_rate", "refs_per_test"):
+        if getattr(args, name) is not None:
+            params[name] = getattr(args, name)
+
+    results = run_benchmarks(params, args.repeat)
+
+    baseline_path = Path(args.baseline)
+    baselines = {}
+    if baseline_path.exists():
+        with open(baseline_path, 'r') as f:
+            baselines = json.load(f)
+
+    key = scenario_key(params)
+    ok = compare_to_baseline(results, baselines.get(key, {}), args.time_threshold, args.memory_threshold, args.min_delta)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results saved to: {args.output}")
+
+    if args.update_baseline:
+        baselines[key] = {"stages": {
+            stage: {"seconds": round(metrics["seconds"], 4), "peak_mb": round(metrics["peak_mb"], 2)}
+            for stage, metrics in results["stages"].items()
+        }}
+        with open(baseline_path, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"📌 Baseline updated for {key}")
+        return 0
+
+    if key not in baselines:
+        print("\n💡 No baseline for this scenario. Run with --update-baseline to store one.")
+        return 0
+
+    if ok:
+        print("\n✅ No regressions against baseline")
+        return 0
+    print("\n❌ Performance regression detected")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Synthetic dbt artifact generator for offline benchmarks.
+
+Builds a manifest.json / run_results.json pair shaped like real dbt output:
+sources feed a layered model DAG, generic and custom tests reference models,
+and a configurable share of tests fail.
+"""
+
+import json
+import random
+from pathlib import Path
+from typing import Dict, Any, Tuple, Union
+
+TEST_KINDS = ["not_null", "unique", "accepted_values", "relationships", "expression_is_true", "custom"]
+PRIORITY_TAGS = ["high_priority", "medium_priority", "low_priority"]
+PACKAGE = "analytics"
+
+
+def generate_artifacts(
+    models: int = 1000,
+    tests: int = 3000,
+    failure_rate: float = 0.1,
+    refs_per_test: int = 1,
+    sources: int = 50,
+    seed: int = 42
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Generate a synthetic manifest and run_results.
+
+    Args:
+        models: Number of model nodes
+        tests: Number of test nodes
+        failure_rate: Fraction of tests that fail (0.0 - 1.0)
+        refs_per_test: Number of models each test refs
+        sources: Number of source nodes
+        seed: Random seed, so the same parameters give the same artifacts
+
+    Returns:
+        Tuple of (manifest, run_results)
+    """
+    rng = random.Random(seed)
+    nodes: Dict[str, Any] = {}
+    source_nodes: Dict[str, Any] = {}
+    exposures: Dict[str, Any] = {}
+    parent_map: Dict[str, list] = {}
+    child_map: Dict[str, list] = {}
+
+    def add_edge(parent: str, child: str):
+        parent_map.setdefault(child, []).append(parent)
+        child_map.setdefault(parent, []).append(child)
+
+    for i in range(sources):
+        source_id = f"source.{PACKAGE}.raw.table_{i}"
+        source_nodes[source_id] = {
+            "unique_id": source_id,
+            "resource_type": "source",
+            "name": f"table_{i}",
+            "source_name": "raw",
+            "package_name": PACKAGE,
+            "original_file_path": "models/staging/sources.yml"
+        }
+        parent_map[source_id] = []
+        child_map[source_id] = []
+
+    model_ids = []
+    for i in range(models):
+        model_id = f"model.{PACKAGE}.model_{i}"
+        if i < max(1, models // 10) or not model_ids:
+            parents = [f"source.{PACKAGE}.raw.table_{rng.randrange(sources)}"]
+        else:
+            parents = rng.sample(model_ids, min(len(model_ids), rng.randint(1, 3)))
+
+        nodes[model_id] = {
+            "unique_id": model_id,
+            "resource_type": "model",
+            "name": f"model_{i}",
+            "package_name": PACKAGE,
+            "original_file_path": f"models/layer_{i % 5}/model_{i}.sql",
+            "raw_code": "select\n" + ",\n".join(f"    column_{c}" for c in range(20)) + "\nfrom upstream",
+            "columns": {f"column_{c}": {"name": f"column_{c}", "description": ""} for c in range(10)},
+            "config": {"materialized": "table", "tags": []},
+            "depends_on": {"nodes": parents, "macros": []}
+        }
+        parent_map.setdefault(model_id, [])
+        child_map.setdefault(model_id, [])
+        for parent in parents:
+            add_edge(parent, model_id)
+        model_ids.append(model_id)
+
+    for i in range(max(1, models // 100)):
+        exposure_id = f"exposure.{PACKAGE}.dashboard_{i}"
+        exposures[exposure_id] = {"unique_id": exposure_id, "resource_type": "exposure", "name": f"dashboard_{i}"}
+        parent_map[exposure_id] = []
+        child_map[exposure_id] = []
+        for parent in rng.sample(model_ids, min(len(model_ids), 3)):
+            add_edge(parent, exposure_id)
+
+    results = []
+    for i in range(tests):
+        kind = TEST_KINDS[i % len(TEST_KINDS)]
+        referenced = rng.sample(model_ids, min(len(model_ids), max(1, refs_per_test)))
+        model_name = nodes[referenced[0]]["name"]
+        column = f"column_{rng.randrange(10)}"
+
+        kwargs: Dict[str, Any] = {"column_name": column, "model": f"{{{{ get_where_subquery(ref('{model_name}')) }}}}"}
+        if kind == "accepted_values":
+            kwargs["values"] = ["active", "inactive", "pending"]
+        elif kind == "relationships":
+            kwargs["to"] = f"ref('{nodes[referenced[-1]]['name']}')"
+            kwargs["field"] = "id"
+
+        if kind == "custom":
+            test_name = f"assert_{model_name}_{column}_is_valid_{i}"
+            test_id = f"test.{PACKAGE}.{test_name}"
+            test_metadata: Dict[str, Any] = {}
+        else:
+            prefix = "dbt_utils_" if kind == "expression_is_true" else ""
+            test_name = f"{prefix}{kind}_{model_name}_{column}_{i}"
+            test_id = f"test.{PACKAGE}.{test_name}.{rng.getrandbits(40):010x}"
+            test_metadata = {"name": kind, "kwargs": kwargs, "namespace": "dbt_utils" if prefix else None}
+
+        nodes[test_id] = {
+            "unique_id": test_id,
+            "resource_type": "test",
+            "name": test_name,
+            "package_name": PACKAGE,
+            "original_file_path": f"models/layer_{i % 5}/schema.yml",
+            "refs": [{"name": nodes[model_id]["name"], "package": None, "version": None} for model_id in referenced],
+            "config": {
+                "tags": [rng.choice(PRIORITY_TAGS)],
+                "severity": "ERROR",
+                "error_if": "!= 0",
+                "warn_if": "!= 0"
+            },
+            "test_metadata": test_metadata,
+            "depends_on": {"nodes": referenced, "macros": []}
+        }
+        parent_map[test_id] = []
+        child_map[test_id] = []
+        for model_id in referenced:
+            add_edge(model_id, test_id)
+
+        failed = rng.random() < failure_rate
+        failures = rng.randint(1, 5000) if failed else 0
+        results.append({
+            "unique_id": test_id,
+            "status": "fail" if failed else "pass",
+            "failures": failures,
+            "message": f"Got {failures} results, configured to fail if != 0" if failed else None,
+            "execution_time": round(rng.uniform(0.1, 5.0), 3),
+            "compiled_code": (
+                f"select {column}\nfrom analytics.{model_name}\n"
+                f"where {column} is null\n" + "-- padding\n" * rng.randint(5, 50)
+            ),
+            "thread_id": f"Thread-{i % 8}",
+            "timing": [],
+            "adapter_response": {}
+        })
+
+    manifest = {
+        "metadata": {"dbt_version": "1.8.0", "generated_at": "2026-01-01T00:00:00Z"},
+        "nodes": nodes,
+        "sources": source_nodes,
+        "exposures": exposures,
+        "parent_map": parent_map,
+        "child_map": child_map
+    }
+    run_results = {
+        "metadata": {"dbt_version": "1.8.0", "generated_at": "2026-01-01T00:00:00Z", "invocation_id": f"synthetic-{seed}"},
+        "results": results,
+        "elapsed_time": sum(result["execution_time"] for result in results)
+    }
+    return manifest, run_results
+
+
+def write_artifacts(artifacts_dir: Union[str, Path], **params) -> Dict[str, int]:
+    """
+    Generate synthetic artifacts and write them to a directory.
+
+    Args:
+        artifacts_dir: Directory to write manifest.json and run_results.json to
+        **params: Parameters for generate_artifacts
+
+    Returns:
+        Mapping of artifact name to size in bytes
+    """
+    artifacts_dir = Path(artifacts_dir)
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    manifest, run_results = generate_artifacts(**params)
+
+    sizes = {}
+    for name, artifact in (("manifest.json", manifest), ("run_results.json", run_results)):
+        path = artifacts_dir / name
+        with open(path, 'w') as f:
+            json.dump(artifact, f)
+        sizes[name] = path.stat().st_size
+    return sizes
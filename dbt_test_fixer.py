@@ -8,12 +8,21 @@ This script provides functionality to:
 - Generate prompts for fixing failed tests
 
 Usage:
+    python dbt_test_fixer.py [--in-memory [--write-artifacts] [--write-analysis]] [--incremental | --cluster] [--analysis-format FORMAT]
+    python dbt_test_fixer.py --target-dir DIR [--write-analysis] [--incremental | --cluster] [--analysis-format FORMAT]
+    python dbt_test_fixer.py [--metrics-output PATH] [--profile [--profile-output PATH]] [COMMAND ...]
+    python dbt_test_fixer.py [--token-budget TOKENS] [COMMAND ...]
     python dbt_test_fixer.py get-last-run
-    python dbt_test_fixer.py fetch-artifacts [--run-id RUN_ID]
-    python dbt_test_fixer.py analyze-artifacts [--output OUTPUT_PATH] [--quiet]
-    python dbt_test_fixer.py generate-prompts
+    python dbt_test_fixer.py fetch-artifacts [--run-id RUN_ID] [--artifact NAME] [--max-workers N] [--no-cache]
+    python dbt_test_fixer.py analyze-artifacts [--output OUTPUT_PATH] [--quiet] [--run-id RUN_ID] [--no-cache] [--stream-manifest] [--target-dir DIR] [--format FORMAT] [--cluster]
+    python dbt_test_fixer.py generate-prompts [--analysis PATH] [--jobs N] [--processes] [--incremental | --cluster]
+    python dbt_test_fixer.py fan-out [--job ACCOUNT:JOB ...] [--jobs-file PATH] [--max-concurrency N] [--output-dir DIR]
+    python dbt_test_fixer.py history {ingest,flaky,first-failure,streaks} [...]
+    python dbt_test_fixer.py watch [--min-interval S] [--max-interval S] [--incremental] [--once]
+    python dbt_test_fixer.py webhook {serve,send} [...]
 """
 
+import os
 import sys
 import argparse
 from pathlib import Path
@@ -25,12 +34,115 @@ from utils.commands import (
     cmd_get_last_run,
     cmd_fetch_artifacts,
     cmd_analyze_artifacts,
-    cmd_generate_prompts
+    cmd_generate_prompts,
+    cmd_fan_out,
+    cmd_history,
+    cmd_watch,
+    cmd_webhook
 )
+from utils.failed_test import ANALYSIS_FORMATS
+from utils.metrics import get_metrics, span
+from utils.test_analyzer import find_analysis_file
 
+DEFAULT_PROFILE_OUTPUT = "data/metrics/profile.pstats"
 
-def cmd_default_workflow():
+
+def cmd_in_memory_workflow(args):
+    """Execute the full workflow in memory, writing intermediate files only when asked for."""
+    from utils.pipeline import run_pipeline
+
+    print("🚀 Starting dbt Test Fixer workflow (in-memory)...")
+    print("=" * 60)
+
+    try:
+        account_id = os.environ.get("DBT_CLOUD_ACCOUNT_ID")
+        job_id = os.environ.get("DBT_CLOUD_JOB_ID")
+        if not account_id or not job_id:
+            print("❌ Error: DBT_CLOUD_ACCOUNT_ID and DBT_CLOUD_JOB_ID environment variables are required")
+            return 1
+
+        summary = run_pipeline(
+            account_id,
+            job_id=job_id,
+            artifacts_dir="data/artifacts" if args.write_artifacts else None,
+            write_analysis_file=args.write_analysis,
+            analysis_format=args.analysis_format,
+            incremental=args.incremental,
+            cluster=args.cluster
+        )
+
+        if not summary["run_id"]:
+            print("❌ No completed runs found. Check your environment variables.")
+            return 1
+
+        print("=" * 60)
+        if not summary["failed_tests"]:
+            print(f"🎉 All tests are passing in run {summary['run_id']}! No prompts needed.")
+            return 0
+
+        print(f"✅ Workflow completed for run {summary['run_id']}: "
+              f"{summary['prompts_generated']}/{summary['failed_tests']} prompts generated")
+        if args.incremental:
+            print(f"♻️  {summary['prompts_unchanged']} prompts unchanged, {summary['prompts_pruned']} pruned")
+        if args.cluster:
+            print(f"🧩 {summary['failed_tests']} failed tests grouped into {summary['clusters']} clusters")
+        print("📁 Check data/prompts/ for individual test fix prompts")
+        if summary["analysis_path"]:
+            print(f"📄 Check {summary['analysis_path']} for detailed analysis")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Workflow failed: {e}")
+        return 1
+
+
+def cmd_local_workflow(args):
+    """Execute analyze → generate on a local dbt target directory, without dbt Cloud."""
+    from utils.pipeline import run_local_pipeline
+
+    print(f"🚀 Starting dbt Test Fixer workflow (local artifacts in {args.target_dir})...")
+    print("=" * 60)
+
+    try:
+        summary = run_local_pipeline(
+            args.target_dir,
+            write_analysis_file=args.write_analysis,
+            analysis_format=args.analysis_format,
+            incremental=args.incremental,
+            cluster=args.cluster
+        )
+
+        print("=" * 60)
+        if not summary["failed_tests"]:
+            print("🎉 All tests are passing! No prompts needed.")
+            return 0
+
+        print(f"✅ Workflow completed: {summary['prompts_generated']}/{summary['failed_tests']} prompts generated")
+        if args.incremental:
+            print(f"♻️  {summary['prompts_unchanged']} prompts unchanged, {summary['prompts_pruned']} pruned")
+        if args.cluster:
+            print(f"🧩 {summary['failed_tests']} failed tests grouped into {summary['clusters']} clusters")
+        print("📁 Check data/prompts/ for individual test fix prompts")
+        if summary["analysis_path"]:
+            print(f"📄 Check {summary['analysis_path']} for detailed analysis")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Workflow failed: {e}")
+        return 1
+
+
+def cmd_default_workflow(args=None):
     """Execute the full workflow: get last run → fetch artifacts → analyze tests → generate prompts."""
+    cluster = getattr(args, "cluster", False)
+    if cluster and getattr(args, "incremental", False):
+        print("❌ Error: --cluster and --incremental cannot be combined")
+        return 1
+    if getattr(args, "target_dir", None):
+        return cmd_local_workflow(args)
+    if getattr(args, "in_memory", False):
+        return cmd_in_memory_workflow(args)
+
     print("🚀 Starting dbt Test Fixer workflow...")
     print("=" * 60)
 
@@ -40,7 +152,8 @@ def cmd_default_workflow():
         from types import SimpleNamespace
         args_mock = SimpleNamespace()
 
-        result = cmd_get_last_run(args_mock)
+        with span("workflow.get_last_run"):
+            result = cmd_get_last_run(args_mock)
         if result != 0:
             print("❌ Failed to get last run. Check your environment variables.")
             return 1
@@ -49,29 +162,32 @@ def cmd_default_workflow():
         print("📦 Step 2/4: Fetching artifacts from last run...")
         args_mock = SimpleNamespace(run_id=None)
 
-        result = cmd_fetch_artifacts(args_mock)
+        with span("workflow.fetch_artifacts"):
+            result = cmd_fetch_artifacts(args_mock)
         if result != 0:
             print("❌ Failed to fetch artifacts.")
             return 1
 
         # Step 3: Analyze tests
         print("🔬 Step 3/4: Analyzing failed tests...")
-        args_mock = SimpleNamespace(quiet=True, output_path=None)
+        args_mock = SimpleNamespace(quiet=True, output_path=None, format=getattr(args, "analysis_format", None), cluster=cluster)
 
-        result = cmd_analyze_artifacts(args_mock)
+        with span("workflow.analyze_artifacts"):
+            result = cmd_analyze_artifacts(args_mock)
         if result != 0:
             print("❌ Failed to analyze tests.")
             return 1
 
         # Step 4: Generate prompts
         print("🔧 Step 4/4: Generating fix prompts...")
-        args_mock = SimpleNamespace()
+        args_mock = SimpleNamespace(incremental=getattr(args, "incremental", False), cluster=cluster)
 
-        result = cmd_generate_prompts(args_mock)
+        with span("workflow.generate_prompts"):
+            result = cmd_generate_prompts(args_mock)
         if result != 0:
             # Check if it's because there are no failed tests
-            debug_file = Path("data/analysis/failed_tests_debug_data.json")
-            if not debug_file.exists():
+            debug_file = find_analysis_file()
+            if debug_file is None:
                 print("✅ No failed tests found - nothing to fix!")
                 print("=" * 60)
                 print("🎉 All tests are passing! No prompts needed.")
@@ -84,7 +200,7 @@ def cmd_default_workflow():
         print("=" * 60)
         print("✅ Workflow completed successfully!")
         print("📁 Check data/prompts/ for individual test fix prompts")
-        print("📄 Check data/analysis/failed_tests_debug_data.json for detailed analysis")
+        print(f"📄 Check {find_analysis_file()} for detailed analysis")
         return 0
 
     except Exception as e:
@@ -92,6 +208,53 @@ def cmd_default_workflow():
         return 1
 
 
+def run_instrumented(handler, args):
+    """Run a command inside a metrics span, optionally under cProfile, and write the requested outputs."""
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    try:
+        with span(args.command or "workflow") as record:
+            if profiler is not None:
+                result = profiler.runcall(handler, args)
+            else:
+                result = handler(args)
+            record["exit_code"] = result
+        return result
+    finally:
+        if profiler is not None:
+            write_profile(profiler, args.profile_output)
+        if args.metrics_output:
+            metrics_path = get_metrics().write(args.metrics_output)
+            print(f"📊 Metrics written to {metrics_path}")
+
+
+def write_profile(profiler, output_path: str, limit: int = 25):
+    """Dump cProfile stats to a file and print the top functions by cumulative time."""
+    import pstats
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(output_path)
+
+    print(f"\n🔍 Top {limit} functions by cumulative time:")
+    pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(limit)
+    print(f"🔍 Profile written to {output_path} (inspect with: python -m pstats {output_path})")
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main():
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -102,15 +265,94 @@ Examples:
   # Default workflow (recommended)
   python dbt_test_fixer.py
 
+  # Default workflow without intermediate files (artifacts and analysis stay in memory)
+  python dbt_test_fixer.py --in-memory
+  python dbt_test_fixer.py --in-memory --write-analysis
+
+  # dbt-core CI: read run_results.json / manifest.json straight from target/
+  python dbt_test_fixer.py --target-dir target
+  python dbt_test_fixer.py analyze-artifacts --target-dir target
+
   # Individual commands for granular control
   python dbt_test_fixer.py get-last-run
   python dbt_test_fixer.py fetch-artifacts
   python dbt_test_fixer.py fetch-artifacts --run-id 70403155779359
+  python dbt_test_fixer.py fetch-artifacts --artifact catalog.json --artifact sources.json
   python dbt_test_fixer.py analyze-artifacts
   python dbt_test_fixer.py analyze-artifacts --output custom_analysis.json --quiet
+  python dbt_test_fixer.py analyze-artifacts --run-id 70403155779359
+  python dbt_test_fixer.py generate-prompts --jobs 8
+
+  # Stream the analysis as JSON Lines (test by test, flat memory) and read it back lazily
+  python dbt_test_fixer.py analyze-artifacts --format jsonl.gz --quiet
+  python dbt_test_fixer.py generate-prompts --analysis data/analysis/failed_tests_debug_data.jsonl.gz
+  python dbt_test_fixer.py --in-memory --write-analysis --analysis-format jsonl
+  python dbt_test_fixer.py generate-prompts --incremental
+
+  # Group failures that share a root cause and write one prompt per group
+  python dbt_test_fixer.py analyze-artifacts --cluster --quiet
+  python dbt_test_fixer.py generate-prompts --cluster
+  python dbt_test_fixer.py --target-dir target --cluster
+
+  # Many jobs at once, each into data/jobs/<account>_<job>/
+  python dbt_test_fixer.py fan-out --job 17729:123 --job 17729:456 --max-concurrency 8
+  python dbt_test_fixer.py fan-out --jobs-file jobs.txt
+
+  # Run history: ingest each run, then ask how long tests have been failing
+  python dbt_test_fixer.py history ingest --run-id 70403155779359
+  python dbt_test_fixer.py history ingest --last 30
+  python dbt_test_fixer.py history streaks
+  python dbt_test_fixer.py history first-failure not_null_orders_order_id
+  python dbt_test_fixer.py history flaky --window 30
+
+  # Keep running and process each new completed run as soon as it finishes
+  python dbt_test_fixer.py watch --incremental
+
+  # Process runs as dbt Cloud reports them (DBT_CLOUD_WEBHOOK_SECRET required)
+  python dbt_test_fixer.py webhook serve --port 8080 --workers 4
+  python dbt_test_fixer.py webhook send --run-id 70403155779359
+
+  # Nightly runs: only re-render prompts for new or changed failures
+  python dbt_test_fixer.py --incremental
+
+  # Cap prompts at ~4000 tokens by compacting long SQL, messages and model lists
+  python dbt_test_fixer.py --token-budget 4000
+
+  # Instrumentation: per-stage timings and memory, and a cProfile dump
+  python dbt_test_fixer.py --metrics-output data/metrics/run.json
+  python dbt_test_fixer.py --profile analyze-artifacts --quiet
         """
     )
 
+    # Default workflow options
+    parser.add_argument("--in-memory", action="store_true",
+                        help="Run the default workflow in memory, without intermediate files")
+    parser.add_argument("--write-artifacts", action="store_true",
+                        help="With --in-memory, also save the raw artifacts to data/artifacts/")
+    parser.add_argument("--write-analysis", action="store_true",
+                        help="With --in-memory or --target-dir, also write data/analysis/failed_tests_debug_data.json")
+    parser.add_argument("--analysis-format", choices=ANALYSIS_FORMATS,
+                        help="Analysis file format; jsonl and jsonl.gz are written test by test (default: json)")
+    parser.add_argument("--target-dir", metavar="DIR",
+                        help="Analyze the artifacts of a local dbt target directory instead of fetching them from dbt Cloud")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only render prompts for new or changed failures and prune prompts of resolved tests")
+    parser.add_argument("--cluster", action="store_true",
+                        help="Group failures that share a likely root cause and write one prompt per group")
+
+    # Instrumentation options (apply to any command)
+    parser.add_argument("--metrics-output", metavar="PATH",
+                        help="Write timing spans, byte counts, peak RSS and test type counts to this JSON file")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run under cProfile and print the top functions by cumulative time")
+    parser.add_argument("--profile-output", metavar="PATH", default=DEFAULT_PROFILE_OUTPUT,
+                        help=f"Where to dump cProfile stats with --profile (default: {DEFAULT_PROFILE_OUTPUT})")
+
+    # Prompt options (apply to any command that generates prompts)
+    parser.add_argument("--token-budget", type=int, metavar="TOKENS",
+                        help="Per-prompt budget in estimated tokens; larger prompts are compacted "
+                             "(default: DBT_TEST_FIXER_PROMPT_TOKEN_BUDGET or 8000, 0 disables)")
+
     subparsers = parser.add_subparsers(dest="command", help="Available commands (optional - runs full workflow if none specified)")
 
     # get-last-run command
@@ -119,32 +361,137 @@ Examples:
     # fetch-artifacts command
     fetch_parser = subparsers.add_parser("fetch-artifacts", help="Fetch dbt Cloud artifacts")
     fetch_parser.add_argument("--run-id", help="Specific run ID to fetch artifacts from")
+    fetch_parser.add_argument("--artifact", dest="artifacts", action="append", metavar="NAME",
+                              help="Extra artifact to fetch, e.g. catalog.json (repeatable)")
+    fetch_parser.add_argument("--max-workers", type=positive_int, help="Maximum number of parallel downloads (default: 4)")
+    fetch_parser.add_argument("--no-cache", action="store_true", help="Bypass the local artifact cache and always download")
 
     # analyze-artifacts command
     analyze_parser = subparsers.add_parser("analyze-artifacts", help="Analyze failed tests")
     analyze_parser.add_argument("--output-path", help="Custom output path for analysis JSON")
     analyze_parser.add_argument("--quiet", action="store_true", help="Only output JSON file, no console output")
+    analyze_parser.add_argument("--run-id", help="Analyze a specific run, using cached artifacts when available")
+    analyze_parser.add_argument("--no-cache", action="store_true", help="Bypass the local artifact cache and always download")
+    analyze_parser.add_argument("--stream-manifest", action="store_true",
+                                help="Stream only the needed nodes from manifest.json instead of loading it whole (low memory)")
+    analyze_parser.add_argument("--format", choices=ANALYSIS_FORMATS,
+                                help="Analysis file format; jsonl and jsonl.gz are written test by test "
+                                     "(default: from --output-path's extension, or json)")
+    analyze_parser.add_argument("--target-dir", metavar="DIR", default=argparse.SUPPRESS,
+                                help="Analyze the artifacts of a local dbt target directory in place")
+    analyze_parser.add_argument("--cluster", action="store_true", default=argparse.SUPPRESS,
+                                help="Also group the failures by likely root cause into failure_clusters.json next to the analysis")
 
     # generate-prompts command
-    subparsers.add_parser("generate-prompts", help="Generate prompts for fixing failed tests")
+    generate_parser = subparsers.add_parser("generate-prompts", help="Generate prompts for fixing failed tests")
+    generate_parser.add_argument("--analysis", metavar="PATH",
+                                 help="Analysis file to read (default: the newest data/analysis/failed_tests_debug_data.{json,jsonl,jsonl.gz})")
+    generate_parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of parallel workers for rendering prompts (default: 1)")
+    generate_parser.add_argument("--processes", action="store_true", help="With --jobs, use worker processes instead of threads")
+    generate_parser.add_argument("--incremental", action="store_true", default=argparse.SUPPRESS,
+                                 help="Only render prompts for new or changed failures and prune prompts of resolved tests")
+    generate_parser.add_argument("--cluster", action="store_true", default=argparse.SUPPRESS,
+                                 help="Write one prompt per failure cluster from analyze-artifacts --cluster")
+
+    # fan-out command
+    fan_out_parser = subparsers.add_parser("fan-out", help="Fetch, analyze and generate prompts for many jobs concurrently")
+    fan_out_parser.add_argument("--job", action="append", metavar="ACCOUNT:JOB",
+                                help="Job to process (repeatable); a bare JOB uses DBT_CLOUD_ACCOUNT_ID")
+    fan_out_parser.add_argument("--jobs-file", metavar="PATH",
+                                help="File with one ACCOUNT:JOB per line, or a JSON list of {account_id, job_id}")
+    fan_out_parser.add_argument("--max-concurrency", type=int, help="Maximum number of jobs processed at once (default: 4)")
+    fan_out_parser.add_argument("--output-dir", help="Root of the per-job output trees (default: data/jobs)")
+    fan_out_parser.add_argument("--no-cache", action="store_true", help="Bypass the local artifact cache and always download")
+    fan_out_parser.add_argument("--incremental", action="store_true", default=argparse.SUPPRESS,
+                                help="Only render prompts for new or changed failures per job")
+
+    # history command
+    history_parser = subparsers.add_parser("history", help="Query the local run history of test results")
+    history_parser.add_argument("--db", help="History database (default: data/history/run_history.db)")
+    history_subparsers = history_parser.add_subparsers(dest="history_command")
+
+    ingest_parser = history_subparsers.add_parser("ingest", help="Ingest run_results.json into the history")
+    ingest_parser.add_argument("--run-results", default="data/artifacts/run_results.json",
+                               help="run_results.json to ingest (default: data/artifacts/run_results.json)")
+    ingest_parser.add_argument("--run-id", help="dbt Cloud run ID of the file (default: its invocation_id)")
+    ingest_parser.add_argument("--account-id", help="dbt Cloud account ID (default: DBT_CLOUD_ACCOUNT_ID)")
+    ingest_parser.add_argument("--job-id", help="dbt Cloud job ID (default: DBT_CLOUD_JOB_ID)")
+    ingest_parser.add_argument("--last", type=int, metavar="N",
+                               help="Instead of a file, backfill the last N completed runs from dbt Cloud")
+
+    flaky_parser = history_subparsers.add_parser("flaky", help="Tests that flip between passing and failing")
+    flaky_parser.add_argument("--window", type=int, default=20, help="Most recent runs to consider (default: 20)")
+    flaky_parser.add_argument("--min-flips", type=int, default=2, help="Minimum pass/fail transitions (default: 2)")
+    flaky_parser.add_argument("--job-id", help="Only consider runs of this job")
+
+    first_failure_parser = history_subparsers.add_parser("first-failure", help="Run where a test's current failure streak started")
+    first_failure_parser.add_argument("test", help="Test unique_id or name")
+    first_failure_parser.add_argument("--job-id", help="Only consider runs of this job")
+
+    streaks_parser = history_subparsers.add_parser("streaks", help="Longest current failure streaks")
+    streaks_parser.add_argument("--limit", type=int, default=50, help="Maximum number of tests to list (default: 50)")
+    streaks_parser.add_argument("--min-streak", type=int, default=1, help="Minimum consecutive failing runs (default: 1)")
+    streaks_parser.add_argument("--job-id", help="Only consider runs of this job")
+
+    # watch command
+    watch_parser = subparsers.add_parser("watch", help="Poll for newly completed runs and process each one once")
+    watch_parser.add_argument("--min-interval", type=float, help="Shortest poll interval in seconds (default: 10)")
+    watch_parser.add_argument("--max-interval", type=float, help="Longest poll interval while idle in seconds (default: 300)")
+    watch_parser.add_argument("--cursor", metavar="PATH", help="Cursor file (default: data/state/watch_cursor.json)")
+    watch_parser.add_argument("--metrics-dir", metavar="DIR", help="Write the metrics of each processed run to this directory")
+    watch_parser.add_argument("--no-cache", action="store_true", help="Bypass the local artifact cache and always download")
+    watch_parser.add_argument("--incremental", action="store_true", default=argparse.SUPPRESS,
+                              help="Only render prompts for new or changed failures")
+    watch_parser.add_argument("--once", action="store_true", help="Poll once, process any new runs and exit")
+
+    # webhook command
+    webhook_parser = subparsers.add_parser("webhook", help="Receive dbt Cloud run webhooks and process each reported run")
+    webhook_subparsers = webhook_parser.add_subparsers(dest="webhook_command")
+
+    serve_parser = webhook_subparsers.add_parser("serve", help="Run the webhook receiver")
+    serve_parser.add_argument("--host", help="Interface to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, help="Port to listen on (default: 8080)")
+    serve_parser.add_argument("--workers", type=int, help="Runs processed in parallel (default: 4)")
+    serve_parser.add_argument("--job-id", dest="job_ids", action="append", metavar="JOB_ID",
+                              help="Only process runs of this job (repeatable; default: all jobs)")
+    serve_parser.add_argument("--output-dir", help="Root of the per-job output trees (default: data/jobs)")
+    serve_parser.add_argument("--no-cache", action="store_true", help="Bypass the local artifact cache and always download")
+    serve_parser.add_argument("--incremental", action="store_true", default=argparse.SUPPRESS,
+                              help="Only render prompts for new or changed failures per job")
+
+    send_parser = webhook_subparsers.add_parser("send", help="Send a signed test delivery, standing in for dbt Cloud")
+    send_parser.add_argument("--run-id", required=True, help="Run ID to report as completed")
+    send_parser.add_argument("--account-id", help="dbt Cloud account ID (default: DBT_CLOUD_ACCOUNT_ID)")
+    send_parser.add_argument("--job-id", help="dbt Cloud job ID (default: DBT_CLOUD_JOB_ID)")
+    send_parser.add_argument("--status-code", type=int, default=20, help="Run status code: 10 success, 20 error (default: 20)")
+    send_parser.add_argument("--event-id", help="Event ID (default: random; reuse one to test deduplication)")
+    send_parser.add_argument("--url", help="Receiver URL (default: http://127.0.0.1:8080/webhooks/dbt-cloud)")
 
     args = parser.parse_args()
 
     # If no command specified, run the default workflow
-    if args.command is None:
-        return cmd_default_workflow()
-    elif args.command == "get-last-run":
-        return cmd_get_last_run(args)
-    elif args.command == "fetch-artifacts":
-        return cmd_fetch_artifacts(args)
-    elif args.command == "analyze-artifacts":
-        return cmd_analyze_artifacts(args)
-    elif args.command == "generate-prompts":
-        return cmd_generate_prompts(args)
-    else:
+    commands = {
+        None: cmd_default_workflow,
+        "get-last-run": cmd_get_last_run,
+        "fetch-artifacts": cmd_fetch_artifacts,
+        "analyze-artifacts": cmd_analyze_artifacts,
+        "generate-prompts": cmd_generate_prompts,
+        "fan-out": cmd_fan_out,
+        "history": cmd_history,
+        "watch": cmd_watch,
+        "webhook": cmd_webhook
+    }
+    handler = commands.get(args.command)
+    if handler is None:
         parser.print_help()
         return 0
 
+    # Every PromptManager (including those of fan-out, watch and webhook workers) reads the budget from here
+    if args.token_budget is not None:
+        os.environ["DBT_TEST_FIXER_PROMPT_TOKEN_BUDGET"] = str(args.token_budget)
+
+    return run_instrumented(handler, args)
+
 
 if __name__ == "__main__":
     sys.exit(main())
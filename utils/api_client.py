@@ -3,18 +3,174 @@ dbt Cloud API client.
 """
 
 import os
+import time
+import random
+import hashlib
+import tempfile
 import requests
-from typing import Optional, Dict, Any, List
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, Union, Iterator, Iterable
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .metrics import span, incr
 
 load_dotenv()
 
+# Default (connect, read) timeouts in seconds. Artifacts can be hundreds of MB,
+# so the read timeout applies between received bytes, not to the whole body.
+DEFAULT_TIMEOUT = (10.0, 120.0)
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_BACKOFF_JITTER = 0.5
+DEFAULT_POOL_MAXSIZE = 10
+
+# Chunk size for streaming artifact downloads to disk
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Transient statuses worth retrying: rate limiting and upstream/gateway errors
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Run statuses: 1=queued, 2=starting, 3=running, 10=success, 20=error, 30=cancelled
+COMPLETED_RUN_STATUSES = (10, 20, 30)
+
+# Run listing pages start small and double up to the API's maximum page size,
+# so a lookup that matches early costs one small request
+FIRST_PAGE_SIZE = 5
+MAX_PAGE_SIZE = 100
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float from the environment, falling back to a default."""
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an int from the environment, falling back to a default."""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _parse_timestamp(value: Optional[Union[str, datetime]]) -> Optional[datetime]:
+    """Parse a dbt Cloud timestamp (or pass a datetime through) as an aware datetime."""
+    if value is None or isinstance(value, datetime):
+        timestamp = value
+    else:
+        try:
+            timestamp = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if timestamp is not None and timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+def runs_page_params(
+    job_id: Optional[str],
+    statuses: Optional[Iterable[int]],
+    offset: int,
+    limit: int
+) -> Dict[str, Any]:
+    """Query parameters for one page of runs, newest first, with server-side filters."""
+    params: Dict[str, Any] = {"limit": limit, "offset": offset, "order_by": "-id"}
+    if job_id:
+        params["job_definition_id"] = job_id
+    if statuses:
+        params["status__in"] = "[" + ",".join(str(status) for status in statuses) + "]"
+    return params
+
+
+def run_filter_action(
+    run: Dict[str, Any],
+    statuses: Optional[Iterable[int]],
+    created_after: Optional[datetime],
+    created_before: Optional[datetime]
+) -> str:
+    """
+    Decide what to do with a run while scanning newest first.
+
+    Filters are re-checked client-side in case the server ignored them.
+
+    Returns:
+        "match", "skip", or "stop" once runs are older than created_after
+    """
+    created_at = _parse_timestamp(run.get("created_at"))
+    if created_after is not None and created_at is not None and created_at < created_after:
+        return "stop"
+    if created_before is not None and created_at is not None and created_at >= created_before:
+        return "skip"
+    if statuses and run.get("status") not in statuses:
+        return "skip"
+    return "match"
+
+
+def build_session(
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    backoff_jitter: float = DEFAULT_BACKOFF_JITTER,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE
+) -> requests.Session:
+    """
+    Build a keep-alive session with connection pooling and retries.
+
+    Retries only apply to idempotent methods (GET/HEAD) and use exponential
+    backoff (backoff_factor * 2 ** (attempt - 1)) plus random jitter.
+
+    Args:
+        max_retries: Maximum number of retries per request
+        backoff_factor: Base delay in seconds for exponential backoff
+        backoff_jitter: Maximum random jitter in seconds added to each delay
+        pool_maxsize: Maximum number of pooled connections per host
+
+    Returns:
+        Configured requests.Session
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_jitter,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class DbtCloudClient:
     """Client for interacting with dbt Cloud API."""
 
-    def __init__(self, api_token: Optional[str] = None, base_url: Optional[str] = None):
-        """Initialize the dbt Cloud client."""
+    def __init__(
+        self,
+        api_token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: Optional[Union[float, Tuple[float, float]]] = None,
+        max_retries: Optional[int] = None,
+        backoff_factor: Optional[float] = None,
+        pool_maxsize: Optional[int] = None
+    ):
+        """
+        Initialize the dbt Cloud client.
+
+        Args:
+            api_token: dbt Cloud API token (defaults to DBT_CLOUD_API_TOKEN)
+            base_url: dbt Cloud base URL (defaults to DBT_CLOUD_BASE_URL)
+            timeout: Request timeout in seconds, or a (connect, read) tuple
+                (defaults to DBT_CLOUD_CONNECT_TIMEOUT / DBT_CLOUD_READ_TIMEOUT)
+            max_retries: Retries for transient failures (defaults to DBT_CLOUD_MAX_RETRIES)
+            backoff_factor: Base backoff delay in seconds (defaults to DBT_CLOUD_BACKOFF_FACTOR)
+            pool_maxsize: Pooled connections per host (defaults to DBT_CLOUD_POOL_MAXSIZE)
+        """
         self.api_token = api_token or os.environ.get("DBT_CLOUD_API_TOKEN")
         self.base_url = base_url or os.environ.get("DBT_CLOUD_BASE_URL", "https://cloud.getdbt.com")
 
@@ -26,18 +182,136 @@ class DbtCloudClient:
             "Accept": "application/json"
         }
 
-    def get_runs(self, account_id: str, job_id: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get runs for an account, optionally filtered by job."""
-        url = f"{self.base_url}/api/v2/accounts/{account_id}/runs"
-        params = {"limit": limit, "order_by": "-id"}
+        if timeout is None:
+            timeout = (
+                _env_float("DBT_CLOUD_CONNECT_TIMEOUT", DEFAULT_TIMEOUT[0]),
+                _env_float("DBT_CLOUD_READ_TIMEOUT", DEFAULT_TIMEOUT[1])
+            )
+        self.timeout = timeout
+
+        self.max_retries = max_retries if max_retries is not None else _env_int("DBT_CLOUD_MAX_RETRIES", DEFAULT_MAX_RETRIES)
+        self.backoff_factor = backoff_factor if backoff_factor is not None else _env_float("DBT_CLOUD_BACKOFF_FACTOR", DEFAULT_BACKOFF_FACTOR)
+        self.session = build_session(
+            max_retries=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            pool_maxsize=pool_maxsize if pool_maxsize is not None else _env_int("DBT_CLOUD_POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE)
+        )
+
+    def close(self):
+        """Close the underlying session and release pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
 
-        if job_id:
-            params["job_definition_id"] = job_id
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
-        response = requests.get(url, headers=self.headers, params=params)
+    def _get(self, url: str, headers: Dict[str, str], **kwargs) -> requests.Response:
+        """Issue a GET through the pooled session and raise on HTTP errors."""
+        incr("api.requests")
+        response = self.session.get(url, headers=headers, timeout=self.timeout, **kwargs)
         response.raise_for_status()
+        return response
+
+    def get_runs(
+        self,
+        account_id: str,
+        job_id: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+        statuses: Optional[Iterable[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get one page of runs for an account (newest first), optionally filtered by job and status."""
+        url = f"{self.base_url}/api/v2/accounts/{account_id}/runs"
+        params = runs_page_params(job_id, statuses, offset, limit)
+
+        with span("api.get_runs"):
+            response = self._get(url, self.headers, params=params)
+            return response.json()["data"]
+
+    def poll_runs(
+        self,
+        account_id: str,
+        job_id: Optional[str] = None,
+        limit: int = 10,
+        etag: Optional[str] = None
+    ) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+        """
+        Get the newest page of runs with a conditional request.
+
+        Sends If-None-Match when an ETag from an earlier poll is given.
+
+        Returns:
+            (runs, etag); runs is None when the server answered 304 Not Modified.
+            The ETag is None if the server does not send one.
+        """
+        url = f"{self.base_url}/api/v2/accounts/{account_id}/runs"
+        params = runs_page_params(job_id, None, 0, limit)
+        headers = dict(self.headers, **{"If-None-Match": etag}) if etag else self.headers
+
+        with span("api.poll_runs") as record:
+            response = self._get(url, headers, params=params)
+            record["not_modified"] = response.status_code == 304
+            if response.status_code == 304:
+                incr("api.not_modified")
+                return None, response.headers.get("ETag", etag)
+            return response.json()["data"], response.headers.get("ETag")
+
+    def iter_runs(
+        self,
+        account_id: str,
+        job_id: Optional[str] = None,
+        statuses: Optional[Iterable[int]] = None,
+        created_after: Optional[Union[str, datetime]] = None,
+        created_before: Optional[Union[str, datetime]] = None,
+        first_page_size: int = FIRST_PAGE_SIZE,
+        max_runs: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily iterate runs, newest first, across pages.
 
-        return response.json()["data"]
+        Pages are fetched only as the caller consumes runs, so breaking out
+        of the loop stops further requests. The status filter is sent to the
+        API (status__in); the date range is applied client-side, and
+        iteration ends at the first run older than created_after.
+
+        Args:
+            account_id: dbt Cloud account ID
+            job_id: Only runs of this job
+            statuses: Only runs with these statuses (e.g. COMPLETED_RUN_STATUSES)
+            created_after: Only runs created at or after this time
+            created_before: Only runs created before this time
+            first_page_size: Size of the first page; later pages double up to MAX_PAGE_SIZE
+            max_runs: Stop after scanning this many runs
+
+        Yields:
+            Run objects matching the filters
+        """
+        statuses = tuple(statuses) if statuses else None
+        created_after = _parse_timestamp(created_after)
+        created_before = _parse_timestamp(created_before)
+
+        offset = 0
+        page_size = max(1, min(first_page_size, MAX_PAGE_SIZE))
+        while True:
+            if max_runs is not None:
+                page_size = min(page_size, max_runs - offset)
+                if page_size <= 0:
+                    return
+
+            runs = self.get_runs(account_id, job_id, limit=page_size, offset=offset, statuses=statuses)
+            for run in runs:
+                action = run_filter_action(run, statuses, created_after, created_before)
+                if action == "stop":
+                    return
+                if action == "match":
+                    yield run
+
+            if len(runs) < page_size:
+                return
+            offset += len(runs)
+            page_size = min(page_size * 2, MAX_PAGE_SIZE)
 
     def get_artifact(self, account_id: str, run_id: str, artifact_name: str) -> Dict[str, Any]:
         """Get an artifact from a specific run."""
@@ -48,19 +322,141 @@ class DbtCloudClient:
             "Authorization": f"Token {self.api_token}"
         }
 
-        response = requests.get(url, headers=artifact_headers)
-        response.raise_for_status()
+        response = self._get(url, artifact_headers)
 
         return response.json()
 
-    def get_last_completed_run_id(self, account_id: str, job_id: Optional[str] = None) -> Optional[str]:
-        """Get the most recent completed run ID."""
-        runs = self.get_runs(account_id, job_id, limit=5)
+    def get_artifact_content(self, account_id: str, run_id: str, artifact_name: str) -> bytes:
+        """Get the raw bytes of an artifact from a specific run."""
+        url = f"{self.base_url}/api/v2/accounts/{account_id}/runs/{run_id}/artifacts/{artifact_name}"
+        artifact_headers = {
+            "Authorization": f"Token {self.api_token}"
+        }
+
+        with span("api.get_artifact", artifact=artifact_name) as record:
+            content = self._get(url, artifact_headers).content
+            record["bytes"] = len(content)
+
+        incr("bytes.downloaded", len(content))
+        return content
+
+    def download_artifact(
+        self,
+        account_id: str,
+        run_id: str,
+        artifact_name: str,
+        dest_path: Union[str, Path],
+        expected_sha256: Optional[str] = None,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE
+    ) -> Dict[str, Any]:
+        """
+        Stream an artifact from a specific run straight to disk.
+
+        The response body is written in chunks to a temporary file next to
+        dest_path and atomically renamed into place, so memory use stays flat
+        and readers never observe a partial file. The body is stored as sent
+        by dbt Cloud, without parsing or re-serializing it.
 
-        # Find first completed run (status 10=success, 20=error, 30=cancelled)
-        for run in runs:
-            if run["status"] in [10, 20, 30]:
-                return str(run["id"])
+        Integrity checks: the byte count is compared to Content-Length (when
+        the body is not content-encoded), a .json artifact must end like a
+        complete JSON document, and the SHA-256 digest is compared to expected_sha256
+        when given. Interrupted transfers are retried from scratch with backoff.
+
+        Args:
+            account_id: dbt Cloud account ID
+            run_id: Run ID to download the artifact from
+            artifact_name: Artifact name, e.g. manifest.json
+            dest_path: Final path of the downloaded artifact
+            expected_sha256: Optional hex digest the payload must match
+            chunk_size: Bytes to read per chunk
+
+        Returns:
+            Dictionary with the final path, byte count and SHA-256 hex digest
+        """
+        url = f"{self.base_url}/api/v2/accounts/{account_id}/runs/{run_id}/artifacts/{artifact_name}"
+        artifact_headers = {
+            "Authorization": f"Token {self.api_token}"
+        }
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+
+        attempt = 0
+        with span("api.download_artifact", artifact=artifact_name) as record:
+            while True:
+                try:
+                    download = self._stream_to_file(
+                        url, artifact_headers, dest_path, expected_sha256, chunk_size,
+                        check_json=artifact_name.endswith(".json")
+                    )
+                    break
+                except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError):
+                    # Mid-body failures are not covered by the adapter's retry policy
+                    attempt += 1
+                    incr("api.download_retries")
+                    if attempt > self.max_retries:
+                        raise
+                    time.sleep(self.backoff_factor * (2 ** (attempt - 1)) + random.uniform(0, DEFAULT_BACKOFF_JITTER))
+            record["bytes"] = download["bytes"]
+
+        incr("bytes.downloaded", download["bytes"])
+        return download
+
+    def _stream_to_file(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        dest_path: Path,
+        expected_sha256: Optional[str],
+        chunk_size: int,
+        check_json: bool = False
+    ) -> Dict[str, Any]:
+        """Download one response body to dest_path via a temporary file."""
+        digest = hashlib.sha256()
+        size = 0
+        last_byte = b""
+
+        with self._get(url, headers, stream=True) as response:
+            fd, tmp_name = tempfile.mkstemp(prefix=f".{dest_path.name}.", suffix=".part", dir=dest_path.parent)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+                        stripped = chunk.rstrip()
+                        if stripped:
+                            last_byte = stripped[-1:]
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                content_length = response.headers.get("Content-Length")
+                if content_length and not response.headers.get("Content-Encoding") and int(content_length) != size:
+                    raise IOError(f"Truncated download: expected {content_length} bytes, got {size}")
+                if check_json and last_byte not in (b"}", b"]"):
+                    raise IOError("Downloaded artifact is not a complete JSON document")
+
+                sha256 = digest.hexdigest()
+                if expected_sha256 and sha256 != expected_sha256.lower():
+                    raise IOError(f"Checksum mismatch: expected {expected_sha256}, got {sha256}")
+
+                # mkstemp creates owner-only files; match a regular download
+                os.chmod(tmp_name, 0o644)
+                os.replace(tmp_name, dest_path)
+            except BaseException:
+                if os.path.exists(tmp_name):
+                    os.unlink(tmp_name)
+                raise
+
+        return {"path": str(dest_path), "bytes": size, "sha256": sha256}
+
+    def get_last_completed_run_id(self, account_id: str, job_id: Optional[str] = None) -> Optional[str]:
+        """Get the most recent completed run ID (status 10=success, 20=error, 30=cancelled)."""
+        # Completed runs are filtered server-side, so this is normally one request
+        # even when newer runs are still queued or running
+        for run in self.iter_runs(account_id, job_id, statuses=COMPLETED_RUN_STATUSES, first_page_size=1):
+            return str(run["id"])
 
         return None
 
@@ -76,19 +472,6 @@ def get_last_run_id():
     if not all([api_token, base_url, account_id, job_id]):
         raise ValueError("Missing required environment variables. Check your .env file.")
 
-    # Make API request
-    url = f"{base_url}/api/v2/accounts/{account_id}/runs"
-    headers = {"Authorization": f"Token {api_token}"}
-    params = {"limit": 3, "order_by": "-id", "job_definition_id": job_id}
-
-    response = requests.get(url, headers=headers, params=params)
-    response.raise_for_status()
-
-    runs = response.json()["data"]
-
-    # Find first completed run (status 10=success, 20=error, 30=cancelled)
-    for run in runs:
-        if run["status"] in [10, 20, 30]:
-            return str(run["id"])
-
-    return None
+    # Use the pooled, retrying client instead of a one-off request
+    with DbtCloudClient(api_token=api_token, base_url=base_url) as client:
+        return client.get_last_completed_run_id(account_id, job_id)
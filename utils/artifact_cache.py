@@ -0,0 +1,258 @@
+"""
+Local on-disk cache for dbt Cloud artifacts.
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Optional, Union, List, Tuple
+
+DEFAULT_CACHE_DIR = "data/cache/artifacts"
+DEFAULT_CACHE_MAX_BYTES = 5 * 1024 ** 3
+
+
+class ArtifactCache:
+    """
+    Content-addressed artifact cache keyed by account/run/artifact.
+
+    Layout:
+        objects/<sha[:2]>/<sha256>   artifact payloads, named by content hash
+        access/<sha[:2]>/<sha256>    empty marker whose mtime is the object's last use
+        refs/<key hash>              account/run/artifact -> content hash
+
+    Identical payloads (e.g. an unchanged catalog.json across runs) are stored
+    once. Each hit refreshes the object's access marker, and the least
+    recently used objects are evicted once the cache grows past max_bytes.
+    Objects keep their own mtime: they are hard-linked into data/artifacts/,
+    where the manifest index relies on the artifact's size and mtime. An
+    evicted object's disk space is only freed once no such link remains, so
+    max_bytes bounds the cache directory, not the artifacts placed from it
+    (those are replaced by the next fetch of the same artifact name).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Cache root (defaults to DBT_TEST_FIXER_CACHE_DIR or data/cache/artifacts)
+            max_bytes: Size budget in bytes (defaults to DBT_TEST_FIXER_CACHE_MAX_BYTES or 5 GiB)
+        """
+        self.cache_dir = Path(cache_dir or os.environ.get("DBT_TEST_FIXER_CACHE_DIR", DEFAULT_CACHE_DIR))
+        if max_bytes is None:
+            env_max_bytes = os.environ.get("DBT_TEST_FIXER_CACHE_MAX_BYTES")
+            max_bytes = int(env_max_bytes) if env_max_bytes else DEFAULT_CACHE_MAX_BYTES
+        self.max_bytes = max_bytes
+        self.objects_dir = self.cache_dir / "objects"
+        self.refs_dir = self.cache_dir / "refs"
+        self.access_dir = self.cache_dir / "access"
+
+    def _ref_path(self, account_id: str, run_id: str, artifact_name: str) -> Path:
+        key = f"{account_id}/{run_id}/{artifact_name}"
+        return self.refs_dir / hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / sha256
+
+    def _access_path(self, sha256: str) -> Path:
+        return self.access_dir / sha256[:2] / sha256
+
+    def _touch(self, sha256: str):
+        """Mark an object as used now."""
+        access_path = self._access_path(sha256)
+        try:
+            os.utime(access_path)
+        except FileNotFoundError:
+            access_path.parent.mkdir(parents=True, exist_ok=True)
+            access_path.touch()
+
+    def get(self, account_id: str, run_id: str, artifact_name: str) -> Optional[Path]:
+        """
+        Look up a cached artifact and mark it as recently used.
+
+        Returns:
+            Path to the cached payload, or None on a miss
+        """
+        ref_path = self._ref_path(account_id, run_id, artifact_name)
+        try:
+            sha256 = ref_path.read_text().strip()
+        except FileNotFoundError:
+            return None
+
+        object_path = self._object_path(sha256)
+        if not object_path.exists():
+            # Object was evicted; drop the dangling ref
+            ref_path.unlink(missing_ok=True)
+            return None
+
+        self._touch(sha256)
+        return object_path
+
+    def put(
+        self,
+        account_id: str,
+        run_id: str,
+        artifact_name: str,
+        src_path: Union[str, Path],
+        sha256: Optional[str] = None
+    ) -> Path:
+        """
+        Add a downloaded artifact to the cache and evict if over budget.
+
+        The source file is hard-linked into the cache when possible, so a
+        freshly downloaded artifact costs no extra I/O.
+
+        Args:
+            account_id: dbt Cloud account ID
+            run_id: Run the artifact belongs to
+            artifact_name: Artifact name, e.g. manifest.json
+            src_path: Path of the downloaded artifact
+            sha256: Content hash of the artifact, computed if not given
+
+        Returns:
+            Path to the cached payload
+        """
+        src_path = Path(src_path)
+        sha256 = sha256 or sha256_file(src_path)
+
+        object_path = self._object_path(sha256)
+        if not object_path.exists():
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            _link_or_copy(src_path, object_path)
+        self._touch(sha256)
+
+        ref_path = self._ref_path(account_id, run_id, artifact_name)
+        self.refs_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write_text(ref_path, sha256)
+
+        self.evict()
+        return object_path
+
+    def put_bytes(self, account_id: str, run_id: str, artifact_name: str, content: bytes) -> Path:
+        """
+        Add an artifact held in memory to the cache and evict if over budget.
+
+        Returns:
+            Path to the cached payload
+        """
+        sha256 = hashlib.sha256(content).hexdigest()
+
+        object_path = self._object_path(sha256)
+        if not object_path.exists():
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_bytes(object_path, content)
+        self._touch(sha256)
+
+        ref_path = self._ref_path(account_id, run_id, artifact_name)
+        self.refs_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write_text(ref_path, sha256)
+
+        self.evict()
+        return object_path
+
+    def materialize(self, account_id: str, run_id: str, artifact_name: str, dest_path: Union[str, Path]) -> bool:
+        """
+        Place a cached artifact at dest_path (hard link, falling back to copy).
+
+        Returns:
+            True on a cache hit, False on a miss
+        """
+        object_path = self.get(account_id, run_id, artifact_name)
+        if object_path is None:
+            return False
+
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            _link_or_copy(object_path, dest_path)
+        except FileNotFoundError:
+            # Evicted between lookup and link by a concurrent process
+            return False
+        return True
+
+    def evict(self) -> List[Path]:
+        """
+        Remove least recently used objects until the cache fits max_bytes.
+
+        Returns:
+            Paths of the evicted objects
+        """
+        entries: List[Tuple[float, int, Path]] = []
+        total = 0
+        for object_path in self.objects_dir.glob("*/*"):
+            try:
+                stat = object_path.stat()
+            except FileNotFoundError:
+                continue
+            # Objects cached before access markers existed fall back to their own mtime
+            try:
+                last_used = self._access_path(object_path.name).stat().st_mtime
+            except FileNotFoundError:
+                last_used = stat.st_mtime
+            entries.append((last_used, stat.st_size, object_path))
+            total += stat.st_size
+
+        evicted = []
+        for _, size, object_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            object_path.unlink(missing_ok=True)
+            self._access_path(object_path.name).unlink(missing_ok=True)
+            total -= size
+            evicted.append(object_path)
+
+        return evicted
+
+
+def sha256_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(src_path: Path, dest_path: Path):
+    """Atomically place src_path at dest_path via a hard link or a copy."""
+    # rename() is a no-op between two links to the same file
+    if dest_path.exists() and os.path.samefile(src_path, dest_path):
+        return
+
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{dest_path.name}.", suffix=".part", dir=dest_path.parent)
+    os.close(fd)
+    os.unlink(tmp_name)
+    try:
+        try:
+            os.link(src_path, tmp_name)
+        except OSError:
+            shutil.copyfile(src_path, tmp_name)
+        os.replace(tmp_name, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def atomic_write_bytes(path: Path, content: bytes):
+    """Write a file atomically."""
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".part", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def _atomic_write_text(path: Path, text: str):
+    """Write a small text file atomically."""
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".part", dir=path.parent)
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(tmp_name, path)
@@ -4,67 +4,209 @@ Simple artifact fetching functionality for dbt Cloud.
 
 import os
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List, Dict, Any, Tuple
 from .api_client import DbtCloudClient
-
-
-def fetch_artifacts(account_id: str, run_id: Optional[str] = None, artifacts_dir: str = "data/artifacts") -> bool:
+from .artifact_cache import ArtifactCache, atomic_write_bytes
+from .metrics import span, incr
+
+# Artifacts required by the analysis step
+DEFAULT_ARTIFACTS = ["run_results.json", "manifest.json"]
+
+# Upper bound on parallel downloads; the client's connection pool is sized to match
+DEFAULT_MAX_WORKERS = 4
+
+
+def fetch_artifacts(
+    account_id: str,
+    run_id: Optional[str] = None,
+    artifacts_dir: str = "data/artifacts",
+    artifacts: Optional[List[str]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    checksums: Optional[Dict[str, str]] = None,
+    cache: Optional[ArtifactCache] = None,
+    use_cache: bool = True
+) -> bool:
     """
     Fetch run_results.json and manifest.json artifacts from dbt Cloud.
 
+    Artifacts are downloaded concurrently with a bounded worker pool. Each
+    artifact succeeds or fails independently and errors are reported per
+    artifact. Bodies are streamed straight to disk as sent by dbt Cloud
+    (compact JSON), without being parsed or re-serialized. The local
+    artifact cache is checked first, and fresh downloads are added to it;
+    the dbt Cloud client is only created when something has to be downloaded.
+
     Args:
         account_id: dbt Cloud account ID
         run_id: Specific run ID, or None to use last completed run
         artifacts_dir: Directory to save artifacts to
+        artifacts: Artifact names to fetch (defaults to run_results.json and manifest.json)
+        max_workers: Maximum number of parallel downloads (1 downloads sequentially)
+        checksums: Optional mapping of artifact name to expected SHA-256 hex digest
+        cache: Artifact cache to use (defaults to an ArtifactCache from the environment)
+        use_cache: Set to False to bypass the cache and always download
 
     Returns:
         True if artifacts were successfully fetched and saved
     """
-    # Initialize API client and output directory
-    client = DbtCloudClient()
+    artifacts = list(dict.fromkeys(artifacts or DEFAULT_ARTIFACTS))
+    max_workers = max(1, min(max_workers, len(artifacts)))
+    if use_cache and cache is None:
+        cache = ArtifactCache()
+    elif not use_cache:
+        cache = None
+
     output_dir = Path(artifacts_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Get run_id if not provided
-    if not run_id:
-        job_id = os.environ.get("DBT_CLOUD_JOB_ID")
-        run_id = client.get_last_completed_run_id(account_id, job_id)
+    # The API client (pool sized for the workers) is only created for cache
+    # misses, so re-analyzing a cached run works without an API token
+    client: Optional[DbtCloudClient] = None
+    client_lock = threading.Lock()
+
+    def get_client() -> DbtCloudClient:
+        nonlocal client
+        with client_lock:
+            if client is None:
+                client = DbtCloudClient(pool_maxsize=max_workers)
+            return client
+
+    try:
+        # Get run_id if not provided
         if not run_id:
-            print("No completed runs found")
-            return False
+            job_id = os.environ.get("DBT_CLOUD_JOB_ID")
+            run_id = get_client().get_last_completed_run_id(account_id, job_id)
+            if not run_id:
+                print("No completed runs found")
+                return False
+
+        print(f"Fetching artifacts for run {run_id}...")
 
-    print(f"Fetching artifacts for run {run_id}...")
+        checksums = checksums or {}
 
-    # Fetch both required artifacts
-    artifacts = ["run_results.json", "manifest.json"]
+        def fetch_one(artifact_name: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]:
+            artifact_path = output_dir / artifact_name
+            try:
+                # Serve from the cache when this run's artifact was fetched before
+                if cache is not None and cache.materialize(account_id, run_id, artifact_name, artifact_path):
+                    size = artifact_path.stat().st_size
+                    incr("cache.hits")
+                    incr("bytes.from_cache", size)
+                    return artifact_name, {"path": str(artifact_path), "bytes": size, "cached": True}, None
+                if cache is not None:
+                    incr("cache.misses")
+
+                # Stream to file (atomic rename, integrity checked)
+                download = get_client().download_artifact(
+                    account_id, run_id, artifact_name, artifact_path,
+                    expected_sha256=checksums.get(artifact_name)
+                )
+                if cache is not None:
+                    cache.put(account_id, run_id, artifact_name, artifact_path, sha256=download["sha256"])
+                return artifact_name, download, None
+
+            except Exception as e:
+                return artifact_name, None, e
+
+        print(f"Fetching {', '.join(artifacts)}...")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(fetch_one, artifacts))
+    finally:
+        if client is not None:
+            client.close()
+
+    # Report per artifact, in request order
     success = True
+    for artifact_name, download, error in results:
+        if error is None:
+            source = " from cache" if download.get("cached") else ""
+            print(f"Saved {artifact_name}{source} to {download['path']} ({download['bytes']:,} bytes)")
+        else:
+            print(f"Error fetching {artifact_name}: {error}")
+            success = False
 
-    for artifact_name in artifacts:
-        try:
-            print(f"Fetching {artifact_name}...")
-            artifact_data = client.get_artifact(account_id, run_id, artifact_name)
+    return success
 
-            # Save to file
-            artifact_path = output_dir / artifact_name
-            with open(artifact_path, 'w') as f:
-                json.dump(artifact_data, f, indent=2)
 
-            print(f"Saved {artifact_name} to {artifact_path}")
+def load_artifacts(
+    client: DbtCloudClient,
+    account_id: str,
+    run_id: str,
+    artifacts: Optional[List[str]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    use_cache: bool = True,
+    artifacts_dir: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Load artifacts into memory as parsed JSON, without writing them to disk.
 
-        except Exception as e:
-            print(f"Error fetching {artifact_name}: {e}")
-            success = False
+    Artifacts are read from the local cache when present and otherwise
+    downloaded concurrently; downloads are added to the cache.
 
-    return success
+    Args:
+        client: dbt Cloud client to download with
+        account_id: dbt Cloud account ID
+        run_id: Run ID to load artifacts from
+        artifacts: Artifact names to load (defaults to run_results.json and manifest.json)
+        max_workers: Maximum number of parallel downloads
+        use_cache: Set to False to bypass the local artifact cache
+        artifacts_dir: If given, also save the raw artifacts to this directory
 
+    Returns:
+        Mapping of artifact name to parsed JSON
 
-def fetch_artifacts_from_env(run_id: Optional[str] = None) -> bool:
+    Raises:
+        Exception: The first artifact that could not be loaded
+    """
+    artifacts = list(dict.fromkeys(artifacts or DEFAULT_ARTIFACTS))
+    max_workers = max(1, min(max_workers, len(artifacts)))
+    cache = ArtifactCache() if use_cache else None
+    output_dir = Path(artifacts_dir) if artifacts_dir else None
+    if output_dir:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    def load_one(artifact_name: str) -> Any:
+        cached_path = cache.get(account_id, run_id, artifact_name) if cache is not None else None
+        if cached_path is not None:
+            with open(cached_path, 'rb') as f:
+                content = f.read()
+            incr("cache.hits")
+            incr("bytes.from_cache", len(content))
+        else:
+            if cache is not None:
+                incr("cache.misses")
+            content = client.get_artifact_content(account_id, run_id, artifact_name)
+            if cache is not None:
+                cache.put_bytes(account_id, run_id, artifact_name, content)
+
+        if output_dir:
+            atomic_write_bytes(output_dir / artifact_name, content)
+
+        with span("parse.artifact", artifact=artifact_name, bytes=len(content)):
+            incr("bytes.parsed", len(content))
+            return json.loads(content)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(artifacts, executor.map(load_one, artifacts)))
+
+
+def fetch_artifacts_from_env(
+    run_id: Optional[str] = None,
+    artifacts: Optional[List[str]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    use_cache: bool = True
+) -> bool:
     """
     Fetch artifacts using environment variables for configuration.
 
     Args:
         run_id: Specific run ID, or None to use last completed run
+        artifacts: Artifact names to fetch (defaults to run_results.json and manifest.json)
+        max_workers: Maximum number of parallel downloads
+        use_cache: Set to False to bypass the local artifact cache
 
     Returns:
         True if artifacts were successfully fetched and saved
@@ -74,4 +216,4 @@ def fetch_artifacts_from_env(run_id: Optional[str] = None) -> bool:
     if not account_id:
         raise ValueError("DBT_CLOUD_ACCOUNT_ID environment variable is required")
 
-    return fetch_artifacts(account_id, run_id)
+    return fetch_artifacts(account_id, run_id, artifacts=artifacts, max_workers=max_workers, use_cache=use_cache)
@@ -0,0 +1,236 @@
+"""
+Asyncio dbt Cloud API client.
+"""
+
+import os
+import random
+import asyncio
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, Union, Iterable, AsyncIterator
+from .api_client import (
+    COMPLETED_RUN_STATUSES,
+    FIRST_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    DEFAULT_TIMEOUT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_BACKOFF_JITTER,
+    DEFAULT_POOL_MAXSIZE,
+    RETRY_STATUS_CODES,
+    _env_float,
+    _env_int,
+    _parse_timestamp,
+    runs_page_params,
+    run_filter_action
+)
+from .metrics import span, incr
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency
+    aiohttp = None
+
+
+class AsyncDbtCloudClient:
+    """
+    Async client for the dbt Cloud API with the same surface as DbtCloudClient.
+
+    Requests share one aiohttp session whose connection pool is capped at
+    pool_maxsize, so many run and artifact requests can be awaited
+    concurrently from a single event loop (e.g. with asyncio.gather).
+    Transient failures (429/5xx, connection errors and timeouts) are retried
+    with exponential backoff and jitter, honoring Retry-After.
+
+    Use as an async context manager, or call close() when done:
+
+        async with AsyncDbtCloudClient() as client:
+            run_id = await client.get_last_completed_run_id(account_id, job_id)
+    """
+
+    def __init__(
+        self,
+        api_token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: Optional[Union[float, Tuple[float, float]]] = None,
+        max_retries: Optional[int] = None,
+        backoff_factor: Optional[float] = None,
+        pool_maxsize: Optional[int] = None
+    ):
+        """
+        Initialize the async dbt Cloud client.
+
+        Args:
+            api_token: dbt Cloud API token (defaults to DBT_CLOUD_API_TOKEN)
+            base_url: dbt Cloud base URL (defaults to DBT_CLOUD_BASE_URL)
+            timeout: Request timeout in seconds, or a (connect, read) tuple
+                (defaults to DBT_CLOUD_CONNECT_TIMEOUT / DBT_CLOUD_READ_TIMEOUT)
+            max_retries: Retries for transient failures (defaults to DBT_CLOUD_MAX_RETRIES)
+            backoff_factor: Base backoff delay in seconds (defaults to DBT_CLOUD_BACKOFF_FACTOR)
+            pool_maxsize: Maximum concurrent connections (defaults to DBT_CLOUD_POOL_MAXSIZE)
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncDbtCloudClient requires aiohttp. Install it with: pip install aiohttp")
+
+        self.api_token = api_token or os.environ.get("DBT_CLOUD_API_TOKEN")
+        self.base_url = base_url or os.environ.get("DBT_CLOUD_BASE_URL", "https://cloud.getdbt.com")
+
+        if not self.api_token:
+            raise ValueError("API token is required. Set DBT_CLOUD_API_TOKEN environment variable.")
+
+        self.headers = {
+            "Authorization": f"Token {self.api_token}",
+            "Accept": "application/json"
+        }
+        self.artifact_headers = {
+            "Authorization": f"Token {self.api_token}"
+        }
+
+        if timeout is None:
+            timeout = (
+                _env_float("DBT_CLOUD_CONNECT_TIMEOUT", DEFAULT_TIMEOUT[0]),
+                _env_float("DBT_CLOUD_READ_TIMEOUT", DEFAULT_TIMEOUT[1])
+            )
+        self.timeout = timeout
+
+        self.max_retries = max_retries if max_retries is not None else _env_int("DBT_CLOUD_MAX_RETRIES", DEFAULT_MAX_RETRIES)
+        self.backoff_factor = backoff_factor if backoff_factor is not None else _env_float("DBT_CLOUD_BACKOFF_FACTOR", DEFAULT_BACKOFF_FACTOR)
+        self.pool_maxsize = pool_maxsize if pool_maxsize is not None else _env_int("DBT_CLOUD_POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE)
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """Create the pooled session on first use, inside the running event loop."""
+        if self._session is None or self._session.closed:
+            if isinstance(self.timeout, tuple):
+                connect_timeout, read_timeout = self.timeout
+            else:
+                connect_timeout = read_timeout = self.timeout
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_maxsize, limit_per_host=self.pool_maxsize),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the underlying session and release pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Delay before the given retry attempt (1-based)."""
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff_factor * (2 ** (attempt - 1)) + random.uniform(0, DEFAULT_BACKOFF_JITTER)
+
+    async def _get(self, url: str, headers: Dict[str, str], params: Optional[Dict[str, Any]] = None, as_json: bool = True) -> Any:
+        """Issue a GET with retries and return the parsed JSON (or raw bytes)."""
+        session = self._get_session()
+        attempt = 0
+        while True:
+            incr("api.requests")
+            try:
+                async with session.get(url, headers=headers, params=params) as response:
+                    if response.status in RETRY_STATUS_CODES and attempt < self.max_retries:
+                        attempt += 1
+                        await asyncio.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                        continue
+                    response.raise_for_status()
+                    if as_json:
+                        return await response.json(content_type=None)
+                    return await response.read()
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError):
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+
+    def _artifact_url(self, account_id: str, run_id: str, artifact_name: str) -> str:
+        return f"{self.base_url}/api/v2/accounts/{account_id}/runs/{run_id}/artifacts/{artifact_name}"
+
+    async def get_runs(
+        self,
+        account_id: str,
+        job_id: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+        statuses: Optional[Iterable[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get one page of runs for an account (newest first), optionally filtered by job and status."""
+        url = f"{self.base_url}/api/v2/accounts/{account_id}/runs"
+        params = runs_page_params(job_id, statuses, offset, limit)
+
+        with span("api.get_runs"):
+            data = await self._get(url, self.headers, params=params)
+        return data["data"]
+
+    async def iter_runs(
+        self,
+        account_id: str,
+        job_id: Optional[str] = None,
+        statuses: Optional[Iterable[int]] = None,
+        created_after: Optional[Union[str, datetime]] = None,
+        created_before: Optional[Union[str, datetime]] = None,
+        first_page_size: int = FIRST_PAGE_SIZE,
+        max_runs: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Lazily iterate runs, newest first, across pages (see DbtCloudClient.iter_runs)."""
+        statuses = tuple(statuses) if statuses else None
+        created_after = _parse_timestamp(created_after)
+        created_before = _parse_timestamp(created_before)
+
+        offset = 0
+        page_size = max(1, min(first_page_size, MAX_PAGE_SIZE))
+        while True:
+            if max_runs is not None:
+                page_size = min(page_size, max_runs - offset)
+                if page_size <= 0:
+                    return
+
+            runs = await self.get_runs(account_id, job_id, limit=page_size, offset=offset, statuses=statuses)
+            for run in runs:
+                action = run_filter_action(run, statuses, created_after, created_before)
+                if action == "stop":
+                    return
+                if action == "match":
+                    yield run
+
+            if len(runs) < page_size:
+                return
+            offset += len(runs)
+            page_size = min(page_size * 2, MAX_PAGE_SIZE)
+
+    async def get_artifact(self, account_id: str, run_id: str, artifact_name: str) -> Dict[str, Any]:
+        """Get an artifact from a specific run."""
+        return await self._get(self._artifact_url(account_id, run_id, artifact_name), self.artifact_headers)
+
+    async def get_artifact_content(self, account_id: str, run_id: str, artifact_name: str) -> bytes:
+        """Get the raw bytes of an artifact from a specific run."""
+        with span("api.get_artifact", artifact=artifact_name) as record:
+            content = await self._get(self._artifact_url(account_id, run_id, artifact_name), self.artifact_headers, as_json=False)
+            record["bytes"] = len(content)
+
+        incr("bytes.downloaded", len(content))
+        return content
+
+    async def get_artifacts(self, account_id: str, run_id: str, artifact_names: List[str]) -> Dict[str, Any]:
+        """Get several artifacts of a run concurrently, as parsed JSON keyed by name."""
+        artifacts = await asyncio.gather(*(
+            self.get_artifact(account_id, run_id, artifact_name) for artifact_name in artifact_names
+        ))
+        return dict(zip(artifact_names, artifacts))
+
+    async def get_last_completed_run_id(self, account_id: str, job_id: Optional[str] = None) -> Optional[str]:
+        """Get the most recent completed run ID (status 10=success, 20=error, 30=cancelled)."""
+        async for run in self.iter_runs(account_id, job_id, statuses=COMPLETED_RUN_STATUSES, first_page_size=1):
+            return str(run["id"])
+
+        return None
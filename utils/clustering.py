@@ -0,0 +1,296 @@
+"""
+Root-cause clustering: group failed tests that likely share one cause.
+"""
+
+import re
+import json
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Union
+from .dag_index import DagIndex, node_label
+from .failed_test import FailedTest
+from .metrics import span, incr
+
+CLUSTERS_FILENAME = "failure_clusters.json"
+
+# Ancestors within this many hops of the tested nodes are root cause candidates
+ANCESTOR_DEPTH = 3
+
+# A shared ancestor explains a group of failures when at least this share of
+# the tests within reach below it failed; hubs such as a date dimension,
+# upstream of most of the project, rarely pass this bar
+MIN_FAILING_SHARE = 0.3
+
+# Root causes listed per cluster
+MAX_ROOT_CAUSES = 5
+
+PRIORITY_ORDER = ("high_priority", "medium_priority", "low_priority")
+
+# dbt's default failure message says nothing about the cause
+_GENERIC_MESSAGE = re.compile(r"^got # results?, configured to (?:fail|warn) if")
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"|`[^`]*`")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_SPACE = re.compile(r"\s+")
+
+
+def message_signature(message: Optional[str]) -> Optional[str]:
+    """
+    Error message with literals masked, or None for empty and generic messages.
+
+    Quoted values become '?' and numbers #, so "Database Error: column 'x'
+    not found" and the same error about column 'y' share a signature.
+    """
+    if not message:
+        return None
+    signature = _SPACE.sub(" ", _NUMBER.sub("#", _QUOTED.sub("'?'", message.lower()))).strip()
+    if not signature or _GENERIC_MESSAGE.match(signature):
+        return None
+    return signature
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 with union by size and path halving."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> int:
+        """Merge the sets of a and b; returns the new root."""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return a
+
+
+@dataclass
+class FailureCluster:
+    """
+    Failed tests grouped under one likely root cause.
+
+    Provides test_name and priority like a FailedTest, so a cluster is
+    written by write_prompts as one consolidated prompt.
+    """
+
+    cluster_id: str
+    tests: List[FailedTest]
+    reasons: List[str] = field(default_factory=list)
+    root_causes: List[str] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return len(self.tests)
+
+    @property
+    def models(self) -> List[str]:
+        """Models under test, in member order."""
+        return list(dict.fromkeys(model for test in self.tests for model in test.related_models))
+
+    @property
+    def priority(self) -> str:
+        """
+        Highest priority among the member tests.
+
+        Tags outside PRIORITY_ORDER (e.g. critical_priority) rank after the
+        known ones and before unknown_priority, first member first.
+        """
+        def rank(priority: str) -> int:
+            if priority in PRIORITY_ORDER:
+                return PRIORITY_ORDER.index(priority)
+            return len(PRIORITY_ORDER) + (priority == "unknown_priority")
+
+        return min((test.priority for test in self.tests), key=rank, default="unknown_priority")
+
+    @property
+    def test_name(self) -> str:
+        """Name for the prompt file: the main root cause or model, and the member count."""
+        if self.root_causes:
+            subject = node_label(self.root_causes[0])
+        else:
+            subject = self.tests[0].model_name
+            if self.tests[0].column_name and all(test.column_name == self.tests[0].column_name for test in self.tests):
+                subject = f"{subject}_{self.tests[0].column_name}"
+        return f"cluster_{subject}_{self.size}_tests"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to the clusters JSON shape (members by unique_id)."""
+        return {
+            "cluster_id": self.cluster_id,
+            "size": self.size,
+            "priority": self.priority,
+            "reasons": self.reasons,
+            "root_causes": self.root_causes,
+            "models": self.models,
+            "tests": [test.unique_id for test in self.tests]
+        }
+
+
+def cluster_failed_tests(
+    failed_tests: Iterable[FailedTest],
+    dag_index: Optional[DagIndex] = None
+) -> List[FailureCluster]:
+    """
+    Group failed tests that likely share a root cause.
+
+    Tests are merged with a union-find when they:
+        - test the same model and column (same_model_column)
+        - fail with the same error once literals are masked (similar_message)
+        - share an ancestor within ANCESTOR_DEPTH hops of the tested nodes
+          (the tested nodes themselves included, so a failure downstream of
+          another failing model joins it), provided at least
+          MIN_FAILING_SHARE of the tests within reach below that ancestor
+          failed (shared_ancestor; needs the DAG index)
+
+    Each signal only costs a dictionary lookup per test and key, so grouping
+    stays near-linear in the number of failures. Only ancestors reached by
+    two or more failed tests have the tests below them counted.
+
+    Args:
+        failed_tests: FailedTest records from the analysis
+        dag_index: Index over the manifest's DAG (without it, only the model,
+            column and message signals are used)
+
+    Returns:
+        Clusters, largest first; tests that share nothing form clusters of one
+    """
+    tests = list(failed_tests)
+    groups = UnionFind(len(tests))
+    reasons: Dict[int, set] = {}
+
+    def merge(members: List[int], reason: str):
+        for member in members:
+            groups.union(members[0], member)
+            reasons.setdefault(member, set()).add(reason)
+
+    with span("cluster.failed_tests", tests=len(tests)) as record:
+        by_model_column: Dict[tuple, List[int]] = {}
+        by_message: Dict[str, List[int]] = {}
+        by_ancestor: Dict[str, List[int]] = {}
+        for i, test in enumerate(tests):
+            by_model_column.setdefault((test.model_name, test.column_name), []).append(i)
+            signature = message_signature(test.message)
+            if signature is not None:
+                by_message.setdefault(signature, []).append(i)
+            if dag_index is not None:
+                for ancestor in dag_index.ancestors(dag_index.parents(test.unique_id), ANCESTOR_DEPTH):
+                    by_ancestor.setdefault(ancestor, []).append(i)
+
+        for members in by_model_column.values():
+            if len(members) > 1:
+                merge(members, "same_model_column")
+        for members in by_message.values():
+            if len(members) > 1:
+                merge(members, "similar_message")
+
+        # Root cause candidates: ancestors with most of the tests below them failing
+        candidates: Dict[str, int] = {}
+        for ancestor, members in by_ancestor.items():
+            if len(members) < 2:
+                continue
+            # Below a hub only the nearest tests are returned; the share is taken among those
+            below = dag_index.tests_below(ancestor, ANCESTOR_DEPTH + 1)
+            failing = sum(1 for i in members if tests[i].unique_id in below)
+            if failing > 1 and failing / len(below) >= MIN_FAILING_SHARE:
+                candidates[ancestor] = len(members)
+                merge(members, "shared_ancestor")
+
+        clustered: Dict[int, List[int]] = {}
+        for i in range(len(tests)):
+            clustered.setdefault(groups.find(i), []).append(i)
+
+        clusters = []
+        for members in sorted(clustered.values(), key=lambda members: (-len(members), members[0])):
+            member_set = set(members)
+            root_causes = sorted(
+                (ancestor for ancestor in candidates if member_set.issuperset(by_ancestor[ancestor])),
+                key=lambda ancestor: (-candidates[ancestor], ancestor)
+            )[:MAX_ROOT_CAUSES] if len(members) > 1 else []
+            member_reasons = set()
+            for member in members:
+                member_reasons |= reasons.get(member, set())
+            clusters.append(FailureCluster(
+                cluster_id=_cluster_id(tests[i] for i in members),
+                tests=[tests[i] for i in members],
+                reasons=sorted(member_reasons),
+                root_causes=root_causes
+            ))
+
+        record["clusters"] = len(clusters)
+    incr("clusters.total", len(clusters))
+    incr("clusters.merged", sum(1 for cluster in clusters if cluster.size > 1))
+    return clusters
+
+
+def _cluster_id(tests: Iterable[FailedTest]) -> str:
+    """Stable ID from the member unique_ids."""
+    digest = hashlib.sha256("\n".join(sorted(test.unique_id for test in tests)).encode("utf-8"))
+    return f"cluster.{digest.hexdigest()[:12]}"
+
+
+def iter_cluster_prompts(clusters: Iterable[FailureCluster]) -> Iterator[Union[FailureCluster, FailedTest]]:
+    """What to write a prompt for: each cluster of two or more tests, and lone tests as themselves."""
+    for cluster in clusters:
+        yield cluster if cluster.size > 1 else cluster.tests[0]
+
+
+def clusters_path_for(analysis_path: Union[str, Path]) -> Path:
+    """Clusters file kept next to an analysis file."""
+    return Path(analysis_path).with_name(CLUSTERS_FILENAME)
+
+
+def write_clusters(clusters: List[FailureCluster], clusters_path: Union[str, Path]) -> str:
+    """
+    Write the clusters JSON.
+
+    Shape: {"total_failed_tests", "total_clusters", "clusters": [{"cluster_id",
+    "size", "priority", "reasons", "root_causes", "models", "tests"}]}
+
+    Returns:
+        Path to the clusters file
+    """
+    clusters_path = Path(clusters_path)
+    clusters_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(clusters_path, 'w') as f:
+        json.dump({
+            "total_failed_tests": sum(cluster.size for cluster in clusters),
+            "total_clusters": len(clusters),
+            "clusters": [cluster.to_dict() for cluster in clusters]
+        }, f, indent=2)
+    return str(clusters_path)
+
+
+def load_clusters(clusters_path: Union[str, Path], failed_tests: Iterable[FailedTest]) -> List[FailureCluster]:
+    """
+    Rebuild clusters from a clusters file and the analysis it was made from.
+
+    Failed tests missing from the file (e.g. an analysis newer than the
+    clusters) become clusters of one.
+    """
+    with open(clusters_path, 'r') as f:
+        stored = json.load(f)
+
+    tests = {test.unique_id: test for test in failed_tests}
+    clusters = []
+    for entry in stored.get("clusters", []):
+        members = [tests.pop(unique_id) for unique_id in entry.get("tests", []) if unique_id in tests]
+        if members:
+            clusters.append(FailureCluster(
+                cluster_id=entry.get("cluster_id") or _cluster_id(members),
+                tests=members,
+                reasons=entry.get("reasons", []),
+                root_causes=entry.get("root_causes", [])
+            ))
+    clusters.extend(FailureCluster(_cluster_id([test]), [test]) for test in tests.values())
+    return clusters
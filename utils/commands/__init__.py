@@ -6,10 +6,18 @@ from .get_last_run_command import cmd_get_last_run
 from .fetch_artifacts_command import cmd_fetch_artifacts
 from .analyze_artifacts_command import cmd_analyze_artifacts
 from .generate_prompts_command import cmd_generate_prompts
+from .fan_out_command import cmd_fan_out
+from .history_command import cmd_history
+from .watch_command import cmd_watch
+from .webhook_command import cmd_webhook
 
 __all__ = [
     "cmd_get_last_run",
     "cmd_fetch_artifacts",
     "cmd_analyze_artifacts",
-    "cmd_generate_prompts"
+    "cmd_generate_prompts",
+    "cmd_fan_out",
+    "cmd_history",
+    "cmd_watch",
+    "cmd_webhook"
 ]
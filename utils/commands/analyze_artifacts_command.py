@@ -2,21 +2,59 @@
 Analyze artifacts command - handles CLI concerns for test analysis.
 """
 
-import json
-from ..test_analyzer import analyze_failed_tests
+import os
+from ..artifact_fetcher import fetch_artifacts
+from ..clustering import cluster_failed_tests, clusters_path_for, write_clusters
+from ..local_artifacts import prepare_local_failed_tests
+from ..test_analyzer import prepare_failed_tests, write_analysis
 
 
 def cmd_analyze_artifacts(args):
     """Handle the analyze-artifacts CLI command."""
     try:
-        # Call utility function to do the work
-        output_path = analyze_failed_tests(output_path=args.output_path)
+        # Resolve a specific run's artifacts through the local cache first
+        run_id = getattr(args, "run_id", None)
+        target_dir = getattr(args, "target_dir", None)
+        if run_id and target_dir:
+            print("❌ Error: --run-id and --target-dir cannot be combined")
+            return 1
+        if run_id:
+            account_id = os.environ.get("DBT_CLOUD_ACCOUNT_ID")
+            if not account_id:
+                print("❌ Error: DBT_CLOUD_ACCOUNT_ID environment variable is required")
+                return 1
+            if not fetch_artifacts(account_id, run_id, use_cache=not getattr(args, "no_cache", False)):
+                print("❌ Failed to fetch artifacts")
+                return 1
+
+        stream_manifest = getattr(args, "stream_manifest", False)
+        analysis_format = getattr(args, "format", None)
+        cluster = getattr(args, "cluster", False)
+
+        if target_dir:
+            # dbt-core target directory: read the artifacts in place
+            failed_tests, dag_index = prepare_local_failed_tests(target_dir)
+        else:
+            failed_tests, dag_index = prepare_failed_tests(stream_manifest=stream_manifest)
+
+        if args.quiet and not cluster:
+            # Nothing to display: stream each test into the analysis file as it is analyzed
+            write_analysis(failed_tests, args.output_path, analysis_format)
+            return 0
+
+        failed_tests_data = list(failed_tests)
+        output_path = write_analysis(failed_tests_data, args.output_path, analysis_format)
+
+        if cluster:
+            # Root-cause clusters are kept next to the analysis for generate-prompts --cluster
+            clusters = cluster_failed_tests(failed_tests_data, dag_index)
+            clusters_path = write_clusters(clusters, clusters_path_for(output_path))
+            if args.quiet:
+                return 0
+            print(f"🧩 {len(failed_tests_data)} failed tests grouped into {len(clusters)} clusters: {clusters_path}")
         
-        # Load results for display unless quiet mode
+        # Display the in-memory results unless quiet mode
         if not args.quiet:
-            with open(output_path, 'r') as f:
-                analysis_data = json.load(f)
-            failed_tests_data = analysis_data.get("failed_tests", [])
             
             if not failed_tests_data:
                 print("✅ No failed tests found!")
@@ -29,28 +67,28 @@ def cmd_analyze_artifacts(args):
             print(f"{'='*60}\n")
             
             for i, test in enumerate(failed_tests_data, 1):
-                print(f"{i}. {test.get('test_name', 'unknown')}")
-                print(f"   Status: {test.get('status', '')} | Failures: {test.get('failures', 0)}")
-                print(f"   Message: {test.get('message', '')}")
+                print(f"{i}. {test.test_name}")
+                print(f"   Status: {test.status} | Failures: {test.failures}")
+                print(f"   Message: {test.message or ''}")
                 
-                if test.get('test_type'):
-                    print(f"   Test Type: {test.get('test_type')}")
+                if test.test_type:
+                    print(f"   Test Type: {test.test_type}")
                 
-                if test.get('tags'):
-                    print(f"   Tags: {', '.join(test.get('tags', []))}")
+                if test.tags:
+                    print(f"   Tags: {', '.join(test.tags)}")
                 
-                if test.get('related_models'):
-                    print(f"   Related Models: {', '.join(test.get('related_models', []))}")
+                if test.related_models:
+                    print(f"   Related Models: {', '.join(test.related_models)}")
                 
                 print()
             
             print(f"📄 Detailed analysis saved to: {output_path}")
             
             # Print quick stats
-            total_failures = sum(test.get('failures', 0) for test in failed_tests_data)
+            total_failures = sum(test.failures for test in failed_tests_data)
             test_types = {}
             for test in failed_tests_data:
-                test_type = test.get('test_type') or "unknown"
+                test_type = test.test_type or "unknown"
                 test_types[test_type] = test_types.get(test_type, 0) + 1
             
             print(f"\n📊 Quick Stats:")
@@ -61,7 +99,8 @@ def cmd_analyze_artifacts(args):
         
     except FileNotFoundError as e:
         print(f"❌ Error: {e}")
-        print("💡 Make sure you have run 'fetch-artifacts' first to download run_results.json and manifest.json")
+        if not getattr(args, "target_dir", None):
+            print("💡 Make sure you have run 'fetch-artifacts' first to download run_results.json and manifest.json")
         return 1
     except Exception as e:
         print(f"❌ Error: {e}")
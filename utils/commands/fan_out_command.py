@@ -0,0 +1,48 @@
+"""
+Fan-out command - handles CLI concerns for processing many jobs at once.
+"""
+
+from ..fanout import run_fanout, parse_job_spec, load_jobs_file, DEFAULT_JOBS_OUTPUT_DIR, DEFAULT_MAX_CONCURRENCY
+
+
+def cmd_fan_out(args):
+    """Handle the fan-out CLI command."""
+    try:
+        jobs = [parse_job_spec(spec) for spec in getattr(args, "job", None) or []]
+        jobs_file = getattr(args, "jobs_file", None)
+        if jobs_file:
+            jobs.extend(load_jobs_file(jobs_file))
+
+        if not jobs:
+            print("❌ Error: no jobs given. Use --job ACCOUNT:JOB (repeatable) or --jobs-file PATH")
+            return 1
+
+        output_dir = getattr(args, "output_dir", None) or DEFAULT_JOBS_OUTPUT_DIR
+        max_concurrency = getattr(args, "max_concurrency", None) or DEFAULT_MAX_CONCURRENCY
+
+        job_count = len(set(jobs))
+        print(f"🚀 Processing {job_count} jobs (up to {min(max_concurrency, job_count)} at a time)...")
+        summary = run_fanout(
+            jobs,
+            output_dir=output_dir,
+            max_concurrency=max_concurrency,
+            use_cache=not getattr(args, "no_cache", False),
+            incremental=getattr(args, "incremental", False)
+        )
+
+        totals = summary["totals"]
+        print("=" * 60)
+        print(f"✅ {totals['succeeded']}/{totals['jobs']} jobs processed in {summary['duration_s']}s: "
+              f"{totals['prompts_generated']} prompts for {totals['failed_tests']} failed tests")
+        if totals["no_completed_run"]:
+            print(f"⚠️  {totals['no_completed_run']} jobs had no completed runs")
+        print(f"📄 Combined summary: {output_dir}/summary.json")
+
+        if totals["errors"]:
+            print(f"❌ {totals['errors']} jobs failed")
+            return 1
+        return 0
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return 1
@@ -3,22 +3,27 @@ Fetch artifacts command - handles CLI concerns for artifact fetching.
 """
 
 import os
-from ..artifact_fetcher import fetch_artifacts, fetch_artifacts_from_env
+from ..artifact_fetcher import fetch_artifacts, fetch_artifacts_from_env, DEFAULT_ARTIFACTS, DEFAULT_MAX_WORKERS
 
 
 def cmd_fetch_artifacts(args):
     """Handle the fetch-artifacts CLI command."""
     try:
+        # Extra artifacts (e.g. catalog.json) are fetched alongside the required ones
+        artifacts = DEFAULT_ARTIFACTS + list(getattr(args, "artifacts", None) or [])
+        max_workers = getattr(args, "max_workers", None) or DEFAULT_MAX_WORKERS
+        use_cache = not getattr(args, "no_cache", False)
+
         if args.run_id:
             # Use specific run ID
             account_id = os.environ.get("DBT_CLOUD_ACCOUNT_ID")
             if not account_id:
                 print("❌ Error: DBT_CLOUD_ACCOUNT_ID environment variable is required")
                 return 1
-            success = fetch_artifacts(account_id, args.run_id)
+            success = fetch_artifacts(account_id, args.run_id, artifacts=artifacts, max_workers=max_workers, use_cache=use_cache)
         else:
             # Use last completed run
-            success = fetch_artifacts_from_env()
+            success = fetch_artifacts_from_env(artifacts=artifacts, max_workers=max_workers, use_cache=use_cache)
 
         if success:
             print("✅ Artifacts fetched successfully!")
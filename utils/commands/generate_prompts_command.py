@@ -2,72 +2,64 @@
 Generate prompts command - handles CLI concerns for prompt generation.
 """
 
-import json
+from itertools import chain
 from pathlib import Path
-from ..prompts import PromptManager
+from ..clustering import clusters_path_for, load_clusters, iter_cluster_prompts
+from ..failed_test import iter_failed_tests
+from ..prompts import write_prompts
+from ..incremental import write_prompts_incremental
+from ..test_analyzer import find_analysis_file
 
 
 def cmd_generate_prompts(args):
     """Handle the generate-prompts CLI command."""
     try:
-        # Check if analysis file exists
-        analysis_file = Path("data/analysis/failed_tests_debug_data.json")
-        if not analysis_file.exists():
+        # Check if analysis file exists (the newest of .json, .jsonl and .jsonl.gz by default)
+        analysis_file = getattr(args, "analysis", None) or find_analysis_file()
+        if analysis_file is None or not Path(analysis_file).exists():
             print("❌ No failed tests analysis found. Run 'analyze-artifacts' first.")
             return 1
 
-        # Load failed tests data
-        with open(analysis_file, 'r') as f:
-            analysis_data = json.load(f)
+        incremental = getattr(args, "incremental", False)
+        cluster = getattr(args, "cluster", False)
+        if cluster and incremental:
+            print("❌ Error: --cluster and --incremental cannot be combined")
+            return 1
 
-        failed_tests = analysis_data.get("failed_tests", [])
-        if not failed_tests:
+        # Read failed tests lazily; JSONL analyses are streamed line by line
+        failed_tests = iter_failed_tests(analysis_file)
+        first = next(failed_tests, None)
+        if first is None and not incremental:
             print("✅ No failed tests to generate prompts for!")
             return 0
+        if first is not None:
+            failed_tests = chain([first], failed_tests)
 
-        # Create prompts directory
         prompts_dir = Path("data/prompts")
-        prompts_dir.mkdir(parents=True, exist_ok=True)
-
-        # Initialize prompt manager
-        prompt_manager = PromptManager()
-
-        print(f"🔧 Generating prompts for {len(failed_tests)} failed tests...")
-
-        generated_count = 0
-        for i, test in enumerate(failed_tests, 1):
-            try:
-                # Create filename
-                test_name = test.get("test_name", f"test_{i}")
-                tags = test.get("tags", [])
 
-                # Extract priority from tags (look for priority tags)
-                priority = "unknown_priority"
-                for tag in tags:
-                    if tag.endswith("_priority"):
-                        priority = tag
-                        break
+        print(f"🔧 Generating prompts for failed tests in {analysis_file}...")
 
-                # Add priority to test data for generators to use
-                test_with_priority = test.copy()
-                test_with_priority["priority"] = priority
+        jobs = getattr(args, "jobs", None) or 1
+        use_processes = getattr(args, "processes", False)
 
-                # Generate prompt using prompt manager
-                prompt_content = prompt_manager.generate_prompt(test_with_priority)
-
-                safe_test_name = "".join(c for c in test_name if c.isalnum() or c in "_-")
-                filename = f"{priority}__{safe_test_name}.md"
-
-                # Write prompt file
-                prompt_file = prompts_dir / filename
-                with open(prompt_file, 'w') as f:
-                    f.write(prompt_content)
-
-                print(f"  ✅ Generated: {filename}")
-                generated_count += 1
+        if incremental:
+            # Only new or changed failures are rendered; resolved ones are pruned
+            counts = write_prompts_incremental(list(failed_tests), prompts_dir, jobs=jobs, use_processes=use_processes)
+            print(f"\n🎉 Generated {counts['generated']} prompts in {prompts_dir} "
+                  f"({counts['unchanged']} unchanged, {counts['pruned']} pruned)")
+            return 0
 
-            except Exception as e:
-                print(f"  ❌ Failed to generate prompt for test {i}: {e}")
+        if cluster:
+            # One consolidated prompt per cluster; unclustered tests keep their own prompt
+            clusters_path = clusters_path_for(analysis_file)
+            if not clusters_path.exists():
+                print(f"❌ No failure clusters found at {clusters_path}. Run 'analyze-artifacts --cluster' first.")
+                return 1
+            clusters = load_clusters(clusters_path, failed_tests)
+            print(f"🧩 {sum(group.size for group in clusters)} failed tests in {len(clusters)} clusters")
+            failed_tests = iter_cluster_prompts(clusters)
+
+        generated_count = write_prompts(failed_tests, prompts_dir, jobs=jobs, use_processes=use_processes)
 
         print(f"\n🎉 Generated {generated_count} prompts in {prompts_dir}")
         return 0
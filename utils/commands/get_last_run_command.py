@@ -17,8 +17,8 @@ def cmd_get_last_run(args):
             return 1
 
         # Use API client utility to get last run
-        client = DbtCloudClient()
-        run_id = client.get_last_completed_run_id(account_id, job_id)
+        with DbtCloudClient() as client:
+            run_id = client.get_last_completed_run_id(account_id, job_id)
 
         if run_id:
             print(f"Last completed run ID: {run_id}")
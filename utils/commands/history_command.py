@@ -0,0 +1,106 @@
+"""
+History command - handles CLI concerns for the local run-history store.
+"""
+
+import os
+from ..api_client import DbtCloudClient, COMPLETED_RUN_STATUSES
+from ..artifact_fetcher import load_artifacts
+from ..run_history import RunHistory, DEFAULT_HISTORY_DB
+
+
+def cmd_history(args):
+    """Handle the history CLI command and its subcommands."""
+    try:
+        with RunHistory(getattr(args, "db", None) or DEFAULT_HISTORY_DB) as history:
+            if args.history_command == "ingest":
+                return _ingest(history, args)
+            if args.history_command == "flaky":
+                return _flaky(history, args)
+            if args.history_command == "first-failure":
+                return _first_failure(history, args)
+            if args.history_command == "streaks":
+                return _streaks(history, args)
+
+        print("❌ Error: choose a history subcommand: ingest, flaky, first-failure or streaks")
+        return 1
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+
+def _ingest(history: RunHistory, args):
+    """Ingest a local run_results.json, or backfill the last N completed runs from dbt Cloud."""
+    account_id = args.account_id or os.environ.get("DBT_CLOUD_ACCOUNT_ID")
+    job_id = args.job_id or os.environ.get("DBT_CLOUD_JOB_ID")
+
+    if not args.last:
+        count = history.ingest_file(args.run_results, run_id=args.run_id, account_id=account_id, job_id=job_id)
+        print(f"✅ Ingested {count} test results from {args.run_results}")
+        return 0
+
+    if not account_id or not job_id:
+        print("❌ Error: DBT_CLOUD_ACCOUNT_ID and DBT_CLOUD_JOB_ID (or --account-id/--job-id) are required with --last")
+        return 1
+
+    ingested = skipped = 0
+    with DbtCloudClient() as client:
+        for run in client.iter_runs(account_id, job_id, statuses=COMPLETED_RUN_STATUSES, max_runs=args.last):
+            run_id = str(run["id"])
+            if history.has_run(run_id):
+                skipped += 1
+                continue
+            # Goes through the local artifact cache, so earlier downloads are reused
+            run_results = load_artifacts(client, account_id, run_id, artifacts=["run_results.json"])["run_results.json"]
+            count = history.ingest_run_results(run_results, run_id=run_id, account_id=account_id, job_id=job_id)
+            print(f"  ✅ Run {run_id}: {count} test results")
+            ingested += 1
+
+    print(f"✅ Ingested {ingested} runs ({skipped} already in history)")
+    return 0
+
+
+def _flaky(history: RunHistory, args):
+    """Print tests that flip between passing and failing."""
+    rows = history.flaky_tests(window=args.window, min_flips=args.min_flips, job_id=args.job_id)
+    if not rows:
+        print(f"✅ No flaky tests in the last {args.window} runs")
+        return 0
+
+    print(f"🎲 Flaky tests (last {args.window} runs, at least {args.min_flips} pass/fail flips):")
+    for row in rows:
+        print(f"   • {row['unique_id']}: {row['flips']} flips, failed {row['failures']}/{row['runs']} runs")
+    return 0
+
+
+def _first_failure(history: RunHistory, args):
+    """Print the run where a test's current failure streak started."""
+    unique_id = history.resolve_test_id(args.test)
+    if unique_id is None:
+        print(f"❌ Test not found in history: {args.test}")
+        return 1
+
+    row = history.first_failure(unique_id, job_id=args.job_id)
+    if row is None:
+        print(f"✅ {unique_id} is passing in its latest run")
+        return 0
+
+    print(f"📅 {unique_id}")
+    print(f"   • Failing since run {row['run_id']} ({row['generated_at']})")
+    print(f"   • Consecutive failing runs: {row['streak']}")
+    print(f"   • First failure on record: run {row['first_ever_run_id']}")
+    return 0
+
+
+def _streaks(history: RunHistory, args):
+    """Print the longest current failure streaks."""
+    rows = history.failure_streaks(limit=args.limit, min_streak=args.min_streak, job_id=args.job_id)
+    if not rows:
+        print("✅ No tests failing in their latest run")
+        return 0
+
+    print("🔥 Current failure streaks:")
+    for row in rows:
+        print(f"   • {row['unique_id']}: {row['streak']} runs (since run {row['since_run_id']}, {row['since']}), "
+              f"{row['last_failures']} failures in latest run")
+    return 0
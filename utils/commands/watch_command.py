@@ -0,0 +1,51 @@
+"""
+Watch command - handles CLI concerns for polling dbt Cloud for new runs.
+"""
+
+import os
+import signal
+from ..watcher import Watcher, DEFAULT_CURSOR_PATH, DEFAULT_MIN_INTERVAL, DEFAULT_MAX_INTERVAL
+
+
+def cmd_watch(args):
+    """Handle the watch CLI command."""
+    try:
+        account_id = os.environ.get("DBT_CLOUD_ACCOUNT_ID")
+        job_id = os.environ.get("DBT_CLOUD_JOB_ID")
+        if not account_id or not job_id:
+            print("❌ Error: DBT_CLOUD_ACCOUNT_ID and DBT_CLOUD_JOB_ID environment variables are required")
+            return 1
+
+        min_interval = getattr(args, "min_interval", None) or DEFAULT_MIN_INTERVAL
+        max_interval = getattr(args, "max_interval", None) or DEFAULT_MAX_INTERVAL
+        watcher = Watcher(
+            account_id,
+            job_id,
+            cursor_path=getattr(args, "cursor", None) or DEFAULT_CURSOR_PATH,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            use_cache=not getattr(args, "no_cache", False),
+            incremental=getattr(args, "incremental", False),
+            metrics_dir=getattr(args, "metrics_dir", None)
+        )
+
+        # Finish the current run and save the cursor before exiting
+        signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stop())
+
+        once = getattr(args, "once", False)
+        if not once:
+            print(f"👀 Watching job {job_id} for completed runs "
+                  f"(polling every {min_interval:g}-{max_interval:g}s, Ctrl+C to stop)...")
+        try:
+            watcher.run(once=once)
+        except KeyboardInterrupt:
+            watcher.stop()
+        finally:
+            watcher.close()
+
+        print(f"✅ Processed {watcher.runs_processed} runs (cursor: run {watcher.cursor.last_run_id})")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return 1
@@ -0,0 +1,90 @@
+"""
+Webhook command - handles CLI concerns for the webhook receiver and its test sender.
+"""
+
+import os
+import signal
+import threading
+from ..fanout import DEFAULT_JOBS_OUTPUT_DIR
+from ..webhook import (
+    WebhookReceiver,
+    make_server,
+    send_test_event,
+    DEFAULT_WEBHOOK_HOST,
+    DEFAULT_WEBHOOK_PORT,
+    DEFAULT_WEBHOOK_PATH,
+    DEFAULT_WEBHOOK_WORKERS
+)
+
+
+def cmd_webhook(args):
+    """Handle the webhook CLI command and its subcommands."""
+    try:
+        secret = os.environ.get("DBT_CLOUD_WEBHOOK_SECRET")
+        if not secret:
+            print("❌ Error: DBT_CLOUD_WEBHOOK_SECRET environment variable is required")
+            return 1
+
+        if args.webhook_command == "serve":
+            return _serve(args, secret)
+        if args.webhook_command == "send":
+            return _send(args, secret)
+
+        print("❌ Error: choose a webhook subcommand: serve or send")
+        return 1
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+
+def _serve(args, secret: str):
+    """Receive webhooks until interrupted, then finish the queued runs."""
+    output_dir = args.output_dir or DEFAULT_JOBS_OUTPUT_DIR
+    receiver = WebhookReceiver(
+        secret,
+        output_dir=output_dir,
+        workers=args.workers or DEFAULT_WEBHOOK_WORKERS,
+        use_cache=not args.no_cache,
+        incremental=getattr(args, "incremental", False),
+        job_ids=args.job_ids
+    )
+    server = make_server(receiver, args.host or DEFAULT_WEBHOOK_HOST, args.port or DEFAULT_WEBHOOK_PORT, DEFAULT_WEBHOOK_PATH)
+
+    # shutdown() blocks until serve_forever() returns, so call it from another thread
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+
+    host, port = server.server_address[:2]
+    receiver.start()
+    print(f"📡 Listening for dbt Cloud webhooks on http://{host}:{port}{DEFAULT_WEBHOOK_PATH} "
+          f"({receiver.workers} workers, output in {output_dir}/)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    print(f"⏳ Finishing {receiver.queue.qsize()} queued runs...")
+    receiver.stop()
+    stats = receiver.health()
+    print(f"✅ Processed {stats['processed']} runs ({stats['duplicates']} duplicate deliveries, "
+          f"{stats['ignored']} ignored, {stats['rejected']} rejected, {stats['errors']} errors)")
+    return 0
+
+
+def _send(args, secret: str):
+    """Send a signed test delivery, standing in for dbt Cloud."""
+    account_id = args.account_id or os.environ.get("DBT_CLOUD_ACCOUNT_ID")
+    job_id = args.job_id or os.environ.get("DBT_CLOUD_JOB_ID")
+    if not account_id or not job_id:
+        print("❌ Error: DBT_CLOUD_ACCOUNT_ID and DBT_CLOUD_JOB_ID (or --account-id/--job-id) are required")
+        return 1
+
+    url = args.url or f"http://{DEFAULT_WEBHOOK_HOST}:{DEFAULT_WEBHOOK_PORT}{DEFAULT_WEBHOOK_PATH}"
+    response = send_test_event(
+        url, secret, account_id, job_id, args.run_id,
+        status_code=args.status_code, event_id=args.event_id
+    )
+    print(f"📨 {response.status_code}: {response.text}")
+    return 0 if response.ok else 1
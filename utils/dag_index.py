@@ -0,0 +1,381 @@
+"""
+Compact index over a dbt manifest's DAG for upstream and downstream lookups.
+"""
+
+import os
+import json
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set, Tuple, Iterable, Callable, Union
+
+# Bump when the persisted layout changes so stale index files are rebuilt
+DAG_INDEX_VERSION = 1
+DEFAULT_DAG_CACHE_DIR = "data/cache/dag"
+
+# Persisted indexes kept on disk (newest first) and indexes kept in memory
+MAX_CACHED_DAGS = 20
+MEMORY_CACHE_SIZE = 4
+
+# BFS bounds: hops from the test, nodes visited per search, nodes listed per result
+DEFAULT_MAX_DEPTH = 25
+MAX_VISITED_NODES = 5000
+MAX_IMPACT_NODES = 100
+
+# Node kinds, from the resource type prefix of the unique_id
+KIND_OTHER, KIND_SOURCE, KIND_MODEL, KIND_EXPOSURE, KIND_TEST = range(5)
+_KINDS = {"source": KIND_SOURCE, "model": KIND_MODEL, "exposure": KIND_EXPOSURE, "test": KIND_TEST}
+
+
+def _node_kind(unique_id: str) -> int:
+    return _KINDS.get(unique_id.split(".", 1)[0], KIND_OTHER)
+
+
+@lru_cache(maxsize=65536)
+def node_label(unique_id: str) -> str:
+    """Short display name of a node: source_name.table for sources, the name otherwise."""
+    parts = unique_id.split(".")
+    if parts[0] == "source" and len(parts) >= 4:
+        return f"{parts[-2]}.{parts[-1]}"
+    return parts[-1] if len(parts) > 1 else unique_id
+
+
+@dataclass
+class TestImpact:
+    """Nodes upstream and downstream of a failing test, nearest first."""
+
+    upstream_sources: List[str] = field(default_factory=list)
+    downstream_models: List[str] = field(default_factory=list)
+    downstream_exposures: List[str] = field(default_factory=list)
+
+
+class DagIndex:
+    """
+    The manifest's parent/child graph with integer node IDs and array-backed edges.
+
+    Nodes are numbered in parent_map order and each direction is stored in
+    compressed sparse row form: the edges of node i are
+    targets[offsets[i]:offsets[i + 1]]. Lookups walk flat int arrays instead
+    of the manifest's dictionaries of string lists, and the index for a
+    manifest is built once and cached by the manifest's SHA-256 (in memory,
+    and on disk under data/cache/dag/).
+
+    Searches are bounded BFS (DEFAULT_MAX_DEPTH hops, MAX_VISITED_NODES
+    visited) and memoized per set of tested nodes, so many failing tests on
+    the same model share one search.
+    """
+
+    def __init__(
+        self,
+        node_ids: List[str],
+        parent_offsets: array,
+        parent_targets: array,
+        manifest_sha256: Optional[str] = None
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            node_ids: unique_id of each node, indexed by integer node ID
+            parent_offsets: Start of each node's parents in parent_targets (len(node_ids) + 1 entries)
+            parent_targets: Integer IDs of parents, grouped by node
+            manifest_sha256: Hash of the manifest the index was built from
+        """
+        self.node_ids = node_ids
+        self.ids = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.kinds = bytes(_node_kind(node_id) for node_id in node_ids)
+        self.parent_offsets = parent_offsets
+        self.parent_targets = parent_targets
+        self.child_offsets, self.child_targets = _invert(len(node_ids), parent_offsets, parent_targets)
+        self.manifest_sha256 = manifest_sha256
+        self._impacts: Dict[Tuple[Tuple[int, ...], int], TestImpact] = {}
+
+    @classmethod
+    def from_manifest(cls, manifest: Dict[str, Any], manifest_sha256: Optional[str] = None) -> "DagIndex":
+        """Build the index from the manifest's parent_map in a single pass."""
+        return cls.from_parent_map(manifest.get("parent_map") or {}, manifest_sha256)
+
+    @classmethod
+    def from_parent_map(cls, parent_map: Dict[str, List[str]], manifest_sha256: Optional[str] = None) -> "DagIndex":
+        """Build the index from a unique_id -> parent unique_ids mapping."""
+        node_ids = list(parent_map)
+        ids = {node_id: i for i, node_id in enumerate(node_ids)}
+        parent_offsets = array("i", [0])
+        parent_targets = array("i")
+
+        for parents in parent_map.values():
+            for parent in parents:
+                parent_id = ids.get(parent)
+                if parent_id is None:
+                    # Parent without an entry of its own (e.g. a disabled node)
+                    parent_id = ids[parent] = len(node_ids)
+                    node_ids.append(parent)
+                parent_targets.append(parent_id)
+            parent_offsets.append(len(parent_targets))
+
+        parent_offsets.extend([len(parent_targets)] * (len(node_ids) + 1 - len(parent_offsets)))
+        return cls(node_ids, parent_offsets, parent_targets, manifest_sha256)
+
+    @classmethod
+    def load(cls, manifest_sha256: Optional[str], cache_dir: Optional[Union[str, Path]] = None) -> Optional["DagIndex"]:
+        """Cached index for a manifest hash, from memory or disk, or None on a miss."""
+        if not manifest_sha256:
+            return None
+        with _memory_lock:
+            index = _memory_cache.get(manifest_sha256)
+            if index is not None:
+                _memory_cache.move_to_end(manifest_sha256)
+                return index
+
+        stored = _read_index_file(_index_path(manifest_sha256, cache_dir))
+        if stored is None or stored.get("manifest_sha256") != manifest_sha256:
+            return None
+        index = cls(
+            stored["node_ids"],
+            array("i", stored["parent_offsets"]),
+            array("i", stored["parent_targets"]),
+            manifest_sha256
+        )
+        _remember(index)
+        return index
+
+    @classmethod
+    def load_or_build(
+        cls,
+        manifest_sha256: Optional[str],
+        manifest: Optional[Dict[str, Any]] = None,
+        loader: Optional[Callable[[], Dict[str, Any]]] = None,
+        cache_dir: Optional[Union[str, Path]] = None
+    ) -> "DagIndex":
+        """
+        Cached index for a manifest, building and caching it on a miss.
+
+        Args:
+            manifest_sha256: SHA-256 of manifest.json (None skips the cache)
+            manifest: Parsed manifest (or a partial manifest with its parent_map)
+            loader: Called to obtain the manifest only when the index has to be built
+            cache_dir: Where persisted indexes are kept (defaults to data/cache/dag)
+        """
+        index = cls.load(manifest_sha256, cache_dir)
+        if index is not None:
+            return index
+
+        if manifest is None and loader is not None:
+            manifest = loader()
+        index = cls.from_manifest(manifest or {}, manifest_sha256)
+        index.save(cache_dir)
+        return index
+
+    def save(self, cache_dir: Optional[Union[str, Path]] = None):
+        """
+        Persist the index atomically and keep it in memory.
+
+        Only the MAX_CACHED_DAGS most recently saved indexes are kept on
+        disk. Failures to write are not fatal.
+        """
+        _remember(self)
+        if not self.manifest_sha256:
+            return
+
+        index_path = _index_path(self.manifest_sha256, cache_dir)
+        payload = {
+            "version": DAG_INDEX_VERSION,
+            "manifest_sha256": self.manifest_sha256,
+            "node_ids": self.node_ids,
+            "parent_offsets": self.parent_offsets.tolist(),
+            "parent_targets": self.parent_targets.tolist()
+        }
+        try:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(prefix=f".{index_path.name}.", suffix=".part", dir=index_path.parent)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(payload, f, separators=(",", ":"))
+            os.replace(tmp_name, index_path)
+            _prune_cache(index_path.parent)
+        except OSError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def parents(self, unique_id: str) -> List[str]:
+        """Direct parents of a node."""
+        node = self.ids.get(unique_id)
+        if node is None:
+            return []
+        return [self.node_ids[i] for i in self.parent_targets[self.parent_offsets[node]:self.parent_offsets[node + 1]]]
+
+    def children(self, unique_id: str) -> List[str]:
+        """Direct children of a node."""
+        node = self.ids.get(unique_id)
+        if node is None:
+            return []
+        return [self.node_ids[i] for i in self.child_targets[self.child_offsets[node]:self.child_offsets[node + 1]]]
+
+    def _bfs(
+        self,
+        starts: Iterable[int],
+        offsets: array,
+        targets: array,
+        wanted: Tuple[int, ...],
+        max_depth: int,
+        include_starts: bool,
+        limit: int = MAX_IMPACT_NODES
+    ) -> Dict[int, List[int]]:
+        """
+        Breadth-first search from starts, returning the reached nodes of each wanted kind.
+
+        Tests are only reached when they are a wanted kind, and never walked
+        through. The search stops after max_depth hops, or at the end of the
+        level where MAX_VISITED_NODES is reached, and at most limit nodes are
+        returned per kind, nearest first.
+        """
+        found: Dict[int, List[int]] = {kind: [] for kind in wanted}
+        kinds = self.kinds
+        frontier = list(dict.fromkeys(starts))
+        visited = set(frontier)
+        depth = 0
+
+        # Level by level, so results come out nearest first
+        while frontier:
+            if depth or include_starts:
+                for node in frontier:
+                    nodes = found.get(kinds[node])
+                    if nodes is not None and len(nodes) < limit:
+                        nodes.append(node)
+            if depth >= max_depth or len(visited) >= MAX_VISITED_NODES:
+                break
+
+            next_frontier = []
+            for node in frontier:
+                if kinds[node] == KIND_TEST:
+                    continue
+                for neighbour in targets[offsets[node]:offsets[node + 1]]:
+                    if neighbour not in visited and (kinds[neighbour] != KIND_TEST or KIND_TEST in found):
+                        visited.add(neighbour)
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+            depth += 1
+
+        return found
+
+    def impact(self, unique_id: str, max_depth: int = DEFAULT_MAX_DEPTH) -> TestImpact:
+        """
+        Upstream sources and downstream models and exposures of a test.
+
+        Both searches start from the nodes the test depends on: sources are
+        found among them and their ancestors, models and exposures among
+        their descendants (the tested models themselves are not listed).
+        """
+        node = self.ids.get(unique_id)
+        if node is None:
+            return TestImpact()
+        tested = tuple(sorted(set(self.parent_targets[self.parent_offsets[node]:self.parent_offsets[node + 1]])))
+
+        impact = self._impacts.get((tested, max_depth))
+        if impact is None:
+            upstream = self._bfs(
+                tested, self.parent_offsets, self.parent_targets, (KIND_SOURCE,), max_depth, include_starts=True
+            )
+            downstream = self._bfs(
+                tested, self.child_offsets, self.child_targets, (KIND_MODEL, KIND_EXPOSURE), max_depth,
+                include_starts=False
+            )
+            impact = TestImpact(
+                upstream_sources=[self.node_ids[i] for i in upstream[KIND_SOURCE]],
+                downstream_models=[self.node_ids[i] for i in downstream[KIND_MODEL]],
+                downstream_exposures=[self.node_ids[i] for i in downstream[KIND_EXPOSURE]]
+            )
+            self._impacts[tested, max_depth] = impact
+        return impact
+
+    def ancestors(self, unique_ids: Iterable[str], max_depth: int) -> Set[str]:
+        """Non-test nodes up to max_depth hops above the given nodes, the nodes themselves included."""
+        starts = [self.ids[unique_id] for unique_id in unique_ids if unique_id in self.ids]
+        wanted = (KIND_SOURCE, KIND_MODEL, KIND_EXPOSURE, KIND_OTHER)
+        found = self._bfs(starts, self.parent_offsets, self.parent_targets, wanted, max_depth,
+                          include_starts=True, limit=MAX_VISITED_NODES)
+        return {self.node_ids[i] for nodes in found.values() for i in nodes}
+
+    def tests_below(self, unique_id: str, max_depth: int) -> Set[str]:
+        """
+        Tests up to max_depth hops below a node.
+
+        Below a hub the search ends early (see _bfs), leaving the nearest tests.
+        """
+        node = self.ids.get(unique_id)
+        if node is None:
+            return set()
+        found = self._bfs([node], self.child_offsets, self.child_targets, (KIND_TEST,), max_depth,
+                          include_starts=False, limit=MAX_VISITED_NODES)
+        return {self.node_ids[i] for i in found[KIND_TEST]}
+
+
+def _invert(node_count: int, offsets: array, targets: array) -> Tuple[array, array]:
+    """Reverse the edges of a CSR graph (parents -> children) with a counting sort."""
+    counts = [0] * (node_count + 1)
+    for target in targets:
+        counts[target + 1] += 1
+    for i in range(node_count):
+        counts[i + 1] += counts[i]
+
+    inverted_offsets = array("i", counts)
+    inverted_targets = array("i", [0]) * len(targets)
+    cursor = counts[:-1]
+    for node in range(node_count):
+        for target in targets[offsets[node]:offsets[node + 1]]:
+            inverted_targets[cursor[target]] = node
+            cursor[target] += 1
+    return inverted_offsets, inverted_targets
+
+
+_memory_cache: "OrderedDict[str, DagIndex]" = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def _remember(index: DagIndex):
+    """Keep an index in the in-process cache, evicting the least recently used."""
+    if not index.manifest_sha256:
+        return
+    with _memory_lock:
+        _memory_cache[index.manifest_sha256] = index
+        _memory_cache.move_to_end(index.manifest_sha256)
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def clear_memory_cache():
+    """Forget the indexes kept in memory (persisted indexes are kept)."""
+    with _memory_lock:
+        _memory_cache.clear()
+
+
+def _index_path(manifest_sha256: str, cache_dir: Optional[Union[str, Path]]) -> Path:
+    return Path(cache_dir or DEFAULT_DAG_CACHE_DIR) / f"{manifest_sha256}.json"
+
+
+def _prune_cache(cache_dir: Path):
+    """Delete all but the MAX_CACHED_DAGS most recently written indexes."""
+    indexes = sorted(cache_dir.glob("*.json"), key=lambda path: path.stat().st_mtime_ns, reverse=True)
+    for path in indexes[MAX_CACHED_DAGS:]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _read_index_file(index_path: Path) -> Optional[Dict[str, Any]]:
+    """Read a persisted index, ignoring missing, corrupt or outdated files."""
+    try:
+        with open(index_path, 'r') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(stored, dict) or stored.get("version") != DAG_INDEX_VERSION:
+        return None
+    return stored
@@ -0,0 +1,138 @@
+"""
+Compact record type for a failed dbt test.
+"""
+
+import gzip
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Union, Iterator, TextIO
+
+# Analysis file formats: one JSON document, or one test per line (optionally gzip-compressed)
+ANALYSIS_FORMATS = ("json", "jsonl", "jsonl.gz")
+
+
+@dataclass(slots=True)
+class FailedTest:
+    """
+    A failed test as produced by the analyzer and consumed by the generators.
+
+    Stored fields mirror the analysis JSON; display fields (model_name,
+    column_name, priority, ...) are derived on access instead of being
+    copied into per-prompt dictionaries.
+    """
+
+    unique_id: str = ""
+    test_name: str = "unknown_test"
+    status: str = ""
+    message: Optional[str] = None
+    failures: int = 0
+    compiled_code: str = ""
+    tags: List[str] = field(default_factory=list)
+    severity: Optional[str] = None
+    error_threshold: Optional[str] = None
+    warn_threshold: Optional[str] = None
+    test_type: str = ""
+    test_parameters: Dict[str, Any] = field(default_factory=dict)
+    related_models: List[str] = field(default_factory=list)
+    model_file_paths: List[str] = field(default_factory=list)
+    dependencies: List[str] = field(default_factory=list)
+    schema_file: Optional[str] = None
+    upstream_sources: List[str] = field(default_factory=list)
+    downstream_models: List[str] = field(default_factory=list)
+    downstream_exposures: List[str] = field(default_factory=list)
+
+    @property
+    def model_name(self) -> str:
+        """Primary model under test."""
+        return self.related_models[0] if self.related_models else "unknown_model"
+
+    @property
+    def model_file_path(self) -> str:
+        """File path of the primary model under test."""
+        return self.model_file_paths[0] if self.model_file_paths else ""
+
+    @property
+    def column_name(self) -> str:
+        """Column under test, for column-level generic tests."""
+        return self.test_parameters.get("column_name", "")
+
+    @property
+    def priority(self) -> str:
+        """Priority tag (e.g. high_priority), or unknown_priority."""
+        for tag in self.tags:
+            if tag.endswith("_priority"):
+                return tag
+        return "unknown_priority"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to the analysis JSON shape."""
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FailedTest":
+        """Build from the analysis JSON shape, ignoring unknown and derived keys."""
+        return cls(**{name: data[name] for name in cls.__dataclass_fields__ if data.get(name) is not None})
+
+    @classmethod
+    def coerce(cls, test: Union["FailedTest", Dict[str, Any]]) -> "FailedTest":
+        """Accept either a FailedTest or its dictionary form."""
+        return test if isinstance(test, cls) else cls.from_dict(test)
+
+
+def analysis_format(analysis_path: Union[str, Path]) -> str:
+    """Format of an analysis file from its extension (json unless .jsonl or .jsonl.gz)."""
+    name = str(analysis_path)
+    if name.endswith(".jsonl.gz"):
+        return "jsonl.gz"
+    if name.endswith(".jsonl"):
+        return "jsonl"
+    return "json"
+
+
+def open_analysis(analysis_path: Union[str, Path], mode: str = "r", format: Optional[str] = None) -> TextIO:
+    """Open an analysis file as text, through gzip for jsonl.gz."""
+    format = format or analysis_format(analysis_path)
+    if format == "jsonl.gz":
+        # Fast compression (ignored when reading): the file is written while tests are analyzed
+        return gzip.open(analysis_path, mode + "t", encoding="utf-8", compresslevel=1)
+    return open(analysis_path, mode, encoding="utf-8")
+
+
+def load_failed_tests(analysis_path: Union[str, Path]) -> List[FailedTest]:
+    """
+    Load failed tests from an analysis file.
+
+    Args:
+        analysis_path: Path to the analysis file written by analyze_failed_tests
+
+    Returns:
+        List of FailedTest records
+    """
+    return list(iter_failed_tests(analysis_path))
+
+
+def iter_failed_tests(analysis_path: Union[str, Path]) -> Iterator[FailedTest]:
+    """
+    Read failed tests from an analysis file one at a time.
+
+    JSONL files are read line by line, so memory stays flat however many
+    tests failed. JSON files are parsed whole.
+
+    Args:
+        analysis_path: Path to the analysis file written by analyze_failed_tests
+
+    Returns:
+        Iterator of FailedTest records
+    """
+    if analysis_format(analysis_path) == "json":
+        with open(analysis_path, 'r') as f:
+            analysis_data = json.load(f)
+        for test in analysis_data.get("failed_tests", []):
+            yield FailedTest.from_dict(test)
+        return
+
+    with open_analysis(analysis_path) as f:
+        for line in f:
+            if line.strip():
+                yield FailedTest.from_dict(json.loads(line))
@@ -0,0 +1,168 @@
+"""
+Fan-out: run the pipeline for many dbt Cloud jobs concurrently.
+"""
+
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, Iterable, Union
+from .pipeline import run_pipeline
+from .metrics import span
+
+DEFAULT_JOBS_OUTPUT_DIR = "data/jobs"
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Parallel artifact downloads within one job; total connections stay
+# bounded by max_concurrency * PER_JOB_DOWNLOAD_WORKERS
+PER_JOB_DOWNLOAD_WORKERS = 2
+
+
+def parse_job_spec(spec: str, default_account_id: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Parse an ACCOUNT:JOB job spec.
+
+    A bare JOB uses default_account_id (DBT_CLOUD_ACCOUNT_ID if not given).
+
+    Raises:
+        ValueError: If the spec is malformed or no account ID is available
+    """
+    spec = spec.strip()
+    account_id, sep, job_id = spec.rpartition(":")
+    if not sep:
+        account_id = default_account_id or os.environ.get("DBT_CLOUD_ACCOUNT_ID", "")
+    if not account_id or not job_id:
+        raise ValueError(f"Invalid job spec '{spec}': expected ACCOUNT:JOB")
+    return account_id, job_id
+
+
+def load_jobs_file(path: Union[str, Path], default_account_id: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    Read job specs from a file.
+
+    Either a JSON list of {"account_id", "job_id"} objects (or ACCOUNT:JOB
+    strings), or a text file with one ACCOUNT:JOB per line; blank lines and
+    lines starting with # are ignored.
+    """
+    path = Path(path)
+    with open(path, 'r') as f:
+        content = f.read()
+
+    if path.suffix == ".json":
+        jobs = []
+        for entry in json.loads(content):
+            if isinstance(entry, str):
+                jobs.append(parse_job_spec(entry, default_account_id))
+            else:
+                account_id = str(entry.get("account_id") or default_account_id or os.environ.get("DBT_CLOUD_ACCOUNT_ID", ""))
+                jobs.append(parse_job_spec(f"{account_id}:{entry['job_id']}"))
+        return jobs
+
+    return [
+        parse_job_spec(line, default_account_id)
+        for line in content.splitlines()
+        if line.strip() and not line.strip().startswith("#")
+    ]
+
+
+def job_output_dir(output_dir: Union[str, Path], account_id: str, job_id: str) -> Path:
+    """Per-job output tree: <output_dir>/<account>_<job>/"""
+    return Path(output_dir) / f"{account_id}_{job_id}"
+
+
+def run_fanout(
+    jobs: Iterable[Tuple[str, str]],
+    output_dir: Union[str, Path] = DEFAULT_JOBS_OUTPUT_DIR,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    use_cache: bool = True,
+    incremental: bool = False
+) -> Dict[str, Any]:
+    """
+    Fetch, analyze and generate prompts for several jobs concurrently.
+
+    Each job runs the in-memory pipeline on its last completed run and
+    writes into its own tree:
+        <output_dir>/<account>_<job>/analysis/failed_tests_debug_data.json
+        <output_dir>/<account>_<job>/prompts/
+        <output_dir>/<account>_<job>/state/prompts_state.json  (incremental)
+
+    At most max_concurrency jobs are in flight at once, which also bounds
+    memory (one set of parsed artifacts per job) and API connections. A job
+    that fails is recorded in the summary without stopping the others.
+
+    Args:
+        jobs: (account_id, job_id) pairs; duplicates are processed once
+        output_dir: Root of the per-job trees and the combined summary.json
+        max_concurrency: Maximum number of jobs processed at once
+        use_cache: Set to False to bypass the local artifact cache
+        incremental: Only render prompts for new or changed failures per job
+
+    Returns:
+        Combined summary, also written to <output_dir>/summary.json
+    """
+    jobs = list(dict.fromkeys(jobs))
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    started_at = datetime.now(timezone.utc)
+
+    def process(job: Tuple[str, str]) -> Dict[str, Any]:
+        account_id, job_id = job
+        job_dir = job_output_dir(output_dir, account_id, job_id)
+        result: Dict[str, Any] = {"account_id": account_id, "job_id": job_id, "output_dir": str(job_dir)}
+        start = time.perf_counter()
+        try:
+            (job_dir / "analysis").mkdir(parents=True, exist_ok=True)
+            with span("fanout.job", account_id=account_id, job_id=job_id):
+                summary = run_pipeline(
+                    account_id,
+                    job_id=job_id,
+                    prompts_dir=str(job_dir / "prompts"),
+                    analysis_path=str(job_dir / "analysis" / "failed_tests_debug_data.json"),
+                    use_cache=use_cache,
+                    max_workers=PER_JOB_DOWNLOAD_WORKERS,
+                    incremental=incremental,
+                    state_path=str(job_dir / "state" / "prompts_state.json"),
+                    verbose=False
+                )
+            result.update(summary)
+            result["status"] = "ok" if summary["run_id"] else "no_completed_run"
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = str(e)
+        result["duration_s"] = round(time.perf_counter() - start, 3)
+
+        # One line per job; per-prompt output would interleave across jobs
+        if result["status"] == "ok":
+            print(f"  ✅ {account_id}:{job_id} run {result['run_id']}: "
+                  f"{result['prompts_generated']}/{result['failed_tests']} prompts ({result['duration_s']}s)")
+        elif result["status"] == "no_completed_run":
+            print(f"  ⚠️  {account_id}:{job_id}: no completed runs found")
+        else:
+            print(f"  ❌ {account_id}:{job_id}: {result['error']}")
+        return result
+
+    max_concurrency = max(1, min(max_concurrency, len(jobs) or 1))
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        results = list(executor.map(process, jobs))
+
+    combined = {
+        "started_at": started_at.isoformat(),
+        "duration_s": round((datetime.now(timezone.utc) - started_at).total_seconds(), 3),
+        "max_concurrency": max_concurrency,
+        "totals": {
+            "jobs": len(results),
+            "succeeded": sum(1 for result in results if result["status"] == "ok"),
+            "no_completed_run": sum(1 for result in results if result["status"] == "no_completed_run"),
+            "errors": sum(1 for result in results if result["status"] == "error"),
+            "failed_tests": sum(result.get("failed_tests", 0) for result in results),
+            "prompts_generated": sum(result.get("prompts_generated", 0) for result in results)
+        },
+        "jobs": results
+    }
+
+    with open(output_dir / "summary.json", 'w') as f:
+        json.dump(combined, f, indent=2)
+
+    return combined
@@ -0,0 +1,216 @@
+"""
+Incremental prompt generation: only re-render new or changed failures.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, List, Union
+from .failed_test import FailedTest
+from .metrics import span, incr
+from .prompts import PromptManager, write_prompts
+from .prompts.prompt_writer import prompt_filename
+from .prompts.template_registry import DEFAULT_TEMPLATES_DIR
+
+# Bump when the state layout changes so stale state files are ignored
+STATE_VERSION = 1
+DEFAULT_STATE_PATH = "data/state/prompts_state.json"
+
+
+def test_fingerprint(test: FailedTest) -> str:
+    """
+    Fingerprint the parts of a failure that change its prompt.
+
+    Covers the unique_id, a hash of the compiled SQL, the failure count,
+    the model file paths and the upstream sources and downstream nodes.
+    """
+    code_hash = hashlib.sha256(test.compiled_code.encode("utf-8")).hexdigest()
+    payload = json.dumps(
+        [test.unique_id, code_hash, test.failures, test.model_file_paths,
+         test.upstream_sources, test.downstream_models, test.downstream_exposures],
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def templates_fingerprint(templates_dir: Union[str, Path] = DEFAULT_TEMPLATES_DIR) -> str:
+    """Hash the prompt templates, so editing a template re-renders every prompt."""
+    digest = hashlib.sha256()
+    for path in sorted(Path(templates_dir).rglob("*.md")):
+        digest.update(str(path.relative_to(templates_dir)).encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+@dataclass
+class IncrementalPlan:
+    """What an incremental run has to do, compared with the previous run."""
+
+    render: List[FailedTest] = field(default_factory=list)
+    unchanged: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    resolved: List[str] = field(default_factory=list)
+    filenames: Dict[str, str] = field(default_factory=dict)
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+
+
+class PromptState:
+    """
+    Fingerprints and prompt files of the failures seen in the last run.
+
+    Stored as JSON (data/state/prompts_state.json by default):
+        {"version", "prompts_dir", "templates", "tests": {unique_id: {"fingerprint", "prompt"}}}
+
+    State for a different prompts directory or template set is not reused,
+    so everything is rendered again.
+    """
+
+    def __init__(self, state_path: Union[str, Path] = DEFAULT_STATE_PATH):
+        self.state_path = Path(state_path)
+        self.tests: Dict[str, Dict[str, str]] = {}
+        self.prompts_dir: Optional[str] = None
+        self.templates: Optional[str] = None
+
+    @classmethod
+    def load(cls, state_path: Union[str, Path] = DEFAULT_STATE_PATH) -> "PromptState":
+        """Load the state file, ignoring missing, corrupt or outdated files."""
+        state = cls(state_path)
+        try:
+            with open(state.state_path, 'r') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return state
+
+        if isinstance(stored, dict) and stored.get("version") == STATE_VERSION:
+            state.tests = stored.get("tests", {})
+            state.prompts_dir = stored.get("prompts_dir")
+            state.templates = stored.get("templates")
+        return state
+
+    def plan(self, failed_tests: List[FailedTest], prompts_dir: Path, templates: str) -> IncrementalPlan:
+        """
+        Compare the current failures with the stored state.
+
+        A failure is re-rendered when it is new, its fingerprint or prompt
+        filename changed, or its prompt file is missing. Prompt files of
+        failures that are no longer failing are listed as resolved, also
+        when the templates changed; state for another prompts directory is
+        ignored, so files left in that directory are not pruned.
+        """
+        previous = self.tests if self.prompts_dir == str(prompts_dir) else {}
+        # Changed templates re-render every prompt but still prune resolved ones
+        reusable = previous if self.templates == templates else {}
+
+        plan = IncrementalPlan()
+        for i, test in enumerate(failed_tests, 1):
+            filename = prompt_filename(test, i)
+            fingerprint = test_fingerprint(test)
+            plan.filenames[test.unique_id] = filename
+            plan.fingerprints[test.unique_id] = fingerprint
+
+            entry = reusable.get(test.unique_id)
+            if (
+                entry is not None
+                and entry.get("fingerprint") == fingerprint
+                and entry.get("prompt") == filename
+                and (prompts_dir / filename).exists()
+            ):
+                plan.unchanged[test.unique_id] = entry
+            else:
+                plan.render.append(test)
+
+        # Prune files no current failure writes to (names can clash between tests)
+        current_files = set(plan.filenames.values())
+        plan.resolved = sorted({
+            entry["prompt"] for entry in previous.values()
+            if entry.get("prompt") and entry["prompt"] not in current_files
+        })
+        return plan
+
+    def save(self, prompts_dir: Path, templates: str, tests: Dict[str, Dict[str, str]]):
+        """Write the state file atomically."""
+        self.prompts_dir = str(prompts_dir)
+        self.templates = templates
+        self.tests = tests
+        payload = {
+            "version": STATE_VERSION,
+            "prompts_dir": self.prompts_dir,
+            "templates": self.templates,
+            "tests": self.tests
+        }
+
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{self.state_path.name}.", suffix=".part", dir=self.state_path.parent)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(payload, f, separators=(",", ":"))
+            os.replace(tmp_name, self.state_path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+
+def write_prompts_incremental(
+    failed_tests: List[FailedTest],
+    prompts_dir: Union[str, Path] = "data/prompts",
+    state_path: Union[str, Path] = DEFAULT_STATE_PATH,
+    prompt_manager: Optional[PromptManager] = None,
+    jobs: int = 1,
+    use_processes: bool = False,
+    verbose: bool = True
+) -> Dict[str, int]:
+    """
+    Render prompts only for new or changed failures and prune resolved ones.
+
+    Failures whose fingerprint matches the last run keep their existing
+    prompt file; editing a template or changing the token budget renders
+    every prompt again. Prompts that failed to render are not recorded, so they
+    are retried on the next run.
+
+    Args:
+        failed_tests: FailedTest records of the current run
+        prompts_dir: Directory holding the prompt files
+        state_path: State file from the previous run
+        prompt_manager: PromptManager to render with (a new one if not given)
+        jobs: Number of parallel workers for rendering
+        use_processes: Use a process pool instead of threads
+        verbose: Print a line per generated or pruned prompt
+
+    Returns:
+        Counts of generated, unchanged and pruned prompts
+    """
+    prompts_dir = Path(prompts_dir)
+    prompts_dir.mkdir(parents=True, exist_ok=True)
+
+    prompt_manager = prompt_manager or PromptManager()
+    state = PromptState.load(state_path)
+    # A different token budget or generator routing changes prompts, like a template edit
+    templates = f"{templates_fingerprint()}:{prompt_manager.token_budget}:{prompt_manager.registry.fingerprint()}"
+    with span("incremental.plan", tests=len(failed_tests)):
+        plan = state.plan(failed_tests, prompts_dir, templates)
+
+    tests_state = dict(plan.unchanged)
+
+    def record_generated(test: FailedTest, filename: str):
+        tests_state[test.unique_id] = {"fingerprint": plan.fingerprints[test.unique_id], "prompt": filename}
+
+    generated_count = 0
+    if plan.render:
+        generated_count = write_prompts(
+            plan.render, prompts_dir, prompt_manager,
+            jobs=jobs, use_processes=use_processes, on_generated=record_generated, verbose=verbose
+        )
+
+    for filename in plan.resolved:
+        (prompts_dir / filename).unlink(missing_ok=True)
+        if verbose:
+            print(f"  🗑️  Pruned: {filename}")
+
+    state.save(prompts_dir, templates, tests_state)
+
+    incr("prompts.unchanged", len(plan.unchanged))
+    incr("prompts.pruned", len(plan.resolved))
+    return {"generated": generated_count, "unchanged": len(plan.unchanged), "pruned": len(plan.resolved)}
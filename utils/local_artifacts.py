@@ -0,0 +1,142 @@
+"""
+Local artifacts: analyze a dbt-core target/ directory in place.
+"""
+
+import re
+import json
+import mmap
+import hashlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Iterator, Tuple, Union
+from .dag_index import DagIndex
+from .failed_test import FailedTest
+from .manifest_index import ManifestIndex
+from .manifest_stream import Buffer, _JsonScanner, extract_manifest_nodes
+from .metrics import span, incr
+from .test_analyzer import iter_analyze_run
+
+DEFAULT_TARGET_DIR = "target"
+
+# Pre-filter for results worth parsing; the parsed status is checked again
+_FAILED_STATUS = re.compile(rb'"status"\s*:\s*"fail"')
+
+
+@contextmanager
+def map_artifact(path: Union[str, Path]) -> Iterator[Buffer]:
+    """
+    Memory-map an artifact read-only.
+
+    Falls back to reading the file where it cannot be mapped (empty files,
+    or file systems without mmap support).
+    """
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            yield f.read()
+            return
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def read_failed_results(run_results: Buffer) -> Dict[str, Any]:
+    """
+    Extract the failed results from run_results.json contents.
+
+    Results are located in place and only those that look failed are
+    parsed, so passing results (usually the vast majority) are never
+    turned into Python objects.
+
+    Returns:
+        Partial run_results: {"metadata": {...}, "results": [failed results]}
+    """
+    subset: Dict[str, Any] = {"results": []}
+    scanner = _JsonScanner(run_results)
+
+    for key in scanner.iter_members():
+        if key == "results":
+            for _ in scanner.iter_items():
+                start, end = scanner.value_bounds()
+                if _FAILED_STATUS.search(run_results, start, end):
+                    result = json.loads(run_results[start:end])
+                    if result.get("status") == "fail":
+                        subset["results"].append(result)
+        elif key == "metadata":
+            subset["metadata"] = scanner.read_value()
+        else:
+            scanner.skip_value()
+
+    return subset
+
+
+def collect_local_failed_tests(target_dir: Union[str, Path] = DEFAULT_TARGET_DIR) -> List[FailedTest]:
+    """
+    Analyze failed tests straight from a dbt target directory.
+
+    Args:
+        target_dir: dbt target directory containing run_results.json and manifest.json
+
+    Returns:
+        List of FailedTest records
+    """
+    return list(stream_local_failed_tests(target_dir))
+
+
+def stream_local_failed_tests(target_dir: Union[str, Path] = DEFAULT_TARGET_DIR) -> Iterator[FailedTest]:
+    """
+    Read a dbt target directory and yield FailedTest records as they are analyzed.
+
+    run_results.json and manifest.json are memory-mapped and scanned in
+    place: only failed results, the failing test nodes and model stubs (for
+    resolving refs) are parsed, plus the parent_map when the DAG index for
+    this manifest is not cached yet. Nothing is copied to data/artifacts/
+    and nothing is written next to the artifacts.
+
+    Args:
+        target_dir: dbt target directory containing run_results.json and manifest.json
+
+    Returns:
+        Iterator of FailedTest records
+    """
+    return prepare_local_failed_tests(target_dir)[0]
+
+
+def prepare_local_failed_tests(target_dir: Union[str, Path] = DEFAULT_TARGET_DIR) -> Tuple[Iterator[FailedTest], DagIndex]:
+    """
+    Like stream_local_failed_tests, also returning the manifest's DAG index (for clustering).
+
+    Returns:
+        Iterator of FailedTest records, and the DAG index
+    """
+    target_path = Path(target_dir)
+    run_results_path = target_path / "run_results.json"
+    manifest_path = target_path / "manifest.json"
+    for path in (run_results_path, manifest_path):
+        if not path.is_file():
+            raise FileNotFoundError(f"{path} not found. Run dbt (e.g. 'dbt build') to produce it")
+
+    with span("local.run_results"), map_artifact(run_results_path) as buffer:
+        run_results = read_failed_results(buffer)
+        incr("bytes.mapped", len(buffer))
+
+    node_ids = [result.get("unique_id", "") for result in run_results["results"]]
+    with span("local.manifest", nodes=len(node_ids)), map_artifact(manifest_path) as buffer:
+        manifest_sha256 = hashlib.sha256(buffer).hexdigest()
+        dag_index = DagIndex.load(manifest_sha256)
+        extra_keys = [] if dag_index is not None else ["parent_map"]
+        manifest = extract_manifest_nodes(buffer, node_ids, include_models=True, extra_keys=extra_keys)
+        incr("bytes.mapped", len(buffer))
+
+    with span("analyze.manifest_index"):
+        manifest_index = ManifestIndex.from_manifest(manifest, manifest_sha256)
+
+    if dag_index is None:
+        with span("analyze.dag_index"):
+            dag_index = DagIndex.from_manifest(manifest, manifest_sha256)
+            dag_index.save()
+    manifest.pop("parent_map", None)
+
+    return iter_analyze_run(run_results, manifest, manifest_index, dag_index), dag_index
@@ -0,0 +1,183 @@
+"""
+Precomputed lookup index over a dbt manifest.
+"""
+
+import os
+import json
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, Union, Callable
+from .artifact_cache import sha256_file
+
+# Bump when the persisted layout changes so stale index files are rebuilt
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".index.json"
+
+
+class ManifestIndex:
+    """
+    One-time index over manifest nodes for constant-time ref resolution.
+
+    Replaces scanning every manifest node for every ref of every failing test
+    with dictionary lookups:
+        - model name (and package) -> model unique_id
+        - unique_id -> original_file_path
+    """
+
+    def __init__(
+        self,
+        models_by_name: Dict[str, List[Tuple[str, str]]],
+        file_paths: Dict[str, str],
+        manifest_sha256: Optional[str] = None
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            models_by_name: Model name -> [(package_name, unique_id), ...] in manifest order
+            file_paths: unique_id -> original_file_path for every node that has one
+            manifest_sha256: Hash of the manifest file the index was built from
+        """
+        self.models_by_name = models_by_name
+        self.file_paths = file_paths
+        self.manifest_sha256 = manifest_sha256
+
+    @classmethod
+    def from_manifest(cls, manifest: Dict[str, Any], manifest_sha256: Optional[str] = None) -> "ManifestIndex":
+        """Build the index with a single pass over manifest nodes."""
+        models_by_name: Dict[str, List[Tuple[str, str]]] = {}
+        file_paths: Dict[str, str] = {}
+
+        for node_id, node_data in manifest.get("nodes", {}).items():
+            file_path = node_data.get("original_file_path")
+            if file_path:
+                file_paths[node_id] = file_path
+
+            if node_data.get("resource_type") == "model" and node_data.get("name"):
+                models_by_name.setdefault(node_data["name"], []).append(
+                    (node_data.get("package_name", ""), node_id)
+                )
+
+        return cls(models_by_name, file_paths, manifest_sha256)
+
+    @classmethod
+    def load_or_build(
+        cls,
+        manifest_path: Union[str, Path],
+        manifest: Optional[Dict[str, Any]] = None,
+        index_path: Optional[Union[str, Path]] = None,
+        loader: Optional[Callable[[], Dict[str, Any]]] = None
+    ) -> "ManifestIndex":
+        """
+        Load the persisted index for a manifest, rebuilding it if stale.
+
+        The index is stored next to the manifest (manifest.index.json) and is
+        keyed by the manifest's SHA-256. The file size and mtime are recorded
+        too, so an unchanged manifest is recognized without re-hashing it.
+
+        Args:
+            manifest_path: Path to manifest.json
+            manifest: Already-parsed manifest, loaded from manifest_path if needed
+            index_path: Where to persist the index (defaults to next to the manifest)
+            loader: Called to obtain the manifest (or a partial manifest with model
+                nodes) only when the index has to be rebuilt
+
+        Returns:
+            ManifestIndex for the manifest
+        """
+        manifest_path = Path(manifest_path)
+        index_path = Path(index_path) if index_path else manifest_path.with_name(manifest_path.stem + INDEX_SUFFIX)
+        stat = manifest_path.stat()
+
+        stored = _read_index_file(index_path)
+        if stored is not None:
+            if stored.get("manifest_size") == stat.st_size and stored.get("manifest_mtime_ns") == stat.st_mtime_ns:
+                return cls._from_stored(stored)
+            manifest_sha256 = sha256_file(manifest_path)
+            if stored.get("manifest_sha256") == manifest_sha256:
+                return cls._from_stored(stored)
+        else:
+            manifest_sha256 = sha256_file(manifest_path)
+
+        if manifest is None and loader is not None:
+            manifest = loader()
+        elif manifest is None:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+
+        index = cls.from_manifest(manifest, manifest_sha256)
+        index.save(index_path, stat.st_size, stat.st_mtime_ns)
+        return index
+
+    @classmethod
+    def _from_stored(cls, stored: Dict[str, Any]) -> "ManifestIndex":
+        models_by_name = {
+            name: [tuple(entry) for entry in entries]
+            for name, entries in stored["models_by_name"].items()
+        }
+        return cls(models_by_name, stored["file_paths"], stored.get("manifest_sha256"))
+
+    def save(self, index_path: Union[str, Path], manifest_size: int, manifest_mtime_ns: int):
+        """Persist the index atomically; failures to write are not fatal."""
+        index_path = Path(index_path)
+        payload = {
+            "version": INDEX_VERSION,
+            "manifest_sha256": self.manifest_sha256,
+            "manifest_size": manifest_size,
+            "manifest_mtime_ns": manifest_mtime_ns,
+            "models_by_name": self.models_by_name,
+            "file_paths": self.file_paths
+        }
+        try:
+            fd, tmp_name = tempfile.mkstemp(prefix=f".{index_path.name}.", suffix=".part", dir=index_path.parent)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(payload, f, separators=(",", ":"))
+            os.replace(tmp_name, index_path)
+        except OSError:
+            pass
+
+    def resolve_ref(self, ref: Dict[str, Any]) -> Optional[str]:
+        """
+        Resolve a ref to a model unique_id.
+
+        Prefers a model from the ref's package when one is given, otherwise
+        the first model with that name in manifest order.
+        """
+        candidates = self.models_by_name.get(ref.get("name", ""))
+        if not candidates:
+            return None
+
+        package = ref.get("package")
+        if package:
+            for package_name, node_id in candidates:
+                if package_name == package:
+                    return node_id
+
+        return candidates[0][1]
+
+    def file_path(self, unique_id: str) -> Optional[str]:
+        """Get the original file path of a node."""
+        return self.file_paths.get(unique_id)
+
+    def model_file_paths(self, refs: List[Dict[str, Any]]) -> List[str]:
+        """Get the file paths of the models referenced by a list of refs."""
+        model_file_paths = []
+        for ref in refs:
+            node_id = self.resolve_ref(ref)
+            file_path = self.file_paths.get(node_id) if node_id else None
+            if file_path:
+                model_file_paths.append(file_path)
+        return model_file_paths
+
+
+def _read_index_file(index_path: Path) -> Optional[Dict[str, Any]]:
+    """Read a persisted index, ignoring missing, corrupt or outdated files."""
+    try:
+        with open(index_path, 'r') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(stored, dict) or stored.get("version") != INDEX_VERSION:
+        return None
+    return stored
@@ -0,0 +1,294 @@
+"""
+Streaming extraction of selected nodes from a dbt manifest.
+"""
+
+import re
+import json
+import mmap
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, BinaryIO, Union, Tuple
+
+# In-memory sources the scanner reads in place
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Fields kept for model nodes that were not explicitly requested; enough for ManifestIndex
+MODEL_STUB_FIELDS = ("resource_type", "name", "package_name", "original_file_path")
+
+_WHITESPACE = re.compile(rb"[ \t\r\n]*")
+# String body up to its closing quote, including escapes (unrolled so it never backtracks)
+_STRING_CHARS = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_NON_BRACKET = rb'[^"{}\[\]]*'
+_SCALAR = re.compile(rb"[^,}\]\s]*")
+
+
+def _container_run(depth: int) -> bytes:
+    """Pattern for a run of non-bracket bytes, strings and containers nested up to depth levels."""
+    atoms = _STRING
+    if depth:
+        inner = _container_run(depth - 1)
+        atoms += rb'|\{' + inner + rb'\}|\[' + inner + rb'\]'
+    return _NON_BRACKET + rb'(?:(?:' + atoms + rb')' + _NON_BRACKET + rb')*'
+
+
+# Run of a container's content; containers nested up to three levels deep are
+# skipped within one match, so only deeper brackets cost a Python step
+_CONTAINER_CHARS = re.compile(_container_run(3), re.DOTALL)
+
+
+class _JsonScanner:
+    """
+    Minimal incremental JSON tokenizer over a binary stream or buffer.
+
+    Walks object members and array items and finds value boundaries without
+    building Python objects. Values can be skipped, keeping memory flat, or
+    captured as raw bytes for json.loads. Only the bytes of the value being
+    captured are held in memory, on top of one read chunk. A buffer (bytes
+    or an mmap) is scanned in place, without reading it into chunks.
+    """
+
+    def __init__(self, source: Union[BinaryIO, Buffer], chunk_size: int = STREAM_CHUNK_SIZE):
+        if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            self.stream = None
+            self.buf = source
+        else:
+            self.stream = source
+            self.buf = bytearray()
+        self.chunk_size = chunk_size
+        self.pos = 0
+        self.keep: Optional[int] = None
+
+    def _fill(self) -> bool:
+        """Read the next chunk, discarding bytes that are no longer needed."""
+        if self.stream is None:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            return False
+
+        drop = self.pos if self.keep is None else min(self.keep, self.pos)
+        if drop:
+            del self.buf[:drop]
+            self.pos -= drop
+            if self.keep is not None:
+                self.keep -= drop
+        self.buf += chunk
+        return True
+
+    def _peek(self) -> int:
+        """Return the next non-whitespace byte without consuming it."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def _expect(self, char: bytes):
+        if self._peek() != char[0]:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def _skip_string_body(self):
+        """Advance past the closing quote of a string whose opening quote was consumed."""
+        while True:
+            self.pos = _STRING_CHARS.match(self.buf, self.pos).end()
+            if self.pos >= len(self.buf):
+                if not self._fill():
+                    raise ValueError("Unterminated JSON string")
+                continue
+            if self.buf[self.pos] == 0x22:  # closing quote
+                self.pos += 1
+                return
+            # Backslash escape split across chunks: read on and match again from it
+            if not self._fill():
+                raise ValueError("Unterminated JSON string")
+
+    def read_string(self) -> str:
+        """Read a string token (e.g. an object key)."""
+        self._expect(b'"')
+        start = self.pos - 1
+        self.keep = start
+        try:
+            self._skip_string_body()
+            raw = bytes(self.buf[self.keep:self.pos])
+        finally:
+            self.keep = None
+        if b"\\" not in raw:
+            return raw[1:-1].decode("utf-8")
+        return json.loads(raw)
+
+    def skip_value(self):
+        """Advance past the next value without materializing it."""
+        first = self._peek()
+
+        if first == 0x22:  # string
+            self.pos += 1
+            self._skip_string_body()
+            return
+
+        if first not in (0x7B, 0x5B):  # scalar: number, true, false, null
+            while True:
+                self.pos = _SCALAR.match(self.buf, self.pos).end()
+                if self.pos < len(self.buf) or not self._fill():
+                    return
+
+        self.pos += 1
+        depth = 1
+        while True:
+            self.pos = _CONTAINER_CHARS.match(self.buf, self.pos).end()
+            if self.pos >= len(self.buf):
+                if not self._fill():
+                    raise ValueError("Unexpected end of JSON document")
+                continue
+
+            char = self.buf[self.pos]
+            self.pos += 1
+            if char == 0x22:
+                # String running past the end of the chunk
+                self._skip_string_body()
+            elif char in (0x7B, 0x5B):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def read_raw_value(self) -> bytes:
+        """Capture the raw bytes of the next value."""
+        self._peek()
+        self.keep = self.pos
+        try:
+            self.skip_value()
+            return bytes(self.buf[self.keep:self.pos])
+        finally:
+            self.keep = None
+
+    def read_value(self) -> Any:
+        """Parse the next value."""
+        return json.loads(self.read_raw_value())
+
+    def value_bounds(self) -> Tuple[int, int]:
+        """Skip the next value and return its (start, end) offsets in the buffer (buffer sources only)."""
+        if self.stream is not None:
+            raise ValueError("Value offsets are only stable when scanning a buffer")
+        self._peek()
+        start = self.pos
+        self.skip_value()
+        return start, self.pos
+
+    def iter_members(self) -> Iterable[str]:
+        """
+        Iterate the keys of the object at the current position.
+
+        After each yielded key the caller must consume the value with
+        skip_value, read_raw_value or read_value.
+        """
+        self._expect(b"{")
+        if self._peek() == 0x7D:
+            self.pos += 1
+            return
+
+        while True:
+            key = self.read_string()
+            self._expect(b":")
+            yield key
+
+            separator = self._peek()
+            self.pos += 1
+            if separator == 0x7D:
+                return
+            if separator != 0x2C:
+                raise ValueError(f"Expected ',' or '}}' at offset {self.pos - 1}")
+
+    def iter_items(self) -> Iterable[int]:
+        """
+        Iterate the indexes of the array at the current position.
+
+        After each yielded index the caller must consume the item with
+        skip_value, value_bounds, read_raw_value or read_value.
+        """
+        self._expect(b"[")
+        if self._peek() == 0x5D:
+            self.pos += 1
+            return
+
+        index = 0
+        while True:
+            yield index
+            index += 1
+
+            separator = self._peek()
+            self.pos += 1
+            if separator == 0x5D:
+                return
+            if separator != 0x2C:
+                raise ValueError(f"Expected ',' or ']' at offset {self.pos - 1}")
+
+
+def extract_manifest_nodes(
+    manifest: Union[str, Path, Buffer],
+    node_ids: Iterable[str],
+    include_models: bool = True,
+    extra_keys: Iterable[str] = (),
+    chunk_size: int = STREAM_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Extract selected nodes from manifest.json in a single streaming pass.
+
+    Only the requested nodes are parsed in full. With include_models, every
+    model node is also returned, reduced to the fields ManifestIndex needs
+    (name, package and file path), so refs can still be resolved. All
+    other nodes are skipped without building Python objects.
+
+    Args:
+        manifest: Path to manifest.json, or its contents as a buffer (e.g.
+            an mmap), which is scanned in place
+        node_ids: unique_ids of the nodes to extract in full
+        include_models: Also return a stub for every model node
+        extra_keys: Other top-level manifest keys to parse in full (e.g. parent_map)
+        chunk_size: Bytes to read per chunk
+
+    Returns:
+        Partial manifest shaped like the original: {"nodes": {...}, <extra_keys>: ...}
+    """
+    if not isinstance(manifest, (str, Path)):
+        return _extract_nodes(_JsonScanner(manifest), node_ids, include_models, extra_keys)
+    with open(manifest, "rb") as f:
+        return _extract_nodes(_JsonScanner(f, chunk_size), node_ids, include_models, extra_keys)
+
+
+def _extract_nodes(
+    scanner: _JsonScanner,
+    node_ids: Iterable[str],
+    include_models: bool,
+    extra_keys: Iterable[str]
+) -> Dict[str, Any]:
+    wanted = set(node_ids)
+    pending_keys = {"nodes", *extra_keys}
+    subset: Dict[str, Any] = {"nodes": {}}
+
+    for key in scanner.iter_members():
+        if key == "nodes":
+            nodes = subset["nodes"]
+            for node_id in scanner.iter_members():
+                if node_id in wanted:
+                    nodes[node_id] = scanner.read_value()
+                elif include_models and node_id.startswith("model."):
+                    node = scanner.read_value()
+                    nodes[node_id] = {field: node.get(field) for field in MODEL_STUB_FIELDS}
+                else:
+                    scanner.skip_value()
+        elif key in pending_keys:
+            subset[key] = scanner.read_value()
+        else:
+            scanner.skip_value()
+
+        pending_keys.discard(key)
+        if not pending_keys:
+            # Everything requested has been read; skip the rest of the file
+            break
+
+    return subset
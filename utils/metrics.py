@@ -0,0 +1,141 @@
+"""
+Lightweight run metrics: timing spans, counters and peak memory.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Iterator, Union
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 2)
+
+
+class Metrics:
+    """
+    Collects timing spans and counters for one run of the tool.
+
+    Spans nest per thread and per asyncio task: a span opened inside another
+    records the outer span's path (e.g. "analyze-artifacts/analyze.write").
+    Each span also records the peak RSS reached by the time it ended, so
+    memory growth can be attributed to a stage. Counters accumulate totals such as bytes
+    downloaded or failed tests per test type. Recording is cheap enough to
+    stay enabled; nothing is written unless write() is called.
+
+    Long-running processes can pass max_spans to keep only the most recent
+    spans, so memory stays bounded.
+    """
+
+    def __init__(self, max_spans: Optional[int] = None):
+        self.started_at = datetime.now(timezone.utc)
+        self.spans: deque = deque(maxlen=max_spans)
+        self.counters: Dict[str, int] = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._current_path: ContextVar[Optional[str]] = ContextVar("metrics_span_path", default=None)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block of code.
+
+        Yields the span record, so attributes known only inside the block
+        (e.g. a byte count) can be added to it.
+        """
+        parent = self._current_path.get()
+        path = f"{parent}/{name}" if parent else name
+        record: Dict[str, Any] = {"name": name, "path": path, **attributes}
+        token = self._current_path.set(path)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record["error"] = True
+            raise
+        finally:
+            end = time.perf_counter()
+            self._current_path.reset(token)
+            record["start_s"] = round(start - self._start, 6)
+            record["duration_s"] = round(end - start, 6)
+            record["peak_rss_mb"] = peak_rss_mb()
+            with self._lock:
+                self.spans.append(record)
+
+    def incr(self, name: str, value: int = 1):
+        """Add to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def count_values(self, prefix: str, values: Iterable[str]):
+        """Count occurrences of each value under prefix (e.g. test_types.not_null)."""
+        totals: Dict[str, int] = {}
+        for value in values:
+            totals[value] = totals.get(value, 0) + 1
+        for value, count in totals.items():
+            self.incr(f"{prefix}.{value}", count)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Snapshot of all metrics as a JSON-serializable dictionary."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start_s"])
+            counters = dict(sorted(self.counters.items()))
+        return {
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": round(time.perf_counter() - self._start, 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "pid": os.getpid(),
+            "spans": spans,
+            "counters": counters
+        }
+
+    def write(self, output_path: Union[str, Path]) -> Path:
+        """Write the metrics JSON file."""
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return output_path
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Get the process-wide metrics collector."""
+    return _metrics
+
+
+def reset_metrics(max_spans: Optional[int] = None) -> Metrics:
+    """Start a fresh process-wide collector (e.g. per run in a long-lived process)."""
+    global _metrics
+    _metrics = Metrics(max_spans)
+    return _metrics
+
+
+def span(name: str, **attributes):
+    """Time a block of code on the process-wide collector."""
+    return _metrics.span(name, **attributes)
+
+
+def incr(name: str, value: int = 1):
+    """Add to a counter on the process-wide collector."""
+    _metrics.incr(name, value)
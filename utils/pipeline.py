@@ -0,0 +1,204 @@
+"""
+In-memory pipeline: fetch → analyze → generate without intermediate files.
+"""
+
+from itertools import chain
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Iterator, Union
+from .api_client import DbtCloudClient
+from .artifact_fetcher import load_artifacts, DEFAULT_MAX_WORKERS
+from .clustering import cluster_failed_tests, clusters_path_for, write_clusters, iter_cluster_prompts
+from .dag_index import DagIndex
+from .failed_test import FailedTest
+from .local_artifacts import prepare_local_failed_tests
+from .prompts import write_prompts
+from .test_analyzer import iter_analyze_run, AnalysisWriter, tee_analysis
+from .metrics import span
+from .incremental import write_prompts_incremental, DEFAULT_STATE_PATH
+
+
+def run_pipeline(
+    account_id: str,
+    job_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+    prompts_dir: str = "data/prompts",
+    artifacts_dir: Optional[str] = None,
+    analysis_path: Optional[str] = None,
+    write_analysis_file: bool = False,
+    analysis_format: Optional[str] = None,
+    use_cache: bool = True,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    incremental: bool = False,
+    state_path: str = DEFAULT_STATE_PATH,
+    cluster: bool = False,
+    verbose: bool = True
+) -> Dict[str, Any]:
+    """
+    Run the full workflow, passing artifacts and analysis results in memory.
+
+    Artifacts are parsed once and handed straight to the analyzer, whose
+    FailedTest records stream into prompt generation one by one (and into
+    the analysis file, when asked for), so prompts are rendered while the
+    analysis is still running. Intermediate files are only written when
+    asked for.
+
+    Args:
+        account_id: dbt Cloud account ID
+        job_id: Job to take the last completed run from (when run_id is not given)
+        run_id: Specific run ID, or None to use the last completed run
+        prompts_dir: Directory to write prompt files to
+        artifacts_dir: If given, also save the raw artifacts to this directory
+        analysis_path: Custom path for the analysis JSON (implies writing it)
+        write_analysis_file: Write the analysis JSON to its default location
+        analysis_format: json, jsonl or jsonl.gz (defaults to analysis_path's
+            extension, or json)
+        use_cache: Set to False to bypass the local artifact cache
+        max_workers: Maximum number of parallel artifact downloads
+        incremental: Only render prompts for new or changed failures and
+            prune prompts of resolved ones
+        state_path: Incremental state file (one per prompts directory)
+        cluster: Group the failures by likely root cause and write one
+            prompt per cluster (not combined with incremental)
+        verbose: Print a line per generated prompt
+
+    Returns:
+        Summary with run_id, failed_tests, prompts_generated and analysis_path
+        (run_id is None if no completed run was found); incremental runs also
+        report prompts_unchanged and prompts_pruned, and clustered runs the
+        number of clusters
+    """
+    summary = {"run_id": run_id, "failed_tests": 0, "prompts_generated": 0, "analysis_path": None}
+
+    with DbtCloudClient(pool_maxsize=max_workers) as client:
+        if not run_id:
+            with span("pipeline.get_last_run"):
+                run_id = client.get_last_completed_run_id(account_id, job_id)
+            if not run_id:
+                return summary
+            summary["run_id"] = run_id
+
+        with span("pipeline.load_artifacts", run_id=run_id):
+            artifacts = load_artifacts(
+                client, account_id, run_id,
+                max_workers=max_workers, use_cache=use_cache, artifacts_dir=artifacts_dir
+            )
+
+    dag_index = None
+    if cluster:
+        # Built here rather than inside the analyzer, to be shared with clustering
+        with span("analyze.dag_index"):
+            dag_index = DagIndex.from_manifest(artifacts["manifest.json"])
+    failed_tests = iter_analyze_run(artifacts["run_results.json"], artifacts["manifest.json"], dag_index=dag_index)
+
+    return _write_outputs(
+        summary, failed_tests, prompts_dir, analysis_path, write_analysis_file, analysis_format,
+        incremental, state_path, verbose, cluster, dag_index
+    )
+
+
+def run_local_pipeline(
+    target_dir: Union[str, Path],
+    prompts_dir: str = "data/prompts",
+    analysis_path: Optional[str] = None,
+    write_analysis_file: bool = False,
+    analysis_format: Optional[str] = None,
+    incremental: bool = False,
+    state_path: str = DEFAULT_STATE_PATH,
+    cluster: bool = False,
+    verbose: bool = True
+) -> Dict[str, Any]:
+    """
+    Run analyze → generate on the artifacts of a local dbt target directory.
+
+    The artifacts are read in place (memory-mapped), without calling the
+    dbt Cloud API or copying them to data/artifacts/.
+
+    Args:
+        target_dir: dbt target directory containing run_results.json and manifest.json
+        prompts_dir: Directory to write prompt files to
+        analysis_path: Custom path for the analysis JSON (implies writing it)
+        write_analysis_file: Write the analysis JSON to its default location
+        analysis_format: json, jsonl or jsonl.gz (defaults to analysis_path's
+            extension, or json)
+        incremental: Only render prompts for new or changed failures and
+            prune prompts of resolved ones
+        state_path: Incremental state file (one per prompts directory)
+        cluster: Group the failures by likely root cause and write one
+            prompt per cluster (not combined with incremental)
+        verbose: Print a line per generated prompt
+
+    Returns:
+        Summary like run_pipeline's, with target_dir in place of run_id
+    """
+    summary = {"target_dir": str(target_dir), "failed_tests": 0, "prompts_generated": 0, "analysis_path": None}
+
+    with span("pipeline.local_artifacts", target_dir=str(target_dir)):
+        failed_tests, dag_index = prepare_local_failed_tests(target_dir)
+
+    return _write_outputs(
+        summary, failed_tests, prompts_dir, analysis_path, write_analysis_file, analysis_format,
+        incremental, state_path, verbose, cluster, dag_index
+    )
+
+
+def _write_outputs(
+    summary: Dict[str, Any],
+    failed_tests: Iterable[FailedTest],
+    prompts_dir: str,
+    analysis_path: Optional[str],
+    write_analysis_file: bool,
+    analysis_format: Optional[str],
+    incremental: bool,
+    state_path: str,
+    verbose: bool,
+    cluster: bool = False,
+    dag_index: Optional[DagIndex] = None
+) -> Dict[str, Any]:
+    """
+    Stream the failed tests into the analysis file (if asked for) and the
+    prompts, filling in the summary counts.
+
+    When clustering, the failed tests are collected first, grouped by
+    likely root cause (the clusters file is written next to the analysis
+    file, if any) and rendered as one prompt per cluster.
+    """
+    def counted(tests: Iterable[FailedTest]) -> Iterator[FailedTest]:
+        for test in tests:
+            summary["failed_tests"] += 1
+            yield test
+
+    tests: Iterator[FailedTest] = counted(failed_tests)
+    writer = None
+    if write_analysis_file or analysis_path:
+        writer = AnalysisWriter(analysis_path, analysis_format)
+        tests = tee_analysis(tests, writer)
+
+    try:
+        if incremental:
+            # Runs even with no failures, so prompts of resolved tests are pruned
+            counts = write_prompts_incremental(list(tests), prompts_dir, state_path, verbose=verbose)
+            summary["prompts_generated"] = counts["generated"]
+            summary["prompts_unchanged"] = counts["unchanged"]
+            summary["prompts_pruned"] = counts["pruned"]
+        elif cluster:
+            clusters = cluster_failed_tests(tests, dag_index)
+            summary["clusters"] = len(clusters)
+            if writer is not None:
+                write_clusters(clusters, clusters_path_for(writer.path))
+            if clusters:
+                summary["prompts_generated"] = write_prompts(iter_cluster_prompts(clusters), prompts_dir, verbose=verbose)
+        else:
+            first = next(tests, None)
+            if first is not None:
+                summary["prompts_generated"] = write_prompts(chain([first], tests), prompts_dir, verbose=verbose)
+    except BaseException:
+        # A failed run leaves the previous analysis file in place
+        if writer is not None:
+            writer.discard()
+        raise
+
+    if writer is not None:
+        writer.close()
+        summary["analysis_path"] = str(writer.path)
+
+    return summary
@@ -3,5 +3,6 @@ Prompt generation utilities for dbt test fixing.
 """
 
 from .prompt_manager import PromptManager
+from .prompt_writer import write_prompts
 
-__all__ = ['PromptManager']
+__all__ = ['PromptManager', 'write_prompts']
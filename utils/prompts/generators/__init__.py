@@ -7,5 +7,6 @@ from .not_null_generator import NotNullGenerator
 from .unique_generator import UniqueGenerator
 from .accepted_values_generator import AcceptedValuesGenerator
 from .generic_generator import GenericGenerator
+from .cluster_generator import ClusterGenerator
 
-__all__ = ['BaseGenerator', 'NotNullGenerator', 'UniqueGenerator', 'AcceptedValuesGenerator', 'GenericGenerator']
+__all__ = ['BaseGenerator', 'NotNullGenerator', 'UniqueGenerator', 'AcceptedValuesGenerator', 'GenericGenerator', 'ClusterGenerator']
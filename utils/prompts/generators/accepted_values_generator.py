@@ -4,18 +4,19 @@ Generator for accepted values test failure prompts.
 
 from typing import Dict, Any
 from .base_generator import BaseGenerator
+from ...failed_test import FailedTest
+from ...test_types import register_generator
 
 
+@register_generator("accepted_values")
 class AcceptedValuesGenerator(BaseGenerator):
     """Generates prompts for accepted values test failures."""
 
-    def get_template_sections(self, test_data: Dict[str, Any]) -> Dict[str, str]:
+    def get_template_sections(self, test: FailedTest, data: Dict[str, Any]) -> Dict[str, str]:
         """Get template sections for accepted values test failure."""
-        data = self.extract_common_data(test_data)
 
         # Extract accepted values specific data from simplified structure
-        test_parameters = test_data.get("test_parameters", {})
-        expected_values = test_parameters.get("values", [])
+        expected_values = test.test_parameters.get("values", [])
         expected_values_sql = self.format_expected_values_sql(expected_values)
 
         return {
@@ -56,6 +57,6 @@ ORDER BY count DESC
             "pr_summary": f"Auto-fix for failing accepted values test on `{data['model_name']}`."
         }
 
-    def generate(self, test_data: Dict[str, Any]) -> str:
+    def generate(self, test: FailedTest) -> str:
         """Generate prompt for accepted values test failure."""
-        return self.generate_from_base_template(test_data)
+        return self.generate_from_base_template(test)
@@ -3,22 +3,36 @@ Base generator with common functionality for all prompt types.
 """
 
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
+from ...dag_index import node_label
+from ...failed_test import FailedTest
+from ..template_registry import get_template_registry
+from ..prompt_budget import RenderedPrompt, PromptSize, COMPACTIONS, estimate_tokens, token_budget_from_env, MAX_LISTED_MODELS
 
 
 class BaseGenerator:
     """Base class for prompt generators."""
 
-    def __init__(self):
-        """Initialize the base generator."""
+    def __init__(self, token_budget: Optional[int] = None):
+        """
+        Initialize the base generator.
+
+        Args:
+            token_budget: Per-prompt budget in estimated tokens (defaults to
+                DBT_TEST_FIXER_PROMPT_TOKEN_BUDGET or 8000; 0 disables compaction)
+        """
         self.templates_dir = Path(__file__).parent.parent / "templates"
+        self.templates = get_template_registry()
+        self.token_budget = token_budget if token_budget is not None else token_budget_from_env()
 
     def load_template(self, template_name: str) -> str:
-        """Load a template file."""
-        template_path = self.templates_dir / template_name
-        with open(template_path, 'r') as f:
-            return f.read()
+        """Load a template file (cached by the template registry)."""
+        return self.templates.source(template_name)
+
+    def render_section(self, template_name: str, context: Dict[str, Any]) -> str:
+        """Render a section template for embedding in the base template."""
+        return self.templates.render(template_name, context).rstrip("\n")
 
     def get_current_date_info(self) -> Dict[str, str]:
         """Get current date information for template variables."""
@@ -29,36 +43,36 @@ class BaseGenerator:
             "formatted_date": now.strftime("%B %d, %Y")
         }
 
-    def extract_common_data(self, test_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract common data fields from simplified test data."""
-        unique_id = test_data.get("unique_id", "")
-        related_models = test_data.get("related_models", [])
-        model_file_paths = test_data.get("model_file_paths", [])
-        test_parameters = test_data.get("test_parameters", {})
-
+    def extract_common_data(self, test: FailedTest) -> Dict[str, Any]:
+        """Extract common template variables from a failed test record."""
         # Get current date information
         date_info = self.get_current_date_info()
 
         return {
-            "test_name": test_data.get("test_name", "unknown_test"),
-            "unique_id": unique_id,
-            "test_short_name": test_data.get("test_name", "unknown_test"),
-            "message": test_data.get("message", ""),
-            "failures": test_data.get("failures", 0),
-            "compiled_code": test_data.get("compiled_code", ""),
-            "related_models": related_models,
-            "model_file_paths": model_file_paths,
-            "model_name": related_models[0] if related_models else "unknown_model",
-            "model_file_path": model_file_paths[0] if model_file_paths else "",
-            "column_name": test_parameters.get("column_name", ""),
-            "schema_file": test_data.get("schema_file", ""),
-            "test_type": test_data.get("test_type", ""),
-            "test_parameters": test_parameters,
-            "tags": test_data.get("tags", []),
-            "severity": test_data.get("severity", ""),
-            "error_threshold": test_data.get("error_threshold", ""),
-            "warn_threshold": test_data.get("warn_threshold", ""),
-            "priority": test_data.get("priority", "unknown_priority"),
+            "test_name": test.test_name,
+            "unique_id": test.unique_id,
+            "test_short_name": test.test_name,
+            "message": test.message,
+            "failures": test.failures,
+            "compiled_code": test.compiled_code,
+            # A test that refs a model more than once lists it once per ref
+            "related_models": list(dict.fromkeys(test.related_models)),
+            "model_file_paths": list(dict.fromkeys(test.model_file_paths)),
+            "model_name": test.model_name,
+            "model_file_path": test.model_file_path,
+            "column_name": test.column_name,
+            "schema_file": test.schema_file,
+            "test_type": test.test_type,
+            "test_parameters": test.test_parameters,
+            "tags": test.tags,
+            "severity": test.severity,
+            "error_threshold": test.error_threshold,
+            "warn_threshold": test.warn_threshold,
+            "priority": test.priority,
+            # Nearest lineage from the DAG index, as short node names
+            "upstream_sources": self.lineage_labels(test.upstream_sources),
+            "downstream_models": self.lineage_labels(test.downstream_models),
+            "downstream_exposures": self.lineage_labels(test.downstream_exposures),
             # Add current date information
             **date_info
         }
@@ -71,27 +85,90 @@ class BaseGenerator:
         """Load the base template file."""
         return self.load_template("base_template.md")
 
-    def get_template_sections(self, test_data: Dict[str, Any]) -> Dict[str, str]:
-        """Get template sections - to be implemented by subclasses."""
-        raise NotImplementedError("Subclasses must implement get_template_sections method")
+    def get_template_sections(self, test: FailedTest, data: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Get template sections - to be implemented by subclasses.
 
-    def generate_from_base_template(self, test_data: Dict[str, Any]) -> str:
-        """Generate prompt using base template with sections."""
-        # Extract common data
-        data = self.extract_common_data(test_data)
+        Args:
+            test: The failed test record
+            data: Common template variables from extract_common_data (computed once per prompt)
+        """
+        raise NotImplementedError("Subclasses must implement get_template_sections method")
 
+    def lineage_labels(self, node_ids: List[str]) -> List[str]:
+        """Short names of the nearest nodes, with a count of the rest."""
+        labels = [f"`{node_label(node_id)}`" for node_id in node_ids[:MAX_LISTED_MODELS]]
+        if len(node_ids) > MAX_LISTED_MODELS:
+            labels.append(f"… and {len(node_ids) - MAX_LISTED_MODELS} more")
+        return labels
+
+    def render_dag_impact(self, data: Dict[str, Any]) -> str:
+        """Render the upstream sources and downstream models/exposures, or "" if none are known."""
+        lines = [
+            f"- **{title}**: " + ", ".join(data[name])
+            for title, name in (
+                ("Upstream sources", "upstream_sources"),
+                ("Downstream models", "downstream_models"),
+                ("Downstream exposures", "downstream_exposures")
+            )
+            if data[name]
+        ]
+        if not lines:
+            return ""
+        return "\n".join([
+            "Lineage of the tested nodes (from the manifest):",
+            *lines,
+            "- Fix at the furthest upstream point that explains the failure, then check the downstream models and exposures above"
+        ])
+
+    def render_from_base_template(self, test: FailedTest, data: Dict[str, Any]) -> str:
+        """Render the base template with the subclass sections for the given variables."""
         # Get template sections from subclass
-        sections = self.get_template_sections(test_data)
+        sections = self.get_template_sections(test, data)
 
-        # Load base template
-        base_template = self.load_base_template()
+        # Concrete lineage after the test type's generic scope advice
+        dag_impact = self.render_dag_impact(data)
+        if dag_impact:
+            sections["scope_analysis"] = f"{sections['scope_analysis']}\n\n{dag_impact}"
 
         # Combine common data with sections
         template_vars = {**data, **sections}
 
-        # Format template
-        return base_template.format(**template_vars)
+        # Render the precompiled base template
+        return self.templates.render("base_template.md", template_vars)
+
+    def render_prompt(self, test: FailedTest) -> RenderedPrompt:
+        """
+        Render a prompt within the token budget.
+
+        A prompt over budget is re-rendered with compactions applied one at
+        a time, least lossy first (SQL whitespace, long error message, long
+        model lists, then the middle of the compiled SQL), until it fits.
+        """
+        # Extract common data once and share it with the subclass sections
+        data = self.extract_common_data(test)
+        content = self.render_from_base_template(test, data)
+        tokens = original_tokens = estimate_tokens(content)
+
+        compactions = []
+        if self.token_budget > 0 and tokens > self.token_budget:
+            for name, compact in COMPACTIONS:
+                compacted = compact(data, tokens - self.token_budget)
+                if compacted is None:
+                    continue
+                data = compacted
+                content = self.render_from_base_template(test, data)
+                tokens = estimate_tokens(content)
+                compactions.append(name)
+                if tokens <= self.token_budget:
+                    break
+
+        return RenderedPrompt(content, PromptSize(len(content), tokens, original_tokens, compactions))
+
+    def generate_from_base_template(self, test: FailedTest) -> str:
+        """Generate prompt using base template with sections."""
+        return self.render_prompt(test).content
 
-    def generate(self, test_data: Dict[str, Any]) -> str:
+    def generate(self, test: FailedTest) -> str:
         """Generate prompt - to be implemented by subclasses."""
         raise NotImplementedError("Subclasses must implement generate method")
@@ -0,0 +1,104 @@
+"""
+Generator for consolidated prompts covering a cluster of related test failures.
+"""
+
+from typing import Dict, Any, List
+from .base_generator import BaseGenerator
+from ..prompt_budget import truncate_message, cap_list
+from ...clustering import FailureCluster
+from ...dag_index import node_label
+from ...failed_test import FailedTest
+
+# Members listed in full in a cluster prompt; the rest are counted
+MAX_LISTED_TESTS = 25
+
+# Per-member error messages are cut shorter than a single test's message
+MAX_MEMBER_MESSAGE_CHARS = 300
+
+
+def _union(lists: List[List[str]]) -> List[str]:
+    return list(dict.fromkeys(item for items in lists for item in items))
+
+
+class ClusterGenerator(BaseGenerator):
+    """
+    Generates one prompt for a cluster of failed tests.
+
+    The prompt lists every member test and the likely root causes, and
+    shows the compiled query of a representative test (the first member of
+    the cluster's priority), so the fix is made once at the shared cause.
+    """
+
+    def representative(self, cluster: FailureCluster) -> FailedTest:
+        """First member test with the cluster's (highest) priority."""
+        return next((test for test in cluster.tests if test.priority == cluster.priority), cluster.tests[0])
+
+    def extract_common_data(self, cluster: FailureCluster) -> Dict[str, Any]:
+        """Common variables of the representative test, with the cluster's members and lineage."""
+        test = self.representative(cluster)
+        data = super().extract_common_data(test)
+        listed = cluster.tests[:MAX_LISTED_TESTS]
+
+        return {
+            **data,
+            "test_name": cluster.test_name,
+            "test_short_name": " ".join(member.test_name for member in listed),
+            "representative_test": test.test_name,
+            "failures": sum(member.failures for member in cluster.tests),
+            "related_models": cluster.models,
+            "model_file_paths": _union([member.model_file_paths for member in cluster.tests]),
+            "priority": cluster.priority,
+            "cluster_id": cluster.cluster_id,
+            "cluster_size": cluster.size,
+            "cluster_reasons": ", ".join(reason.replace("_", " ") for reason in cluster.reasons) or "n/a",
+            "cluster_models": ", ".join(f"`{model}`" for model in cap_list(cluster.models)),
+            "cluster_tests": [
+                {
+                    "test_name": member.test_name,
+                    "test_type": member.test_type or "custom_test",
+                    "target": f"{member.model_name}.{member.column_name}" if member.column_name else member.model_name,
+                    "failures": member.failures,
+                    "message": truncate_message(member.message, MAX_MEMBER_MESSAGE_CHARS),
+                    "schema_file": member.schema_file
+                }
+                for member in listed
+            ],
+            "omitted_tests": cluster.size - len(listed),
+            "root_causes": ", ".join(f"`{node_label(node_id)}`" for node_id in cluster.root_causes),
+            "upstream_sources": self.lineage_labels(_union([member.upstream_sources for member in cluster.tests])),
+            "downstream_models": self.lineage_labels(_union([member.downstream_models for member in cluster.tests])),
+            "downstream_exposures": self.lineage_labels(_union([member.downstream_exposures for member in cluster.tests]))
+        }
+
+    def get_template_sections(self, cluster: FailureCluster, data: Dict[str, Any]) -> Dict[str, str]:
+        """Get template sections for a cluster of test failures."""
+        subject = data["root_causes"] or data["cluster_models"]
+
+        return {
+            "test_type_title": f"Clustered ({data['cluster_size']} Tests)",
+            "critical_info_section": self.render_section("sections/cluster_critical_info.md", data),
+            "investigation_steps": f"""**SECOND**: Confirm that the failures share one cause before fixing any single test:
+- Run the compiled query of a few other member tests (`dbt compile --select <test>`) and compare the failing records
+- Look for the common factor in {subject}: a recent change, a join, a filter or a source load""",
+            "decision_framework": """- **Shared upstream issue** → Fix it once at the root cause; all member tests should pass
+- **Same column tested several ways** → Fix the column's logic, not each test
+- **Same error across models** → Fix the shared macro, source or configuration
+- **Members turn out unrelated** → Fix the representative test and list the unrelated members in the PR""",
+            "scope_analysis": f"""All member tests above are in scope for this fix. Before and after the change:
+- Check the models downstream of {subject}
+- Look for passing tests on the same models that the fix could break""",
+            "branch_name": f"fix-{cluster.test_name}".replace("_", "-"),
+            "implementation_steps": """3. **Run the compiled test query** of the representative test to see the failing records:
+   ```bash
+   bq query --use_legacy_sql=false "
+   [Copy the compiled test query from above]
+   "
+   ```
+4. **Implement one fix at the shared root cause** based on the decision framework and check it against every member test""",
+            "pr_title": f"{data['priority']} 🤖 Auto-fix: {data['cluster_size']} related test failures ({cluster.test_name})",
+            "pr_summary": f"Auto-fix for {data['cluster_size']} failing tests that share a root cause ({subject})."
+        }
+
+    def generate(self, cluster: FailureCluster) -> str:
+        """Generate prompt for a cluster of test failures."""
+        return self.generate_from_base_template(cluster)
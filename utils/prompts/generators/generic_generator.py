@@ -4,37 +4,30 @@ Generator for generic test failure prompts.
 
 from typing import Dict, Any
 from .base_generator import BaseGenerator
+from ...failed_test import FailedTest
+from ...test_types import register_generator
 
 
+@register_generator(default=True)
 class GenericGenerator(BaseGenerator):
     """Generates prompts for generic test failures."""
 
-    def get_template_sections(self, test_data: Dict[str, Any]) -> Dict[str, str]:
+    def get_template_sections(self, test: FailedTest, data: Dict[str, Any]) -> Dict[str, str]:
         """Get template sections for generic test failure."""
-        data = self.extract_common_data(test_data)
 
         # Get test type from the data (already processed with user-friendly mapping)
-        test_type = test_data.get("test_type", "custom_test")
+        test_type = test.test_type or "custom_test"
         test_type_title = test_type.replace('_', ' ').title()
 
-        # Format model file paths for display
-        model_file_paths = data['model_file_paths']
-        if len(model_file_paths) == 1:
-            model_files_display = f"- **Model File**: {model_file_paths[0]}"
-        elif len(model_file_paths) > 1:
-            model_files_display = "- **Model Files**:\n" + "\n".join([f"  - {path}" for path in model_file_paths])
-        else:
-            model_files_display = "- **Model File**: (not found)"
+        critical_info_section = self.render_section("sections/generic_critical_info.md", {
+            **data,
+            "test_type": test_type,
+            "multiple_model_files": len(data['model_file_paths']) > 1
+        })
 
         return {
             "test_type_title": test_type_title,
-            "critical_info_section": f"""- **Failing Test**: `{data['test_short_name']}`
-- **Test Type**: {test_type}
-- **Model**: {data['model_name']}
-{model_files_display}
-- **Failures**: {data['failures']} record(s) failing
-- **Error Message**: {data['message']}
-- **Schema File**: {data['schema_file']}""",
+            "critical_info_section": critical_info_section,
             "investigation_steps": """**SECOND**: Analyze the failing records to understand the root cause.""",
             "decision_framework": """- **If data quality issue** → Fix model logic or add data cleaning
 - **If test configuration issue** → Update test parameters or thresholds
@@ -56,6 +49,6 @@ class GenericGenerator(BaseGenerator):
             "pr_summary": f"Auto-fix for failing {test_type} test on `{data['model_name']}`."
         }
 
-    def generate(self, test_data: Dict[str, Any]) -> str:
+    def generate(self, test: FailedTest) -> str:
         """Generate prompt for generic test failure."""
-        return self.generate_from_base_template(test_data)
+        return self.generate_from_base_template(test)
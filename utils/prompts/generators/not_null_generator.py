@@ -4,14 +4,16 @@ Generator for not_null test failure prompts.
 
 from typing import Dict, Any
 from .base_generator import BaseGenerator
+from ...failed_test import FailedTest
+from ...test_types import register_generator
 
 
+@register_generator("not_null")
 class NotNullGenerator(BaseGenerator):
     """Generates prompts for not_null test failures."""
 
-    def get_template_sections(self, test_data: Dict[str, Any]) -> Dict[str, str]:
+    def get_template_sections(self, test: FailedTest, data: Dict[str, Any]) -> Dict[str, str]:
         """Get template sections for not_null test failure."""
-        data = self.extract_common_data(test_data)
 
         return {
             "test_type_title": "Not Null",
@@ -59,6 +61,6 @@ WHERE {data['column_name']} IS NULL
             "pr_summary": f"Auto-fix for failing not_null test on `{data['model_name']}.{data['column_name']}`."
         }
 
-    def generate(self, test_data: Dict[str, Any]) -> str:
+    def generate(self, test: FailedTest) -> str:
         """Generate prompt for not_null test failure."""
-        return self.generate_from_base_template(test_data)
+        return self.generate_from_base_template(test)
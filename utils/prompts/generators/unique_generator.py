@@ -4,14 +4,16 @@ Generator for unique test failure prompts.
 
 from typing import Dict, Any
 from .base_generator import BaseGenerator
+from ...failed_test import FailedTest
+from ...test_types import register_generator
 
 
+@register_generator("unique")
 class UniqueGenerator(BaseGenerator):
     """Generates prompts for unique test failures."""
 
-    def get_template_sections(self, test_data: Dict[str, Any]) -> Dict[str, str]:
+    def get_template_sections(self, test: FailedTest, data: Dict[str, Any]) -> Dict[str, str]:
         """Get template sections for unique test failure."""
-        data = self.extract_common_data(test_data)
 
         return {
             "test_type_title": "Unique",
@@ -72,6 +74,6 @@ ORDER BY {data['column_name']}
             "pr_summary": f"Auto-fix for failing unique test on `{data['model_name']}.{data['column_name']}`."
         }
 
-    def generate(self, test_data: Dict[str, Any]) -> str:
+    def generate(self, test: FailedTest) -> str:
         """Generate prompt for unique test failure."""
-        return self.generate_from_base_template(test_data)
+        return self.generate_from_base_template(test)
@@ -0,0 +1,228 @@
+"""
+Prompt Budget - Token estimation and compaction of oversized prompts.
+"""
+
+import os
+import re
+import string
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+# Default per-prompt budget in estimated tokens (0 disables compaction)
+DEFAULT_TOKEN_BUDGET = 8000
+
+# Token counts remembered per content hash
+TOKEN_CACHE_SIZE = 4096
+
+# Compaction limits
+MAX_MESSAGE_CHARS = 1000
+MAX_LISTED_MODELS = 10
+MIN_SQL_TOKENS = 200
+
+# Byte classes for the fallback estimator
+_ALNUM_BYTES = (string.ascii_letters + string.digits).encode("ascii")
+_SPACE_BYTES = string.whitespace.encode("ascii")
+_CTE = re.compile(r"(?:\bwith|,)\s*([A-Za-z_]\w*)\s+as\s*\(", re.IGNORECASE)
+_RELATION = re.compile(r"\b(?:from|join)\s+(`[^`]+`|\"[^\"]+\"|[A-Za-z_][\w.]*\.[\w]+)", re.IGNORECASE)
+
+
+def token_budget_from_env() -> int:
+    """Per-prompt budget from DBT_TEST_FIXER_PROMPT_TOKEN_BUDGET (default 8000, 0 disables)."""
+    value = os.environ.get("DBT_TEST_FIXER_PROMPT_TOKEN_BUDGET")
+    try:
+        return int(value) if value else DEFAULT_TOKEN_BUDGET
+    except ValueError:
+        return DEFAULT_TOKEN_BUDGET
+
+
+class TokenEstimator:
+    """
+    Token counter with results cached per content hash.
+
+    Uses tiktoken's cl100k_base encoding when tiktoken is installed,
+    otherwise an approximation: one token per symbol byte, plus one per
+    word or per four letters and digits, whichever is more. The fallback
+    only counts bytes with bytes.translate, so it stays cheap next to
+    rendering even for large prompts.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._encoding = tiktoken.get_encoding("cl100k_base") if tiktoken is not None else None
+
+    def _count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        data = text.encode("utf-8")
+        symbols = len(data.translate(None, _ALNUM_BYTES + _SPACE_BYTES))
+        spaces = len(data) - len(data.translate(None, _SPACE_BYTES))
+        return symbols + max(len(data.split()), (len(data) - symbols - spaces) // 4)
+
+    def count(self, text: str, cache: bool = True) -> int:
+        """Estimated number of tokens in text (cache=False for short-lived fragments)."""
+        if not cache:
+            return self._count(text)
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        tokens = self._count(text)
+        with self._lock:
+            self._cache[key] = tokens
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return tokens
+
+
+_estimator: Optional[TokenEstimator] = None
+_estimator_lock = threading.Lock()
+
+
+def estimate_tokens(text: str, cache: bool = True) -> int:
+    """Estimated number of tokens in text, using the shared cached estimator."""
+    global _estimator
+    if _estimator is None:
+        with _estimator_lock:
+            if _estimator is None:
+                _estimator = TokenEstimator()
+    return _estimator.count(text, cache)
+
+
+@dataclass
+class PromptSize:
+    """Size of a rendered prompt, before and after compaction."""
+
+    chars: int
+    tokens: int
+    original_tokens: int
+    compactions: List[str] = field(default_factory=list)
+
+    @property
+    def compacted(self) -> bool:
+        return bool(self.compactions)
+
+
+@dataclass
+class RenderedPrompt:
+    """A rendered prompt with its estimated size."""
+
+    content: str
+    size: PromptSize
+
+
+def compact_sql_whitespace(sql: str) -> str:
+    """Strip trailing whitespace and collapse runs of blank lines."""
+    lines = [line.rstrip() for line in sql.strip("\n").splitlines()]
+    compacted = []
+    for line in lines:
+        if line or (compacted and compacted[-1]):
+            compacted.append(line)
+    return "\n".join(compacted)
+
+
+def truncate_message(message: Optional[str], max_chars: int = MAX_MESSAGE_CHARS) -> Optional[str]:
+    """Cut a long error message, noting how much was left out."""
+    if not message or len(message) <= max_chars:
+        return message
+    return f"{message[:max_chars].rstrip()} … [{len(message) - max_chars:,} more characters]"
+
+
+def cap_list(items: List[str], max_items: int = MAX_LISTED_MODELS) -> List[str]:
+    """Keep the first max_items entries and summarize the rest."""
+    if len(items) <= max_items:
+        return items
+    return items[:max_items] + [f"… and {len(items) - max_items} more"]
+
+
+def truncate_sql(sql: str, max_tokens: int) -> str:
+    """
+    Shorten SQL to about max_tokens, keeping its beginning and end.
+
+    The omitted middle is replaced with a SQL comment listing how many
+    lines were dropped and the CTEs and relations they contained, so the
+    query's shape stays visible.
+    """
+    lines = sql.splitlines()
+    if estimate_tokens(sql) <= max_tokens or len(lines) < 3:
+        return sql
+
+    # Two thirds of the budget for the head, one third for the tail
+    head: List[str] = []
+    tail: List[str] = []
+    head_budget, tail_budget = max_tokens * 2 // 3, max_tokens // 3
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line, cache=False) + 1
+        if used + cost > head_budget:
+            break
+        head.append(line)
+        used += cost
+    used = 0
+    for line in reversed(lines[len(head):]):
+        cost = estimate_tokens(line, cache=False) + 1
+        if used + cost > tail_budget or len(head) + len(tail) + 1 >= len(lines):
+            break
+        tail.append(line)
+        used += cost
+    tail.reverse()
+
+    omitted = "\n".join(lines[len(head):len(lines) - len(tail)])
+    omitted_count = len(lines) - len(head) - len(tail)
+    summary = [f"-- [compacted: {omitted_count:,} of {len(lines):,} lines omitted]"]
+    ctes = list(dict.fromkeys(_CTE.findall(omitted)))
+    relations = list(dict.fromkeys(_RELATION.findall(omitted)))
+    if ctes:
+        summary.append(f"-- omitted CTEs: {', '.join(cap_list(ctes, 20))}")
+    if relations:
+        summary.append(f"-- omitted relations: {', '.join(cap_list(relations, 20))}")
+    return "\n".join(head + summary + tail)
+
+
+def _compact_sql_whitespace(data: Dict[str, Any], overflow: int) -> Optional[Dict[str, Any]]:
+    sql = compact_sql_whitespace(data["compiled_code"])
+    return {**data, "compiled_code": sql} if sql != data["compiled_code"] else None
+
+
+def _truncate_message(data: Dict[str, Any], overflow: int) -> Optional[Dict[str, Any]]:
+    message = truncate_message(data["message"])
+    return {**data, "message": message} if message != data["message"] else None
+
+
+def _cap_model_lists(data: Dict[str, Any], overflow: int) -> Optional[Dict[str, Any]]:
+    models = cap_list(data["related_models"])
+    paths = cap_list(data["model_file_paths"])
+    if models == data["related_models"] and paths == data["model_file_paths"]:
+        return None
+    return {**data, "related_models": models, "model_file_paths": paths}
+
+
+def _truncate_sql(data: Dict[str, Any], overflow: int) -> Optional[Dict[str, Any]]:
+    sql_tokens = estimate_tokens(data["compiled_code"])
+    target = max(sql_tokens - overflow, MIN_SQL_TOKENS)
+    if target >= sql_tokens:
+        return None
+    return {**data, "compiled_code": truncate_sql(data["compiled_code"], target)}
+
+
+# Compactions of the template variables, least lossy first. Each takes the
+# variables and the estimated tokens above the budget, and returns the
+# compacted variables or None if it would not change anything.
+COMPACTIONS: List[Tuple[str, Callable[[Dict[str, Any], int], Optional[Dict[str, Any]]]]] = [
+    ("sql_whitespace", _compact_sql_whitespace),
+    ("message", _truncate_message),
+    ("model_lists", _cap_model_lists),
+    ("sql_truncated", _truncate_sql)
+]
@@ -2,48 +2,72 @@
 Prompt Manager - Coordinates prompt generation for different test types.
 """
 
-from .generators import NotNullGenerator, UniqueGenerator, AcceptedValuesGenerator, GenericGenerator
+from typing import Optional, Dict
+from .generators import BaseGenerator, GenericGenerator, ClusterGenerator
+from .prompt_budget import RenderedPrompt, token_budget_from_env
+from ..clustering import FailureCluster
+from ..failed_test import FailedTest
+from ..test_types import get_test_type_registry
 
 
 class PromptManager:
-    """Manages prompt generation for different test types."""
-
-    def __init__(self):
-        """Initialize the prompt manager."""
-        self.generators = {
-            'not_null': NotNullGenerator(),
-            'unique': UniqueGenerator(),
-            'accepted_values': AcceptedValuesGenerator(),
-            'generic': GenericGenerator()
-        }
-
-    def generate_prompt(self, test_data):
+    """
+    Manages prompt generation for different test types.
+
+    Each test is routed to the generator registered for its test type in
+    the test type registry (see utils/test_types.py), or to the generic
+    generator. A FailureCluster gets one consolidated prompt from the
+    cluster generator. Generators are created on first use, one per class.
+    """
+
+    def __init__(self, token_budget: Optional[int] = None):
+        """
+        Initialize the prompt manager.
+
+        Args:
+            token_budget: Per-prompt budget in estimated tokens (defaults to
+                DBT_TEST_FIXER_PROMPT_TOKEN_BUDGET or 8000; 0 disables compaction)
+        """
+        self.token_budget = token_budget if token_budget is not None else token_budget_from_env()
+        self.registry = get_test_type_registry()
+        self.generators: Dict[type, BaseGenerator] = {}
+
+    def get_generator(self, test_type: Optional[str]) -> BaseGenerator:
+        """Generator for a test type (the generic generator if none is registered)."""
+        return self._generator(self.registry.generator_for(test_type) or GenericGenerator)
+
+    def _generator(self, generator_cls: type) -> BaseGenerator:
+        generator = self.generators.get(generator_cls)
+        if generator is None:
+            generator = self.generators.setdefault(generator_cls, generator_cls(self.token_budget))
+        return generator
+
+    def generate_prompt(self, test):
         """
         Generate a prompt for fixing a failed test.
 
         Args:
-            test_data: Dictionary containing test failure information
+            test: FailedTest record (or its dictionary form) with test failure information
 
         Returns:
             String containing the generated prompt
         """
-        # Get test type from the improved detection logic
-        test_type = test_data.get("test_type", "")
-
-        # Route to appropriate generator based on test type (ordered by importance/frequency)
-        if test_type == "not_null":
-            generator = self.generators['not_null']
-        elif test_type == "unique":
-            generator = self.generators['unique']
-        elif test_type == "accepted_values":
-            generator = self.generators['accepted_values']
-        else:
-            # Use generic generator for all other test types including:
-            # - expression_is_true
-            # - expect_row_values_to_have_data_for_every_n_datepart (data_completeness)
-            # - custom_test
-            # - any unrecognized test types
-            generator = self.generators['generic']
-
-        # Generate prompt
-        return generator.generate(test_data)
+        return self.render_prompt(test).content
+
+    def render_prompt(self, test) -> RenderedPrompt:
+        """
+        Generate a prompt within the token budget, with its estimated size.
+
+        Args:
+            test: FailedTest record (or its dictionary form) with test failure
+                information, or a FailureCluster
+
+        Returns:
+            RenderedPrompt with the content and its size: characters,
+            estimated tokens before and after compaction, and the
+            compactions applied
+        """
+        if isinstance(test, FailureCluster):
+            return self._generator(ClusterGenerator).render_prompt(test)
+        test = FailedTest.coerce(test)
+        return self.get_generator(test.test_type).render_prompt(test)
@@ -0,0 +1,157 @@
+"""
+Prompt Writer - Renders prompts for failed tests and writes them to disk.
+"""
+
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional, Union, Tuple, Callable
+from .prompt_manager import PromptManager
+from .prompt_budget import PromptSize
+from ..clustering import FailureCluster
+from ..failed_test import FailedTest
+from ..metrics import get_metrics
+
+# In-flight renders per worker; bounds memory when the input is a long iterator
+PENDING_PER_WORKER = 4
+
+
+def prompt_filename(test: Union[FailedTest, FailureCluster], index: int) -> str:
+    """Build the prompt filename for a test: {priority}__{safe_test_name}.md"""
+    test_name = test.test_name or f"test_{index}"
+    safe_test_name = "".join(c for c in test_name if c.isalnum() or c in "_-")
+    return f"{test.priority}__{safe_test_name}.md"
+
+
+def _render_to_temp(
+    prompt_manager: PromptManager,
+    test: FailedTest,
+    prompts_dir: Path,
+    filename: str
+) -> Tuple[str, PromptSize]:
+    """Render a prompt into a temporary file next to its final path; returns the file and the prompt's size."""
+    # Generate prompt using prompt manager
+    rendered = prompt_manager.render_prompt(test)
+    prompt_content = rendered.content
+
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{filename}.", suffix=".part", dir=prompts_dir)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(prompt_content)
+        os.chmod(tmp_name, 0o644)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    return tmp_name, rendered.size
+
+
+def write_prompts(
+    failed_tests: Iterable[Union[FailedTest, FailureCluster]],
+    prompts_dir: Union[str, Path] = "data/prompts",
+    prompt_manager: Optional[PromptManager] = None,
+    jobs: int = 1,
+    use_processes: bool = False,
+    on_generated: Optional[Callable[[FailedTest, str], None]] = None,
+    verbose: bool = True
+) -> int:
+    """
+    Generate a prompt file per failed test.
+
+    Failures are isolated per test: an error while rendering or writing one
+    prompt is reported and the remaining tests are still processed.
+
+    With jobs > 1, prompts are rendered and written by a worker pool. Output
+    stays deterministic: workers write to temporary files and results are
+    consumed in input order, so log lines keep their order and each prompt
+    is renamed into place in sequence (the last test wins on a filename
+    clash, as in a sequential run).
+
+    Args:
+        failed_tests: FailedTest records to generate prompts for (or
+            FailureClusters, each written as one prompt)
+        prompts_dir: Directory to write prompt files to
+        prompt_manager: PromptManager to render with (a new one if not given)
+        jobs: Number of parallel workers (1 renders sequentially)
+        use_processes: Use a process pool instead of threads for CPU-bound rendering
+        on_generated: Called with each test and its prompt filename once the
+            prompt is in place (in input order, from the calling thread)
+        verbose: Print a line per prompt with its estimated tokens (set to
+            False when several runs share stdout)
+
+    Returns:
+        Number of prompts generated
+    """
+    # Create prompts directory
+    prompts_dir = Path(prompts_dir)
+    prompts_dir.mkdir(parents=True, exist_ok=True)
+
+    # Initialize prompt manager
+    prompt_manager = prompt_manager or PromptManager()
+
+    executor: Optional[Executor] = None
+    if jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=jobs) if use_processes else ThreadPoolExecutor(max_workers=jobs)
+
+    generated_count = 0
+    failed_count = 0
+    prompt_chars = 0
+    prompt_tokens = 0
+    compacted_count = 0
+
+    def finish(i: int, test: FailedTest, filename: str, pending) -> None:
+        nonlocal generated_count, failed_count, prompt_chars, prompt_tokens, compacted_count
+        try:
+            tmp_name, size = pending.result() if executor else pending
+            # Write prompt file (atomic rename, in input order)
+            os.replace(tmp_name, prompts_dir / filename)
+            if verbose:
+                compacted = f", compacted from ~{size.original_tokens:,}" if size.compacted else ""
+                print(f"  ✅ Generated: {filename} (~{size.tokens:,} tokens{compacted})")
+            generated_count += 1
+            prompt_chars += size.chars
+            prompt_tokens += size.tokens
+            compacted_count += size.compacted
+            if on_generated is not None:
+                on_generated(test, filename)
+        except Exception as e:
+            print(f"  ❌ Failed to generate prompt for test {i}: {e}")
+            failed_count += 1
+
+    metrics = get_metrics()
+    with metrics.span("prompts.write", jobs=jobs) as record:
+        try:
+            in_flight = deque()
+            for i, test in enumerate(failed_tests, 1):
+                # Create filename (priority is derived from the test's tags)
+                filename = prompt_filename(test, i)
+
+                if executor is None:
+                    try:
+                        pending = _render_to_temp(prompt_manager, test, prompts_dir, filename)
+                    except Exception as e:
+                        print(f"  ❌ Failed to generate prompt for test {i}: {e}")
+                        failed_count += 1
+                        continue
+                    finish(i, test, filename, pending)
+                    continue
+
+                in_flight.append((i, test, filename, executor.submit(_render_to_temp, prompt_manager, test, prompts_dir, filename)))
+                if len(in_flight) >= jobs * PENDING_PER_WORKER:
+                    finish(*in_flight.popleft())
+
+            while in_flight:
+                finish(*in_flight.popleft())
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        record["prompts"] = generated_count
+        record["tokens"] = prompt_tokens
+
+    metrics.incr("prompts.generated", generated_count)
+    metrics.incr("prompts.failed", failed_count)
+    metrics.incr("prompts.chars", prompt_chars)
+    metrics.incr("prompts.tokens", prompt_tokens)
+    metrics.incr("prompts.compacted", compacted_count)
+    return generated_count
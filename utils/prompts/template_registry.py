@@ -0,0 +1,207 @@
+"""
+Template Registry - Loads, compiles and caches prompt templates.
+
+Templates use the same placeholders as str.format, plus block tags for
+conditional and repeated sections:
+
+    {name} / {name.attr}                 variable substitution
+    {{ / }}                              literal braces
+    {% if name %}...{% else %}...{% endif %}
+    {% for item in name %}...{% endfor %}
+
+A block tag alone on its line is removed together with that line, so tags
+do not leave blank lines behind.
+"""
+
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+DEFAULT_TEMPLATES_DIR = Path(__file__).parent / "templates"
+
+_TOKEN = re.compile(
+    r"^[ \t]*\{%\s*(?P<line_tag>.*?)\s*%\}[ \t]*(?:\n|\Z)"  # block tag on its own line
+    r"|\{%\s*(?P<tag>.*?)\s*%\}"                            # inline block tag
+    r"|(?P<lbrace>\{\{)|(?P<rbrace>\}\})"                    # escaped braces
+    r"|\{(?P<var>[A-Za-z_][\w.]*)\}",                        # variable
+    re.MULTILINE
+)
+_FOR_TAG = re.compile(r"for\s+([A-Za-z_]\w*)\s+in\s+([A-Za-z_][\w.]*)$")
+_IF_TAG = re.compile(r"if\s+(not\s+)?([A-Za-z_][\w.]*)$")
+
+
+def _lookup(context: Dict[str, Any], path: str) -> Any:
+    """Resolve a dotted path against the context (dict keys or attributes)."""
+    name, _, rest = path.partition(".")
+    value = context[name]
+    for part in rest.split(".") if rest else ():
+        value = value[part] if isinstance(value, dict) else getattr(value, part)
+    return value
+
+
+class CompiledTemplate:
+    """A template parsed once into a tree of render nodes."""
+
+    def __init__(self, source: str, name: str = "<string>"):
+        self.name = name
+        self.nodes = self._parse(source)
+
+    def _parse(self, source: str) -> List[Any]:
+        # Nodes: str (text), ("var", path), ("if", negate, path, body, else_body), ("for", var, path, body)
+        root: List[Any] = []
+        stack: List[Tuple[str, Any, List[Any]]] = [("root", None, root)]
+        position = 0
+
+        for match in _TOKEN.finditer(source):
+            if match.start() > position:
+                stack[-1][2].append(source[position:match.start()])
+            position = match.end()
+
+            if match.group("lbrace"):
+                stack[-1][2].append("{")
+            elif match.group("rbrace"):
+                stack[-1][2].append("}")
+            elif match.group("var"):
+                stack[-1][2].append(("var", match.group("var")))
+            else:
+                tag = match.group("line_tag") if match.group("line_tag") is not None else match.group("tag")
+                self._parse_tag(tag, stack)
+
+        if position < len(source):
+            stack[-1][2].append(source[position:])
+        if len(stack) > 1:
+            raise ValueError(f"Template {self.name}: unclosed '{stack[-1][0]}' block")
+
+        return self._merge_text(root)
+
+    def _parse_tag(self, tag: str, stack: List[Tuple[str, Any, List[Any]]]):
+        if_match = _IF_TAG.match(tag)
+        for_match = _FOR_TAG.match(tag)
+
+        if if_match:
+            node = ["if", bool(if_match.group(1)), if_match.group(2), [], []]
+            stack[-1][2].append(node)
+            stack.append(("if", node, node[3]))
+        elif tag == "else" and stack[-1][0] == "if":
+            _, node, _ = stack.pop()
+            stack.append(("else", node, node[4]))
+        elif tag == "endif" and stack[-1][0] in ("if", "else"):
+            stack.pop()
+        elif for_match:
+            node = ["for", for_match.group(1), for_match.group(2), []]
+            stack[-1][2].append(node)
+            stack.append(("for", node, node[3]))
+        elif tag == "endfor" and stack[-1][0] == "for":
+            stack.pop()
+        else:
+            raise ValueError(f"Template {self.name}: unexpected tag '{{% {tag} %}}'")
+
+    def _merge_text(self, nodes: List[Any]) -> List[Any]:
+        """Join adjacent text nodes so rendering does fewer appends."""
+        merged: List[Any] = []
+        for node in nodes:
+            if isinstance(node, list):
+                node[3] = self._merge_text(node[3])
+                if node[0] == "if":
+                    node[4] = self._merge_text(node[4])
+            if isinstance(node, str) and merged and isinstance(merged[-1], str):
+                merged[-1] += node
+            else:
+                merged.append(node)
+        return merged
+
+    def render(self, context: Dict[str, Any]) -> str:
+        """Render the template with the given variables."""
+        out: List[str] = []
+        self._render_nodes(self.nodes, context, out)
+        return "".join(out)
+
+    def _render_nodes(self, nodes: List[Any], context: Dict[str, Any], out: List[str]):
+        for node in nodes:
+            if isinstance(node, str):
+                out.append(node)
+            elif node[0] == "var":
+                out.append(str(_lookup(context, node[1])))
+            elif node[0] == "if":
+                _, negate, path, body, else_body = node
+                condition = bool(_lookup(context, path))
+                self._render_nodes(body if condition != negate else else_body, context, out)
+            else:
+                _, var, path, body = node
+                loop_context = dict(context)
+                for item in _lookup(context, path):
+                    loop_context[var] = item
+                    self._render_nodes(body, loop_context, out)
+
+
+class TemplateRegistry:
+    """
+    Process-wide cache of compiled templates.
+
+    Each template is read and compiled once. Later lookups only stat the file
+    and recompile it when its mtime changes, so prompts can be rendered in
+    large batches without per-prompt file I/O.
+    """
+
+    def __init__(self, templates_dir: Union[str, Path] = DEFAULT_TEMPLATES_DIR):
+        self.templates_dir = Path(templates_dir)
+        self._templates: Dict[str, Tuple[int, str, CompiledTemplate]] = {}
+        self._strings: Dict[str, CompiledTemplate] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Generators (and their registry) are sent to worker processes with --processes
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _load(self, name: str) -> Tuple[str, CompiledTemplate]:
+        path = self.templates_dir / name
+        mtime_ns = os.stat(path).st_mtime_ns
+
+        cached = self._templates.get(name)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1], cached[2]
+
+        with self._lock:
+            with open(path, 'r') as f:
+                source = f.read()
+            compiled = CompiledTemplate(source, name)
+            self._templates[name] = (mtime_ns, source, compiled)
+        return source, compiled
+
+    def get(self, name: str) -> CompiledTemplate:
+        """Get a compiled template by file name, relative to the templates directory."""
+        return self._load(name)[1]
+
+    def source(self, name: str) -> str:
+        """Get the raw source of a template."""
+        return self._load(name)[0]
+
+    def render(self, name: str, context: Dict[str, Any]) -> str:
+        """Render a template file with the given variables."""
+        return self.get(name).render(context)
+
+    def render_string(self, source: str, context: Dict[str, Any]) -> str:
+        """Render an inline template, compiling it once per distinct source."""
+        compiled = self._strings.get(source)
+        if compiled is None:
+            compiled = self._strings[source] = CompiledTemplate(source)
+        return compiled.render(context)
+
+
+_default_registry: Optional[TemplateRegistry] = None
+
+
+def get_template_registry() -> TemplateRegistry:
+    """Get the shared registry for the built-in templates directory."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = TemplateRegistry()
+    return _default_registry
@@ -0,0 +1,303 @@
+"""
+Local SQLite store of test results across runs.
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Union
+from .metrics import span, incr
+
+DEFAULT_HISTORY_DB = "data/history/run_history.db"
+
+# Statuses counted as a failing test result
+FAILING_STATUSES = ("fail", "error")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    account_id TEXT,
+    job_id TEXT,
+    generated_at TEXT NOT NULL,
+    invocation_id TEXT,
+    elapsed_time REAL,
+    tests INTEGER NOT NULL,
+    failed_tests INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_job_order ON runs (job_id, generated_at);
+
+-- Clustered by test and run time, so per-test history is a contiguous range
+-- and window functions read it in order without sorting
+CREATE TABLE IF NOT EXISTS test_results (
+    unique_id TEXT NOT NULL,
+    generated_at TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    job_id TEXT,
+    status TEXT NOT NULL,
+    failed INTEGER NOT NULL,
+    failures INTEGER,
+    execution_time REAL,
+    message TEXT,
+    PRIMARY KEY (unique_id, generated_at, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS test_results_run ON test_results (run_id);
+"""
+
+# Results considered by the queries: skipped results neither break nor
+# extend a failure streak
+_RESULT_FILTER = """
+    status != 'skipped'
+    AND (:job_id IS NULL OR job_id = :job_id)
+    AND (:unique_id IS NULL OR unique_id = :unique_id)
+"""
+
+# Trailing run of failing results per test: everything after the test's
+# last passing result, for tests failing in their latest result
+_STREAKS = f"""
+WITH latest AS (
+    SELECT unique_id, MAX(generated_at) AS generated_at
+    FROM test_results WHERE {_RESULT_FILTER}
+    GROUP BY unique_id
+),
+failing AS (
+    SELECT r.unique_id, r.failures,
+        (SELECT MAX(p.generated_at) FROM test_results p
+         WHERE p.unique_id = r.unique_id AND p.failed = 0 AND p.status != 'skipped'
+           AND (:job_id IS NULL OR p.job_id = :job_id)) AS passed_at
+    FROM latest
+    JOIN test_results r ON r.unique_id = latest.unique_id AND r.generated_at = latest.generated_at
+    WHERE r.failed = 1 AND (:job_id IS NULL OR r.job_id = :job_id)
+)
+SELECT
+    s.unique_id,
+    COUNT(*) AS streak,
+    MIN(s.generated_at) AS since,
+    s.run_id AS since_run_id,
+    failing.failures AS last_failures
+FROM failing
+JOIN test_results s ON s.unique_id = failing.unique_id AND s.generated_at > COALESCE(failing.passed_at, '')
+WHERE s.status != 'skipped' AND (:job_id IS NULL OR s.job_id = :job_id)
+GROUP BY s.unique_id
+"""
+
+
+class RunHistory:
+    """
+    Indexed history of runs and their test results.
+
+    Tables:
+        runs          one row per ingested run (job, timestamps, totals)
+        test_results  one row per test per run (status, failures, execution time)
+
+    Runs are ordered by run_results.json's metadata.generated_at. Queries
+    can be scoped to one job.
+    """
+
+    def __init__(self, db_path: Union[str, Path] = DEFAULT_HISTORY_DB):
+        """
+        Open (and create if needed) the history database.
+
+        Args:
+            db_path: SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA cache_size=-65536")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def has_run(self, run_id: str) -> bool:
+        """Check whether a run has already been ingested."""
+        return self.conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (str(run_id),)).fetchone() is not None
+
+    def resolve_test_id(self, test: str) -> Optional[str]:
+        """Resolve a test name (or unique_id) to the unique_id stored in the history."""
+        row = self.conn.execute(
+            "SELECT unique_id FROM test_results WHERE unique_id = ? "
+            "OR unique_id LIKE 'test.%.' || ? OR unique_id LIKE 'test.%.' || ? || '.%' LIMIT 1",
+            (test, test, test)
+        ).fetchone()
+        return row["unique_id"] if row else None
+
+    def ingest_run_results(
+        self,
+        run_results: Dict[str, Any],
+        run_id: Optional[str] = None,
+        account_id: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> int:
+        """
+        Ingest the test results of one run in a single transaction.
+
+        Re-ingesting a run replaces its previous rows.
+
+        Args:
+            run_results: Parsed run_results.json
+            run_id: dbt Cloud run ID (defaults to metadata.invocation_id)
+            account_id: dbt Cloud account ID
+            job_id: dbt Cloud job ID, used to scope queries
+
+        Returns:
+            Number of test results stored
+        """
+        metadata = run_results.get("metadata", {})
+        run_id = str(run_id or metadata.get("invocation_id") or "")
+        if not run_id:
+            raise ValueError("run_id is required when run_results.json has no invocation_id")
+
+        generated_at = metadata.get("generated_at") or datetime.now(timezone.utc).isoformat()
+        job_id = str(job_id) if job_id else None
+        rows = [
+            (
+                result["unique_id"],
+                generated_at,
+                run_id,
+                job_id,
+                result.get("status", ""),
+                1 if result.get("status") in FAILING_STATUSES else 0,
+                result.get("failures"),
+                result.get("execution_time"),
+                result.get("message")
+            )
+            for result in run_results.get("results", [])
+            if result.get("unique_id", "").startswith("test.")
+        ]
+        # Insert in primary-key order so pages are filled sequentially
+        rows.sort()
+
+        with span("history.ingest", run_id=run_id, tests=len(rows)):
+            with self.conn:
+                self.conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+                self.conn.execute("DELETE FROM test_results WHERE run_id = ?", (run_id,))
+                self.conn.execute(
+                    "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        run_id,
+                        str(account_id) if account_id else None,
+                        job_id,
+                        generated_at,
+                        metadata.get("invocation_id"),
+                        run_results.get("elapsed_time"),
+                        len(rows),
+                        sum(row[5] for row in rows),
+                        datetime.now(timezone.utc).isoformat()
+                    )
+                )
+                self.conn.executemany("INSERT INTO test_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+        incr("history.test_results_ingested", len(rows))
+        return len(rows)
+
+    def ingest_file(
+        self,
+        run_results_path: Union[str, Path],
+        run_id: Optional[str] = None,
+        account_id: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> int:
+        """Ingest a run_results.json file (see ingest_run_results)."""
+        with open(run_results_path, 'r') as f:
+            run_results = json.load(f)
+        return self.ingest_run_results(run_results, run_id, account_id, job_id)
+
+    def flaky_tests(self, window: int = 20, min_flips: int = 2, job_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Tests that flip between passing and failing within the last runs.
+
+        Only results of the most recent `window` runs are read, so the cost
+        scales with the window rather than the size of the history.
+
+        Args:
+            window: Number of most recent runs to consider
+            min_flips: Minimum number of pass/fail transitions
+            job_id: Only consider runs of this job
+
+        Returns:
+            Rows with unique_id, flips, failures (failing results) and runs, most flips first
+        """
+        query = f"""
+        WITH window_start AS (
+            SELECT MIN(generated_at) AS generated_at FROM (
+                SELECT generated_at FROM runs
+                WHERE :job_id IS NULL OR job_id = :job_id
+                ORDER BY generated_at DESC
+                LIMIT :window
+            )
+        ),
+        ordered AS (
+            SELECT
+                unique_id,
+                failed,
+                LAG(failed) OVER (PARTITION BY unique_id ORDER BY generated_at) AS previous_failed
+            FROM test_results
+            WHERE {_RESULT_FILTER}
+              AND generated_at >= (SELECT generated_at FROM window_start)
+        )
+        SELECT
+            unique_id,
+            SUM(failed != previous_failed) AS flips,
+            SUM(failed) AS failures,
+            COUNT(*) AS runs
+        FROM ordered
+        GROUP BY unique_id
+        HAVING flips >= :min_flips
+        ORDER BY flips DESC, failures DESC, unique_id
+        """
+        rows = self.conn.execute(query, {"job_id": job_id, "unique_id": None, "window": window, "min_flips": min_flips})
+        return [dict(row) for row in rows]
+
+    def first_failure(self, unique_id: str, job_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        The run where a test's current failure streak started.
+
+        Returns:
+            Row with run_id, generated_at, streak (consecutive failing runs up to
+            the latest run) and first_ever_run_id, or None if the test is not
+            failing in its latest run
+        """
+        params = {"job_id": job_id, "unique_id": unique_id}
+        row = self.conn.execute(_STREAKS, params).fetchone()
+        if row is None:
+            return None
+
+        first_ever = self.conn.execute(
+            f"SELECT run_id FROM test_results WHERE {_RESULT_FILTER} AND failed = 1 ORDER BY generated_at LIMIT 1",
+            params
+        ).fetchone()
+        return {
+            "run_id": row["since_run_id"],
+            "generated_at": row["since"],
+            "streak": row["streak"],
+            "first_ever_run_id": first_ever["run_id"]
+        }
+
+    def failure_streaks(self, limit: int = 50, min_streak: int = 1, job_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Current failure streaks of tests failing in their latest run.
+
+        Returns:
+            Rows with unique_id, streak, since_run_id, since (generated_at of the
+            first failing run) and last_failures, longest streak first
+        """
+        query = _STREAKS + """
+        HAVING streak >= :min_streak
+        ORDER BY streak DESC, s.unique_id
+        LIMIT :limit
+        """
+        rows = self.conn.execute(query, {"job_id": job_id, "unique_id": None, "limit": limit, "min_streak": min_streak})
+        return [dict(row) for row in rows]
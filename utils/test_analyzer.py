@@ -2,40 +2,202 @@
 Simple test analysis functionality for failed dbt tests.
 """
 
+import os
 import json
+import tempfile
 from pathlib import Path
-from typing import Optional, Dict, Any, List
-
-
-def analyze_failed_tests(artifacts_dir: str = "data/artifacts", output_path: Optional[str] = None) -> str:
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple, Union
+from .clustering import cluster_failed_tests, clusters_path_for, write_clusters
+from .dag_index import DagIndex, TestImpact
+from .failed_test import FailedTest, open_analysis, analysis_format, ANALYSIS_FORMATS
+from .manifest_index import ManifestIndex
+from .manifest_stream import extract_manifest_nodes
+from .metrics import span, incr, get_metrics
+from .test_types import classify_test, get_test_type_registry
+
+DEFAULT_ANALYSIS_DIR = "data/analysis"
+
+
+def analyze_failed_tests(
+    artifacts_dir: str = "data/artifacts",
+    output_path: Optional[str] = None,
+    stream_manifest: bool = False,
+    format: Optional[str] = None,
+    cluster: bool = False
+) -> str:
     """
     Analyze failed dbt tests and export simplified metadata.
 
+    With a JSONL format each test is written as soon as it is analyzed, so
+    the failed tests are never all held in memory (except when clustering).
+
     Args:
         artifacts_dir: Directory containing run_results.json and manifest.json
-        output_path: Optional custom output path for the analysis JSON
+        output_path: Optional custom output path for the analysis file
+        stream_manifest: Extract only the needed nodes from manifest.json in a
+            single streaming pass instead of loading the whole file
+        format: json, jsonl or jsonl.gz (defaults to the output path's
+            extension, or json)
+        cluster: Also group the failures by likely root cause and write the
+            clusters file next to the analysis file
 
     Returns:
         Path to the generated analysis file
     """
-    artifacts_path = Path(artifacts_dir)
+    failed_tests, dag_index = prepare_failed_tests(artifacts_dir, stream_manifest)
+    if not cluster:
+        return write_analysis(failed_tests, output_path, format)
+
+    failed_tests = list(failed_tests)
+    analysis_path = write_analysis(failed_tests, output_path, format)
+    write_clusters(cluster_failed_tests(failed_tests, dag_index), clusters_path_for(analysis_path))
+    return analysis_path
+
+
+def collect_failed_tests(artifacts_dir: str = "data/artifacts", stream_manifest: bool = False) -> List[FailedTest]:
+    """
+    Load artifacts from disk and analyze failed tests without writing any output.
+
+    Args:
+        artifacts_dir: Directory containing run_results.json and manifest.json
+        stream_manifest: Extract only the needed nodes from manifest.json in a
+            single streaming pass instead of loading the whole file
+
+    Returns:
+        List of FailedTest records
+    """
+    return list(stream_failed_tests(artifacts_dir, stream_manifest))
+
+
+def stream_failed_tests(artifacts_dir: str = "data/artifacts", stream_manifest: bool = False) -> Iterator[FailedTest]:
+    """
+    Load artifacts from disk and yield FailedTest records as they are analyzed.
+
+    The artifacts are loaded up front; each failed test is then analyzed
+    when the consumer asks for it.
+
+    Args:
+        artifacts_dir: Directory containing run_results.json and manifest.json
+        stream_manifest: Extract only the needed nodes from manifest.json in a
+            single streaming pass instead of loading the whole file
+
+    Returns:
+        Iterator of FailedTest records
+    """
+    return prepare_failed_tests(artifacts_dir, stream_manifest)[0]
 
+
+def prepare_failed_tests(
+    artifacts_dir: str = "data/artifacts",
+    stream_manifest: bool = False
+) -> Tuple[Iterator[FailedTest], DagIndex]:
+    """
+    Like stream_failed_tests, also returning the manifest's DAG index (for clustering).
+
+    Returns:
+        Iterator of FailedTest records, and the DAG index
+    """
+    run_results, manifest, manifest_index, dag_index = _load_artifacts(Path(artifacts_dir), stream_manifest)
+    return iter_analyze_run(run_results, manifest, manifest_index, dag_index), dag_index
+
+
+def _load_artifacts(
+    artifacts_path: Path,
+    stream_manifest: bool
+) -> Tuple[Dict[str, Any], Dict[str, Any], ManifestIndex, DagIndex]:
+    """Load run_results.json and manifest.json (or its needed nodes) with the manifest and DAG indexes."""
     # Load dbt artifacts
-    with open(artifacts_path / "run_results.json", 'r') as f:
-        run_results = json.load(f)
+    run_results_path = artifacts_path / "run_results.json"
+    with span("parse.artifact", artifact="run_results.json"):
+        with open(run_results_path, 'r') as f:
+            run_results = json.load(f)
+    incr("bytes.parsed", run_results_path.stat().st_size)
+
+    manifest_path = artifacts_path / "manifest.json"
+    if stream_manifest:
+        node_ids = [result.get("unique_id", "") for result in _failed_results(run_results)]
+        with span("parse.manifest_stream", nodes=len(node_ids)):
+            manifest, manifest_index, dag_index = _stream_manifest(manifest_path, node_ids)
+    else:
+        with span("parse.artifact", artifact="manifest.json"):
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+        incr("bytes.parsed", manifest_path.stat().st_size)
 
-    with open(artifacts_path / "manifest.json", 'r') as f:
-        manifest = json.load(f)
+        # Index model lookups once instead of scanning all nodes per ref
+        with span("analyze.manifest_index"):
+            manifest_index = ManifestIndex.load_or_build(manifest_path, manifest)
 
-    # Find failed tests
-    failed_tests = [
-        result for result in run_results.get("results", [])
-        if result.get("status") == "fail"
-    ]
+        with span("analyze.dag_index"):
+            dag_index = DagIndex.load_or_build(manifest_index.manifest_sha256, manifest)
+
+    return run_results, manifest, manifest_index, dag_index
+
+
+def analyze_run(
+    run_results: Dict[str, Any],
+    manifest: Dict[str, Any],
+    manifest_index: Optional[ManifestIndex] = None,
+    dag_index: Optional[DagIndex] = None
+) -> List[FailedTest]:
+    """
+    Analyze failed tests from already-parsed artifacts.
+
+    Args:
+        run_results: Parsed run_results.json
+        manifest: Parsed manifest.json (or a partial manifest with the failing test nodes)
+        manifest_index: Index over the manifest's model nodes, built from manifest if not given
+        dag_index: Index over the manifest's DAG, built from manifest's parent_map if not given
+
+    Returns:
+        List of FailedTest records
+    """
+    with span("analyze.failed_tests") as record:
+        simplified_tests = list(iter_analyze_run(run_results, manifest, manifest_index, dag_index))
+        record["tests"] = len(simplified_tests)
+    return simplified_tests
+
+
+def iter_analyze_run(
+    run_results: Dict[str, Any],
+    manifest: Dict[str, Any],
+    manifest_index: Optional[ManifestIndex] = None,
+    dag_index: Optional[DagIndex] = None
+) -> Iterator[FailedTest]:
+    """
+    Yield a FailedTest record per failed result, analyzing each on demand.
+
+    Args:
+        run_results: Parsed run_results.json
+        manifest: Parsed manifest.json (or a partial manifest with the failing test nodes)
+        manifest_index: Index over the manifest's model nodes, built from manifest if not given
+        dag_index: Index over the manifest's DAG, built from manifest's parent_map if not given
+
+    Returns:
+        Iterator of FailedTest records
+    """
+    metrics = get_metrics()
+    for test in _analyze_failed_results(run_results, manifest, manifest_index, dag_index):
+        metrics.incr("tests.failed")
+        metrics.incr(f"tests.by_type.{test.test_type or 'unknown'}")
+        yield test
+
+
+def _analyze_failed_results(
+    run_results: Dict[str, Any],
+    manifest: Dict[str, Any],
+    manifest_index: Optional[ManifestIndex],
+    dag_index: Optional[DagIndex]
+) -> Iterator[FailedTest]:
+    """Build FailedTest records for the failed results in run_results."""
+    if manifest_index is None:
+        manifest_index = ManifestIndex.from_manifest(manifest)
+    if dag_index is None and "parent_map" in manifest:
+        with span("analyze.dag_index"):
+            dag_index = DagIndex.from_manifest(manifest)
 
     # Process each failed test
-    simplified_tests = []
-    for test_result in failed_tests:
+    for test_result in _failed_results(run_results):
         unique_id = test_result.get("unique_id", "")
 
         # Extract test name from unique_id
@@ -49,89 +211,224 @@ def analyze_failed_tests(artifacts_dir: str = "data/artifacts", output_path: Opt
         test_metadata = test_definition.get("test_metadata", {})
         refs = test_definition.get("refs", [])
 
-        # Extract test type with fallback detection and user-friendly mapping
-        test_type = test_metadata.get("name")
-        if not test_type:
-            # Use fallback detection for custom tests (already includes user-friendly mapping)
-            test_type = detect_test_type_from_unique_id(unique_id)
-        else:
-            # Apply user-friendly mapping to test_metadata names as well
-            test_type = apply_user_friendly_mapping(test_type)
+        # Test type from test_metadata, or classified from the unique_id for custom tests
+        test_type = classify_test(unique_id, test_metadata.get("name"))
 
         # Extract model file paths from manifest
-        model_file_paths = _extract_model_file_paths(refs, manifest)
-
-        simplified_test = {
-            "unique_id": unique_id,
-            "test_name": test_name,
-            "status": test_result.get("status", ""),
-            "message": test_result.get("message"),
-            "failures": test_result.get("failures", 0),
-            "compiled_code": test_result.get("compiled_code", ""),
-            "tags": config.get("tags", []),
-            "severity": config.get("severity"),
-            "error_threshold": config.get("error_if"),
-            "warn_threshold": config.get("warn_if"),
-            "test_type": test_type,
-            "test_parameters": test_metadata.get("kwargs", {}),
-            "related_models": [ref.get("name", "") for ref in refs if ref.get("name")],
-            "model_file_paths": model_file_paths,
-            "dependencies": test_definition.get("depends_on", {}).get("nodes", []),
-            "schema_file": test_definition.get("original_file_path")
-        }
-        simplified_tests.append(simplified_test)
-
-    # Create summary
-    summary = {
-        "total_failed_tests": len(simplified_tests),
-        "failed_tests": simplified_tests
-    }
-
-    # Set output path
-    if not output_path:
-        analysis_dir = Path("data/analysis")
-        analysis_dir.mkdir(parents=True, exist_ok=True)
-        output_path = analysis_dir / "failed_tests_debug_data.json"
-    else:
-        output_path = Path(output_path)
+        model_file_paths = _extract_model_file_paths(refs, manifest_index)
+
+        # Upstream sources and downstream models/exposures from the DAG
+        impact = dag_index.impact(unique_id) if dag_index is not None else TestImpact()
+
+        simplified_test = FailedTest(
+            unique_id=unique_id,
+            test_name=test_name,
+            status=test_result.get("status", ""),
+            message=test_result.get("message"),
+            failures=test_result.get("failures", 0),
+            compiled_code=test_result.get("compiled_code", ""),
+            tags=config.get("tags", []),
+            severity=config.get("severity"),
+            error_threshold=config.get("error_if"),
+            warn_threshold=config.get("warn_if"),
+            test_type=test_type,
+            test_parameters=test_metadata.get("kwargs", {}),
+            related_models=[ref.get("name", "") for ref in refs if ref.get("name")],
+            model_file_paths=model_file_paths,
+            dependencies=test_definition.get("depends_on", {}).get("nodes", []),
+            schema_file=test_definition.get("original_file_path"),
+            upstream_sources=impact.upstream_sources,
+            downstream_models=impact.downstream_models,
+            downstream_exposures=impact.downstream_exposures
+        )
+        yield simplified_test
+
+
+def default_analysis_path(format: str = "json") -> Path:
+    """Default analysis file for a format: data/analysis/failed_tests_debug_data.<format>"""
+    return Path(DEFAULT_ANALYSIS_DIR) / f"failed_tests_debug_data.{format}"
+
+
+def find_analysis_file() -> Optional[Path]:
+    """Most recently written default analysis file of any format, if there is one."""
+    existing = [path for path in map(default_analysis_path, ANALYSIS_FORMATS) if path.exists()]
+    return max(existing, key=lambda path: path.stat().st_mtime_ns) if existing else None
+
+
+class AnalysisWriter:
+    """
+    Writes FailedTest records to an analysis file.
 
-    # Write to file
-    with open(output_path, 'w') as f:
-        json.dump(summary, f, indent=2)
+    JSONL formats (one test per line, optionally gzip-compressed) are written
+    record by record. The JSON format has the test count in its header, so
+    its records are kept until close.
 
-    return str(output_path)
+    Records go to a temporary file next to the analysis file, which replaces
+    it on close. An analysis that fails partway is discarded, leaving the
+    previous analysis file in place.
+    """
+
+    def __init__(self, output_path: Optional[Union[str, Path]] = None, format: Optional[str] = None):
+        """
+        Args:
+            output_path: Analysis file (defaults to data/analysis/failed_tests_debug_data.<format>)
+            format: json, jsonl or jsonl.gz (defaults to the output path's extension, or json)
+        """
+        if format is None:
+            format = analysis_format(output_path) if output_path else "json"
+        if format not in ANALYSIS_FORMATS:
+            raise ValueError(f"Unknown analysis format {format!r} (expected one of {', '.join(ANALYSIS_FORMATS)})")
+
+        self.format = format
+        self.path = Path(output_path) if output_path else default_analysis_path(format)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+        self._records: List[Dict[str, Any]] = []
+
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix=".part", dir=self.path.parent)
+        os.close(fd)
+        self._tmp_path: Optional[Path] = Path(tmp_name)
+        self._file = open_analysis(self._tmp_path, "w", format) if format != "json" else None
+
+    def write(self, test: FailedTest):
+        """Write (or, for JSON, queue) one test."""
+        if self._file is not None:
+            self._file.write(json.dumps(test.to_dict(), separators=(",", ":")))
+            self._file.write("\n")
+        else:
+            self._records.append(test.to_dict())
+        self.count += 1
+
+    def close(self):
+        """Finish the file and move it into place."""
+        if self._tmp_path is None:
+            return
+        try:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            else:
+                summary = {
+                    "total_failed_tests": self.count,
+                    "failed_tests": self._records
+                }
+                with open(self._tmp_path, 'w') as f:
+                    json.dump(summary, f, indent=2)
+                self._records = []
+            os.chmod(self._tmp_path, 0o644)
+            os.replace(self._tmp_path, self.path)
+            self._tmp_path = None
+        except BaseException:
+            self.discard()
+            raise
+
+    def discard(self):
+        """Drop the partial file, leaving any previous analysis file untouched."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._tmp_path is not None:
+            self._tmp_path.unlink(missing_ok=True)
+            self._tmp_path = None
+        self._records = []
+
+    def __enter__(self) -> "AnalysisWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.discard()
+        else:
+            self.close()
 
 
-def _extract_model_file_paths(refs: List[Dict[str, Any]], manifest: Dict[str, Any]) -> List[str]:
+def write_analysis(
+    failed_tests: Iterable[FailedTest],
+    output_path: Optional[str] = None,
+    format: Optional[str] = None
+) -> str:
     """
-    Extract model file paths from refs using the manifest.
+    Write failed tests to the analysis file.
 
     Args:
-        refs: List of ref objects from test definition
-        manifest: The dbt manifest containing model definitions
+        failed_tests: FailedTest records to export (a list or a lazy iterator)
+        output_path: Optional custom output path for the analysis file
+        format: json, jsonl or jsonl.gz (defaults to the output path's
+            extension, or json)
 
     Returns:
-        List of model file paths
+        Path to the written analysis file
+    """
+    with span("analyze.write") as record:
+        with AnalysisWriter(output_path, format) as writer:
+            for test in failed_tests:
+                writer.write(test)
+        record["tests"] = writer.count
+
+    return str(writer.path)
+
+
+def tee_analysis(failed_tests: Iterable[FailedTest], writer: AnalysisWriter) -> Iterator[FailedTest]:
+    """Yield each test after writing it, so consumers start before the analysis is complete."""
+    for test in failed_tests:
+        writer.write(test)
+        yield test
+
+
+def _failed_results(run_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Find failed tests in run_results."""
+    return [
+        result for result in run_results.get("results", [])
+        if result.get("status") == "fail"
+    ]
+
+
+def _stream_manifest(manifest_path: Path, node_ids: List[str]):
     """
-    model_file_paths = []
-    nodes = manifest.get("nodes", {})
+    Stream the failing test nodes (and model stubs or the parent_map, if the
+    indexes are stale) from the manifest.
 
-    for ref in refs:
-        model_name = ref.get("name", "")
-        if not model_name:
-            continue
+    Args:
+        manifest_path: Path to manifest.json
+        node_ids: unique_ids of the failing tests
+
+    Returns:
+        Tuple of (partial manifest, ManifestIndex, DagIndex)
+    """
+    subset: Dict[str, Any] = {}
+
+    def load_with_models() -> Dict[str, Any]:
+        # Index is stale: pull model stubs (and the DAG, likely stale too) in the same pass as the test nodes
+        subset.update(extract_manifest_nodes(manifest_path, node_ids, include_models=True, extra_keys=["parent_map"]))
+        return subset
+
+    manifest_index = ManifestIndex.load_or_build(manifest_path, loader=load_with_models)
+    dag_index = DagIndex.load(manifest_index.manifest_sha256)
+    if not subset:
+        extra_keys = [] if dag_index is not None else ["parent_map"]
+        subset = extract_manifest_nodes(manifest_path, node_ids, include_models=False, extra_keys=extra_keys)
 
-        # Find the model in the manifest nodes
-        # Model unique_ids follow the pattern: model.package.model_name
-        for node_id, node_data in nodes.items():
-            if (node_data.get("resource_type") == "model" and
-                node_data.get("name") == model_name):
-                file_path = node_data.get("original_file_path")
-                if file_path:
-                    model_file_paths.append(file_path)
-                break
+    if dag_index is None:
+        with span("analyze.dag_index"):
+            dag_index = DagIndex.from_manifest(subset, manifest_index.manifest_sha256)
+            dag_index.save()
+    subset.pop("parent_map", None)
 
-    return model_file_paths
+    return subset, manifest_index, dag_index
+
+
+def _extract_model_file_paths(refs: List[Dict[str, Any]], manifest_index: ManifestIndex) -> List[str]:
+    """
+    Extract model file paths from refs using the manifest index.
+
+    Args:
+        refs: List of ref objects from test definition
+        manifest_index: Precomputed index over the manifest's model nodes
+
+    Returns:
+        List of model file paths
+    """
+    return manifest_index.model_file_paths(refs)
 
 
 def _extract_test_name(unique_id: str) -> str:
@@ -161,38 +458,10 @@ def _extract_test_name(unique_id: str) -> str:
 
 
 def apply_user_friendly_mapping(test_type: str) -> str:
-    """
-    Apply user-friendly mapping to test type names.
-    This is the single source of truth for test type name mapping.
-    """
-    if test_type == "expect_row_values_to_have_data_for_every_n_datepart":
-        return "data_completeness"
-    return test_type
+    """Map a test_metadata name to its registered test type name."""
+    return get_test_type_registry().canonical_name(test_type)
 
 
 def detect_test_type_from_unique_id(unique_id: str) -> str:
-    """
-    Detect the type of test from unique_id when test_metadata is not available.
-    This is the core logic for test type detection with user-friendly mapping applied.
-    """
-    if not unique_id:
-        return "custom_test"
-
-    # Check for known generic test patterns in unique_id
-    raw_test_type = None
-    if "accepted_values" in unique_id:
-        raw_test_type = "accepted_values"
-    elif "not_null" in unique_id:
-        raw_test_type = "not_null"
-    elif "unique" in unique_id:
-        raw_test_type = "unique"
-    elif "expression_is_true" in unique_id:
-        raw_test_type = "expression_is_true"
-    elif "expect_row_values_to_have_data" in unique_id:
-        raw_test_type = "expect_row_values_to_have_data_for_every_n_datepart"
-    else:
-        # Default to custom_test for any unrecognized pattern
-        raw_test_type = "custom_test"
-
-    # Apply user-friendly mapping
-    return apply_user_friendly_mapping(raw_test_type)
+    """Detect the type of test from unique_id when test_metadata is not available."""
+    return get_test_type_registry().classify(unique_id)
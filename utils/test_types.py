@@ -0,0 +1,235 @@
+"""
+Test type registry: classifies failed tests and picks their prompt generator.
+
+Test types are registered with the test name prefixes that identify them in
+a unique_id, and generators register the test types they handle:
+
+    register_test_type("is_positive", patterns=["is_positive"], namespaces=["my_package"])
+
+    @register_generator("is_positive")
+    class IsPositiveGenerator(BaseGenerator):
+        ...
+
+Tests of a type without a generator use the default (generic) generator.
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Tuple, Iterable, Callable, Type
+
+CUSTOM_TEST = "custom_test"
+
+
+@dataclass(frozen=True)
+class TestType:
+    """A registered test type and how to recognize it."""
+
+    name: str
+    # Test name prefixes, e.g. "not_null" for test.<project>.not_null_orders_id.<hash>
+    patterns: Tuple[str, ...] = ()
+    # Packages whose generic tests are prefixed with their name (dbt_utils_expression_is_true_...)
+    namespaces: Tuple[str, ...] = ()
+    # test_metadata names reported as this type
+    aliases: Tuple[str, ...] = ()
+    # Patterns of higher precedence are tried first; ties go to the longer pattern
+    precedence: int = 0
+
+
+class TestTypeRegistry:
+    """
+    Registered test types and generators, with a single compiled matcher.
+
+    All patterns are compiled into one regex anchored at the start of the
+    test name, with one named group per pattern and the alternatives ordered
+    by precedence and length. Classifying a unique_id is one match against
+    its name segment, so "unique" inside a custom test's name (or in the
+    project or model name) no longer routes it to the unique generator, and
+    unique_combination_of_columns is not taken for unique.
+    """
+
+    def __init__(self):
+        self._types: Dict[str, TestType] = {}
+        self._aliases: Dict[str, str] = {}
+        self._generators: Dict[str, type] = {}
+        self._default_generator: Optional[type] = None
+        self._matcher: Optional[re.Pattern] = None
+        self._group_types: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        patterns: Optional[Iterable[str]] = None,
+        namespaces: Iterable[str] = (),
+        aliases: Iterable[str] = (),
+        precedence: int = 0
+    ) -> TestType:
+        """
+        Register (or replace) a test type.
+
+        Args:
+            name: Test type name stored on FailedTest.test_type
+            patterns: Test name prefixes identifying the type (defaults to [name])
+            namespaces: Package prefixes allowed before a pattern
+            aliases: test_metadata names mapped to this type
+            precedence: Tried before lower-precedence patterns
+        """
+        test_type = TestType(
+            name=name,
+            patterns=tuple(patterns) if patterns is not None else (name,),
+            namespaces=tuple(namespaces),
+            aliases=tuple(aliases),
+            precedence=precedence
+        )
+        with self._lock:
+            self._types[name] = test_type
+            for alias in test_type.aliases:
+                self._aliases[alias] = name
+            self._matcher = None
+        return test_type
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sent to worker processes with the PromptManager; the lock and matcher are rebuilt there
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_matcher"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._types
+
+    def register_generator(self, generator_cls: type, test_types: Iterable[str] = (), default: bool = False):
+        """
+        Route test types to a generator class.
+
+        Args:
+            generator_cls: Generator class, instantiated by PromptManager
+            test_types: Test types it handles
+            default: Use it for test types without a generator of their own
+        """
+        with self._lock:
+            for test_type in test_types:
+                self._generators[test_type] = generator_cls
+            if default:
+                self._default_generator = generator_cls
+
+    def _compile(self) -> re.Pattern:
+        with self._lock:
+            if self._matcher is not None:
+                return self._matcher
+
+            alternatives = []
+            for test_type in self._types.values():
+                for pattern in test_type.patterns:
+                    alternatives.append((-test_type.precedence, -len(pattern), test_type, pattern))
+            alternatives.sort(key=lambda alternative: alternative[:2])
+
+            groups = []
+            self._group_types = {}
+            for index, (_, _, test_type, pattern) in enumerate(alternatives):
+                group = f"t{index}"
+                self._group_types[group] = test_type.name
+                namespaces = "|".join(re.escape(namespace) for namespace in test_type.namespaces)
+                prefix = f"(?:(?:{namespaces})_)?" if namespaces else ""
+                groups.append(f"(?P<{group}>{prefix}{re.escape(pattern)})")
+
+            # Source tests are prefixed with source_; a pattern must end at a word boundary of the name
+            body = "|".join(groups) if groups else "(?!)"
+            self._matcher = re.compile(f"(?:source_)?(?:{body})(?=_|$)")
+            return self._matcher
+
+    def classify(self, unique_id: str) -> str:
+        """
+        Test type of a unique_id (test.<project>.<name>[.<hash>]).
+
+        Returns:
+            The registered type whose pattern starts the test name, or
+            custom_test if none does
+        """
+        if not unique_id:
+            return CUSTOM_TEST
+        parts = unique_id.split(".")
+        name = parts[2] if len(parts) >= 3 else unique_id
+
+        match = self._compile().match(name)
+        return self._group_types[match.lastgroup] if match else CUSTOM_TEST
+
+    def canonical_name(self, test_type: str) -> str:
+        """Registered name for a test_metadata name (unregistered names pass through)."""
+        return self._aliases.get(test_type, test_type)
+
+    def generator_for(self, test_type: Optional[str]) -> Optional[type]:
+        """Generator class for a test type, falling back to the default generator."""
+        return self._generators.get(test_type or "", self._default_generator)
+
+    def fingerprint(self) -> str:
+        """Test type to generator routing, for detecting changes in incremental state."""
+        routes = sorted(f"{test_type}={cls.__module__}.{cls.__qualname__}"
+                        for test_type, cls in self._generators.items())
+        default = self._default_generator
+        routes.append(f"*={default.__module__}.{default.__qualname__}" if default else "*=")
+        return ",".join(routes)
+
+
+_default_registry = TestTypeRegistry()
+
+# Built-in dbt and package generic tests
+_default_registry.register("not_null")
+_default_registry.register("unique")
+_default_registry.register("accepted_values")
+_default_registry.register("relationships")
+_default_registry.register("unique_combination_of_columns", namespaces=["dbt_utils"])
+_default_registry.register("expression_is_true", namespaces=["dbt_utils"])
+_default_registry.register(
+    "data_completeness",
+    patterns=["expect_row_values_to_have_data"],
+    namespaces=["dbt_expectations"],
+    aliases=["expect_row_values_to_have_data_for_every_n_datepart"]
+)
+
+
+def get_test_type_registry() -> TestTypeRegistry:
+    """Get the shared test type registry."""
+    return _default_registry
+
+
+def register_test_type(
+    name: str,
+    patterns: Optional[Iterable[str]] = None,
+    namespaces: Iterable[str] = (),
+    aliases: Iterable[str] = (),
+    precedence: int = 0
+) -> TestType:
+    """Register a test type in the shared registry (see TestTypeRegistry.register)."""
+    return _default_registry.register(name, patterns, namespaces, aliases, precedence)
+
+
+def register_generator(*test_types: str, default: bool = False) -> Callable[[Type], Type]:
+    """
+    Class decorator routing test types to a generator in the shared registry.
+
+    Test types that are not registered yet are registered with their name
+    as the pattern.
+    """
+    def decorator(generator_cls: Type) -> Type:
+        for test_type in test_types:
+            if test_type not in _default_registry:
+                _default_registry.register(test_type)
+        _default_registry.register_generator(generator_cls, test_types, default=default)
+        return generator_cls
+    return decorator
+
+
+def classify_test(unique_id: str, metadata_name: Optional[str] = None) -> str:
+    """
+    Test type of a test: its test_metadata name when known, mapped to the
+    registered name, otherwise classified from its unique_id.
+    """
+    if metadata_name:
+        return _default_registry.canonical_name(metadata_name)
+    return _default_registry.classify(unique_id)
@@ -0,0 +1,319 @@
+"""
+Watch mode: poll dbt Cloud for newly completed runs and process each once.
+"""
+
+import os
+import json
+import random
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set, Union
+from .api_client import DbtCloudClient, COMPLETED_RUN_STATUSES
+from .incremental import DEFAULT_STATE_PATH
+from .metrics import get_metrics, reset_metrics, span, incr
+from .pipeline import run_pipeline
+
+CURSOR_VERSION = 1
+DEFAULT_CURSOR_PATH = "data/state/watch_cursor.json"
+
+# Poll interval bounds in seconds: polls start at the minimum and back off
+# towards the maximum while nothing changes
+DEFAULT_MIN_INTERVAL = 10.0
+DEFAULT_MAX_INTERVAL = 300.0
+BACKOFF_MULTIPLIER = 1.5
+
+# Runs per poll; a longer gap since the last poll is caught up page by page
+POLL_PAGE_SIZE = 10
+MAX_CATCH_UP_RUNS = 200
+
+# Cancelled runs (30) are skipped: their artifacts are usually incomplete
+PROCESSED_RUN_STATUSES = (10, 20)
+
+# Attempts before a run whose pipeline keeps failing is given up on
+MAX_RUN_ATTEMPTS = 3
+
+
+class WatchCursor:
+    """
+    Persisted position of a watcher, so each run is processed once across restarts.
+
+    Stored as JSON (data/state/watch_cursor.json by default):
+        {"version", "account_id", "job_id", "last_run_id", "in_flight", "done", "attempts", "etag"}
+
+    Every run with an ID up to last_run_id has been handled. Runs newer than
+    an in-flight (queued or running) run can finish first; they are kept in
+    done until the older run is handled too, so nothing is skipped. The
+    in-flight runs of the last fetched page are stored as well, since a
+    304 response does not repeat them. in_flight, done and attempts only
+    ever hold runs above last_run_id, which keeps the file small however
+    long the watcher runs.
+    """
+
+    def __init__(self, cursor_path: Union[str, Path], account_id: str, job_id: str):
+        self.cursor_path = Path(cursor_path)
+        self.account_id = str(account_id)
+        self.job_id = str(job_id)
+        self.last_run_id: Optional[int] = None
+        self.in_flight: List[int] = []
+        self.done: Set[int] = set()
+        self.attempts: Dict[int, int] = {}
+        self.etag: Optional[str] = None
+
+    @classmethod
+    def load(cls, cursor_path: Union[str, Path], account_id: str, job_id: str) -> "WatchCursor":
+        """Load the cursor, ignoring missing or corrupt files and cursors of another job."""
+        cursor = cls(cursor_path, account_id, job_id)
+        try:
+            with open(cursor.cursor_path, 'r') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return cursor
+
+        if (
+            isinstance(stored, dict)
+            and stored.get("version") == CURSOR_VERSION
+            and stored.get("account_id") == cursor.account_id
+            and stored.get("job_id") == cursor.job_id
+        ):
+            cursor.last_run_id = stored.get("last_run_id")
+            cursor.in_flight = stored.get("in_flight", [])
+            cursor.done = set(stored.get("done", []))
+            cursor.attempts = {int(run_id): count for run_id, count in stored.get("attempts", {}).items()}
+            cursor.etag = stored.get("etag")
+        return cursor
+
+    def is_new(self, run_id: int) -> bool:
+        """Whether a run has not been handled yet."""
+        return self.last_run_id is None or (run_id > self.last_run_id and run_id not in self.done)
+
+    def mark_done(self, run_id: int):
+        """Record a run as handled."""
+        self.done.add(run_id)
+        self.attempts.pop(run_id, None)
+
+    def advance(self, unprocessed: Optional[List[int]] = None):
+        """
+        Move last_run_id past handled runs that no unhandled run precedes.
+
+        Args:
+            unprocessed: Completed runs still waiting to be processed
+        """
+        blocking = [run_id for run_id in self.in_flight + (unprocessed or []) if self.is_new(run_id)]
+        blocking += list(self.attempts)
+        limit = min(blocking) if blocking else None
+        handled = [run_id for run_id in self.done if limit is None or run_id < limit]
+        if handled:
+            self.last_run_id = max(handled + [self.last_run_id or 0])
+            self.done = {run_id for run_id in self.done if run_id > self.last_run_id}
+            self.in_flight = [run_id for run_id in self.in_flight if run_id > self.last_run_id]
+
+    def save(self):
+        """Write the cursor file atomically."""
+        payload = {
+            "version": CURSOR_VERSION,
+            "account_id": self.account_id,
+            "job_id": self.job_id,
+            "last_run_id": self.last_run_id,
+            "in_flight": self.in_flight,
+            "done": sorted(self.done),
+            "attempts": {str(run_id): count for run_id, count in sorted(self.attempts.items())},
+            "etag": self.etag
+        }
+
+        self.cursor_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{self.cursor_path.name}.", suffix=".part", dir=self.cursor_path.parent)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(payload, f, separators=(",", ":"))
+            os.replace(tmp_name, self.cursor_path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+
+def next_interval(interval: float, active: bool, min_interval: float, max_interval: float) -> float:
+    """
+    Adaptive poll interval.
+
+    Drops to min_interval while runs are being processed or in flight, and
+    grows by BACKOFF_MULTIPLIER while the job is idle (or the API errors),
+    up to max_interval.
+    """
+    if active:
+        return min_interval
+    return min(interval * BACKOFF_MULTIPLIER, max_interval)
+
+
+class Watcher:
+    """
+    Long-running loop that turns each newly completed run into prompts.
+
+    Each poll asks for the newest page of the job's runs with If-None-Match,
+    so an unchanged job costs one 304 response. Completed runs the cursor
+    has not seen are sent through the in-memory pipeline oldest first, and
+    the cursor is saved after every run. A restart resumes from the cursor;
+    a crash between finishing a run and saving the cursor is the only case
+    where a run is processed again. On a fresh cursor only the latest
+    completed run is processed.
+
+    Metrics are reset every poll, so memory stays flat over days of uptime;
+    with metrics_dir, the metrics of each processed run are written there.
+    """
+
+    def __init__(
+        self,
+        account_id: str,
+        job_id: str,
+        prompts_dir: str = "data/prompts",
+        cursor_path: Union[str, Path] = DEFAULT_CURSOR_PATH,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        use_cache: bool = True,
+        incremental: bool = False,
+        state_path: str = DEFAULT_STATE_PATH,
+        metrics_dir: Optional[Union[str, Path]] = None,
+        client: Optional[DbtCloudClient] = None
+    ):
+        self.account_id = str(account_id)
+        self.job_id = str(job_id)
+        self.prompts_dir = prompts_dir
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.use_cache = use_cache
+        self.incremental = incremental
+        self.state_path = state_path
+        self.metrics_dir = Path(metrics_dir) if metrics_dir else None
+        self.client = client or DbtCloudClient()
+        self.cursor = WatchCursor.load(cursor_path, self.account_id, self.job_id)
+        self.stop_event = threading.Event()
+        self.runs_processed = 0
+
+    def stop(self):
+        """Ask the loop to exit after the current poll or run."""
+        self.stop_event.set()
+
+    def close(self):
+        """Release the polling client's connections."""
+        self.client.close()
+
+    def _fetch_runs(self) -> Optional[List[Dict[str, Any]]]:
+        """Newest runs since the cursor (newest first), or None if nothing changed."""
+        runs, etag = self.client.poll_runs(self.account_id, self.job_id, limit=POLL_PAGE_SIZE, etag=self.cursor.etag)
+        if runs is None:
+            return None
+
+        # The page may not reach back to the cursor after a long pause
+        last_run_id = self.cursor.last_run_id
+        if last_run_id is not None and len(runs) == POLL_PAGE_SIZE and runs[-1]["id"] > last_run_id:
+            runs = []
+            for run in self.client.iter_runs(self.account_id, self.job_id, first_page_size=POLL_PAGE_SIZE,
+                                             max_runs=MAX_CATCH_UP_RUNS):
+                if run["id"] <= last_run_id:
+                    break
+                runs.append(run)
+
+        self.cursor.etag = etag
+        return runs
+
+    def _start_cursor(self, runs: List[Dict[str, Any]]):
+        """Position a fresh cursor just before the latest completed run."""
+        completed = [run["id"] for run in runs if run.get("status") in COMPLETED_RUN_STATUSES]
+        self.cursor.last_run_id = max(completed) - 1 if completed else 0
+
+    def process_run(self, run_id: int) -> bool:
+        """Run the pipeline for one run; returns False if it failed."""
+        try:
+            with span("watch.run", run_id=run_id):
+                summary = run_pipeline(
+                    self.account_id,
+                    run_id=str(run_id),
+                    prompts_dir=self.prompts_dir,
+                    use_cache=self.use_cache,
+                    incremental=self.incremental,
+                    state_path=self.state_path,
+                    verbose=False
+                )
+        except Exception as e:
+            attempts = self.cursor.attempts.get(run_id, 0) + 1
+            self.cursor.attempts[run_id] = attempts
+            if attempts >= MAX_RUN_ATTEMPTS:
+                print(f"  ❌ Run {run_id}: {e} (giving up after {attempts} attempts)")
+                self.cursor.mark_done(run_id)
+            else:
+                print(f"  ⚠️  Run {run_id}: {e} (attempt {attempts}/{MAX_RUN_ATTEMPTS}, will retry)")
+            return False
+
+        self.cursor.mark_done(run_id)
+        self.runs_processed += 1
+        incr("watch.runs_processed")
+        print(f"  ✅ Run {run_id}: {summary['prompts_generated']} prompts for {summary['failed_tests']} failed tests")
+        if self.metrics_dir is not None:
+            get_metrics().write(self.metrics_dir / f"watch_run_{run_id}.json")
+        return True
+
+    def poll(self) -> bool:
+        """
+        One poll: process every new completed run and save the cursor.
+
+        Returns:
+            True if the job is active (runs were processed or are in flight)
+        """
+        reset_metrics()
+        with span("watch.poll"):
+            runs = self._fetch_runs()
+            if runs is None:
+                incr("watch.not_modified")
+                runs = []
+                if not self.cursor.attempts:
+                    return bool(self.cursor.in_flight)
+            else:
+                if self.cursor.last_run_id is None:
+                    self._start_cursor(runs)
+                self.cursor.in_flight = [
+                    run["id"] for run in runs
+                    if run.get("status") not in COMPLETED_RUN_STATUSES and self.cursor.is_new(run["id"])
+                ]
+
+            skip_status = set(COMPLETED_RUN_STATUSES) - set(PROCESSED_RUN_STATUSES)
+            to_process = sorted(
+                {run["id"] for run in runs
+                 if run.get("status") in PROCESSED_RUN_STATUSES and self.cursor.is_new(run["id"])}
+                | set(self.cursor.attempts)
+            )
+            for run in runs:
+                if run.get("status") in skip_status and self.cursor.is_new(run["id"]):
+                    self.cursor.mark_done(run["id"])
+
+            for run_id in to_process:
+                if self.stop_event.is_set():
+                    break
+                self.process_run(run_id)
+                self.cursor.advance([later for later in to_process if later > run_id])
+                self.cursor.save()
+
+            self.cursor.advance()
+            self.cursor.save()
+            return bool(to_process or self.cursor.in_flight)
+
+    def run(self, once: bool = False):
+        """
+        Poll until stop() is called (or after one poll with once=True).
+
+        Poll errors are reported and retried with backoff instead of
+        ending the loop.
+        """
+        interval = self.min_interval
+        while not self.stop_event.is_set():
+            try:
+                active = self.poll()
+            except Exception as e:
+                print(f"  ⚠️  Poll failed: {e}")
+                active = False
+
+            if once:
+                return
+            interval = next_interval(interval, active, self.min_interval, self.max_interval)
+            # Jitter keeps many watchers from polling in lockstep
+            self.stop_event.wait(interval * random.uniform(0.9, 1.1))
@@ -0,0 +1,386 @@
+"""
+Webhook receiver: run the pipeline when dbt Cloud reports a finished run.
+"""
+
+import hmac
+import json
+import queue
+import hashlib
+import threading
+import requests
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, Iterable, Union
+from uuid import uuid4
+from .fanout import job_output_dir, DEFAULT_JOBS_OUTPUT_DIR, PER_JOB_DOWNLOAD_WORKERS
+from .metrics import reset_metrics, span, incr
+from .pipeline import run_pipeline
+from .watcher import PROCESSED_RUN_STATUSES
+
+DEFAULT_WEBHOOK_HOST = "127.0.0.1"
+DEFAULT_WEBHOOK_PORT = 8080
+DEFAULT_WEBHOOK_PATH = "/webhooks/dbt-cloud"
+DEFAULT_WEBHOOK_WORKERS = 4
+
+# Runs waiting for a worker; deliveries beyond this get 503 so dbt Cloud retries later
+DEFAULT_QUEUE_SIZE = 1000
+
+# Event and run IDs remembered for deduplicating redeliveries
+DEDUPE_WINDOW = 10000
+
+# Spans kept by the long-running receiver's metrics collector
+MAX_RETAINED_SPANS = 1000
+
+MAX_BODY_BYTES = 1024 * 1024
+
+RUN_EVENT_TYPES = ("job.run.completed", "job.run.errored")
+
+
+def sign_payload(body: bytes, secret: str) -> str:
+    """Hex HMAC-SHA256 of a request body, as sent by dbt Cloud in the Authorization header."""
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: str) -> bool:
+    """Check a delivery's signature in constant time."""
+    if not signature:
+        return False
+    return hmac.compare_digest(sign_payload(body, secret), signature.strip().lower())
+
+
+@dataclass(frozen=True)
+class RunEvent:
+    """A finished run reported by a webhook delivery."""
+
+    event_id: str
+    account_id: str
+    job_id: str
+    run_id: str
+    status_code: Optional[int]
+
+
+def parse_event(payload: Dict[str, Any]) -> Optional[RunEvent]:
+    """
+    Extract the run from a dbt Cloud webhook payload.
+
+    Returns:
+        RunEvent, or None for event types other than finished runs
+
+    Raises:
+        ValueError: If the payload or its data is not an object, or a run
+            event lacks its account, job or run ID
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Webhook payload must be a JSON object")
+    if payload.get("eventType") not in RUN_EVENT_TYPES:
+        return None
+
+    data = payload.get("data") or {}
+    if not isinstance(data, dict):
+        raise ValueError("Webhook payload data must be a JSON object")
+    account_id = payload.get("accountId")
+    job_id = data.get("jobId")
+    run_id = data.get("runId")
+    if not account_id or not job_id or not run_id:
+        raise ValueError("Webhook payload is missing accountId, data.jobId or data.runId")
+
+    status_code = data.get("runStatusCode")
+    return RunEvent(
+        event_id=str(payload.get("eventId") or ""),
+        account_id=str(account_id),
+        job_id=str(job_id),
+        run_id=str(run_id),
+        status_code=int(status_code) if status_code is not None else None
+    )
+
+
+class WebhookReceiver:
+    """
+    Queue of webhook-reported runs drained by a pool of pipeline workers.
+
+    Deliveries are acknowledged as soon as they are queued, so dbt Cloud
+    never waits on a pipeline run. Redeliveries are dropped by event ID and
+    by run (a run can be reported by more than one event type or webhook).
+    A run whose pipeline fails is forgotten, so a redelivery retries it.
+    Each job writes into its own tree, like fan-out:
+        <output_dir>/<account>_<job>/prompts/
+        <output_dir>/<account>_<job>/state/prompts_state.json  (incremental)
+
+    Runs of different jobs are processed in parallel; runs of the same job
+    one at a time, since they share a prompts directory.
+    """
+
+    def __init__(
+        self,
+        secret: str,
+        output_dir: Union[str, Path] = DEFAULT_JOBS_OUTPUT_DIR,
+        workers: int = DEFAULT_WEBHOOK_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        use_cache: bool = True,
+        incremental: bool = False,
+        job_ids: Optional[Iterable[str]] = None
+    ):
+        """
+        Args:
+            secret: Webhook secret used to verify signatures
+            output_dir: Root of the per-job output trees
+            workers: Number of pipeline workers
+            queue_size: Maximum number of queued runs
+            use_cache: Set to False to bypass the local artifact cache
+            incremental: Only render prompts for new or changed failures per job
+            job_ids: Only process runs of these jobs (all jobs if not given)
+        """
+        if not secret:
+            raise ValueError("A webhook secret is required. Set DBT_CLOUD_WEBHOOK_SECRET environment variable.")
+
+        self.secret = secret
+        self.output_dir = Path(output_dir)
+        self.workers = max(1, workers)
+        self.use_cache = use_cache
+        self.incremental = incremental
+        self.job_ids = {str(job_id) for job_id in job_ids} if job_ids else None
+        self.queue: "queue.Queue[Optional[RunEvent]]" = queue.Queue(maxsize=queue_size)
+        self.stats = {"received": 0, "queued": 0, "duplicates": 0, "ignored": 0, "rejected": 0,
+                      "processed": 0, "errors": 0}
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._job_locks: Dict[str, threading.Lock] = {}
+        self._threads: List[threading.Thread] = []
+
+    def _remember(self, key: str):
+        """Record a dedupe key, forgetting the oldest beyond DEDUPE_WINDOW."""
+        self._seen[key] = None
+        if len(self._seen) > DEDUPE_WINDOW:
+            self._seen.popitem(last=False)
+
+    def _dedupe_keys(self, event: RunEvent) -> List[str]:
+        keys = [f"run:{event.account_id}:{event.run_id}"]
+        if event.event_id:
+            keys.append(f"event:{event.event_id}")
+        return keys
+
+    def submit(self, body: bytes, signature: Optional[str]) -> Tuple[int, str]:
+        """
+        Verify and enqueue one delivery.
+
+        Returns:
+            (HTTP status, outcome): 200 queued/duplicate/ignored, 400 invalid,
+            401 bad signature, 503 queue full
+        """
+        with self._lock:
+            self.stats["received"] += 1
+
+        if not verify_signature(body, signature, self.secret):
+            self._count("rejected")
+            return 401, "invalid signature"
+
+        try:
+            event = parse_event(json.loads(body))
+        except (TypeError, ValueError) as e:
+            self._count("rejected")
+            return 400, str(e)
+
+        if (
+            event is None
+            or (event.status_code is not None and event.status_code not in PROCESSED_RUN_STATUSES)
+            or (self.job_ids is not None and event.job_id not in self.job_ids)
+        ):
+            self._count("ignored")
+            return 200, "ignored"
+
+        keys = self._dedupe_keys(event)
+        with self._lock:
+            if any(key in self._seen for key in keys):
+                self.stats["duplicates"] += 1
+                return 200, "duplicate"
+            try:
+                self.queue.put_nowait(event)
+            except queue.Full:
+                self.stats["rejected"] += 1
+                return 503, "queue full"
+            for key in keys:
+                self._remember(key)
+            self.stats["queued"] += 1
+
+        incr("webhook.queued")
+        return 200, "queued"
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _job_lock(self, event: RunEvent) -> threading.Lock:
+        with self._lock:
+            return self._job_locks.setdefault(f"{event.account_id}:{event.job_id}", threading.Lock())
+
+    def process(self, event: RunEvent):
+        """Run the pipeline for one reported run."""
+        job_dir = job_output_dir(self.output_dir, event.account_id, event.job_id)
+        try:
+            with self._job_lock(event), span("webhook.run", job_id=event.job_id, run_id=event.run_id):
+                summary = run_pipeline(
+                    event.account_id,
+                    run_id=event.run_id,
+                    prompts_dir=str(job_dir / "prompts"),
+                    use_cache=self.use_cache,
+                    max_workers=PER_JOB_DOWNLOAD_WORKERS,
+                    incremental=self.incremental,
+                    state_path=str(job_dir / "state" / "prompts_state.json"),
+                    verbose=False
+                )
+        except Exception as e:
+            # Forget the run so a redelivery (e.g. once its artifacts are ready) retries it
+            with self._lock:
+                self.stats["errors"] += 1
+                for key in self._dedupe_keys(event):
+                    self._seen.pop(key, None)
+            print(f"  ❌ {event.account_id}:{event.job_id} run {event.run_id}: {e}")
+            return
+
+        self._count("processed")
+        print(f"  ✅ {event.account_id}:{event.job_id} run {event.run_id}: "
+              f"{summary['prompts_generated']} prompts for {summary['failed_tests']} failed tests")
+
+    def _worker(self):
+        while True:
+            event = self.queue.get()
+            try:
+                if event is None:
+                    return
+                self.process(event)
+            finally:
+                self.queue.task_done()
+
+    def start(self):
+        """Start the worker threads."""
+        reset_metrics(max_spans=MAX_RETAINED_SPANS)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"webhook-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, drain: bool = True):
+        """
+        Stop the workers.
+
+        Args:
+            drain: Finish the queued runs first; otherwise only the runs in progress
+        """
+        if not drain:
+            try:
+                while True:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+            except queue.Empty:
+                pass
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def health(self) -> Dict[str, Any]:
+        """Queue depth and delivery counters."""
+        with self._lock:
+            return {"status": "ok", "queue_depth": self.queue.qsize(), "workers": self.workers, **self.stats}
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog sized for delivery bursts."""
+
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_server(
+    receiver: WebhookReceiver,
+    host: str = DEFAULT_WEBHOOK_HOST,
+    port: int = DEFAULT_WEBHOOK_PORT,
+    path: str = DEFAULT_WEBHOOK_PATH
+) -> WebhookServer:
+    """
+    HTTP server for the receiver.
+
+    POST <path> accepts deliveries; GET /health reports queue depth and counters.
+    """
+
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _respond(self, status: int, payload: Dict[str, Any]):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._respond(200, receiver.health())
+            else:
+                self._respond(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != path:
+                self._respond(404, {"error": "not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self._respond(400, {"error": "invalid Content-Length"})
+                return
+            if length > MAX_BODY_BYTES:
+                self._respond(413, {"error": "payload too large"})
+                return
+
+            status, outcome = receiver.submit(self.rfile.read(length), self.headers.get("Authorization"))
+            self._respond(status, {"status": outcome} if status == 200 else {"error": outcome})
+
+    return WebhookServer((host, port), WebhookHandler)
+
+
+def send_test_event(
+    url: str,
+    secret: str,
+    account_id: str,
+    job_id: str,
+    run_id: str,
+    status_code: int = 20,
+    event_id: Optional[str] = None,
+    event_type: str = "job.run.completed"
+) -> requests.Response:
+    """
+    Stand-in for dbt Cloud: POST a signed "run completed" delivery to a receiver.
+
+    The payload has the shape of dbt Cloud's webhook body.
+    """
+    payload = {
+        "accountId": int(account_id) if str(account_id).isdigit() else account_id,
+        "webhooksID": "local-test",
+        "eventId": event_id or str(uuid4()),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "eventType": event_type,
+        "webhookName": "dbt-test-fixer local test",
+        "data": {
+            "jobId": str(job_id),
+            "runId": str(run_id),
+            "runStatus": {10: "Success", 20: "Errored", 30: "Cancelled"}.get(status_code, "Unknown"),
+            "runStatusCode": status_code,
+            "runFinishedAt": datetime.now(timezone.utc).isoformat()
+        }
+    }
+    body = json.dumps(payload).encode("utf-8")
+    return requests.post(
+        url,
+        data=body,
+        headers={"Authorization": sign_payload(body, secret), "Content-Type": "application/json"},
+        timeout=10
+    )